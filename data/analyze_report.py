@@ -1,11 +1,37 @@
-import re
 import os
 import sys
+import json
+import hashlib
+import functools
+
+from report_cache import cached_parse, file_sha1
+import bayes_rules
+from bayes_rules import load_rules
 
 # Default Target (can be overridden)
 DEFAULT_TARGET_CODE = '600519'
 DEFAULT_TARGET_NAME = '贵州茅台'
 
+DATA_DIR = '/Users/tang/PycharmProjects/pythonProject/chajian/data'
+DEFAULT_REPORT_PATH = os.path.join(DATA_DIR, 'merged_report.md')
+DEFAULT_OUT_PATH = os.path.join(DATA_DIR, 'beiyesi_out.md')
+DEFAULT_RANK_PATH = os.path.join(DATA_DIR, 'beiyesi_rank.md')
+
+# Bump when ReportIndex output changes so cached parses are rebuilt
+PARSER_VERSION = 1
+
+# Sidecar written by merge_reports.stream_merge_markdown_files: section title -> [byte offset, length]
+SECTION_INDEX_SUFFIX = '.index.json'
+
+# Sections of the merged report used by the scorer
+SECTIONS = {
+    'growth': "成长性_czxbj",
+    'dupont': "杜邦分析_dbfxbj",
+    'valuation': "估值比较_gzbj",
+    'dividend': "分红_fhrzgl",
+}
+SECTION_KEYS = {name: key for key, name in SECTIONS.items()}
+
 # --- Bayesian Inference Engine ---
 class BayesianAnalyzer:
     def __init__(self, initial_prior=0.10):
@@ -13,6 +39,7 @@ class BayesianAnalyzer:
         initial_prior: The base rate probability that any random stock is a "Quality Company".
                        Conservative start (e.g., 10%).
         """
+        self.initial_prior = initial_prior
         self.prior = initial_prior
         self.evidence_log = [] # To track why probability changed
 
@@ -57,18 +84,53 @@ class BayesianAnalyzer:
         self.prior = posterior # Update state
         return posterior
 
+    def apply(self, factor, values):
+        """
+        Applies one compiled factor of a bayes_rules.RuleSet: a bisect over its band edges
+        picks the band the stock falls in (if any) and its likelihoods go through update().
+        """
+        band = factor.lookup(values)
+        if band is None: return None
+        return self.update(band.name, factor.describe(values), band.p_q, band.p_not_q)
+
 # --- Parsing Logic (Kept Robust) ---
-def parse_markdown_table(markdown_content, section_name):
-    section_pattern = r"# " + re.escape(section_name) + r"(.*?)(\n# |\Z)"
-    match = re.search(section_pattern, markdown_content, re.DOTALL)
-    if not match: return [], []
-    
-    lines = match.group(1).strip().split('\n')
-    table_lines = [l for l in lines if l.strip().startswith('|')]
-    if not table_lines: return [], []
+class TableRows(list):
+    """
+    Parsed table rows with memoized keyword lookups for extract_named_row.
+    When no cell of a column is longer than the keyword, substring match equals
+    exact match and the lookup is a dict hit instead of a scan.
+    """
+    def __init__(self, rows=()):
+        super().__init__(rows)
+        self._columns = {}
+        self._memo = {}
+
+    def _column(self, col):
+        if col not in self._columns:
+            exact, max_len = {}, 0
+            for row in self:
+                if len(row) > col:
+                    exact.setdefault(row[col], row)
+                    max_len = max(max_len, len(row[col]))
+            self._columns[col] = (exact, max_len)
+        return self._columns[col]
+
+    def find(self, col, keyword):
+        key = (col, keyword)
+        if key not in self._memo:
+            exact, max_len = self._column(col)
+            if len(keyword) >= max_len:
+                row = exact.get(keyword)
+            else:
+                row = next((r for r in self if len(r) > col and keyword in r[col]), None)
+            self._memo[key] = row
+        return self._memo[key]
+
+def parse_table_lines(table_lines):
+    if not table_lines: return TableRows(), []
 
     headers = [h.strip() for h in table_lines[0].split('|') if h.strip()]
-    data = []
+    data = TableRows()
     for line in table_lines[1:]:
         if '---' in line: continue
         cells = [c.strip() for c in line.split('|')]
@@ -77,7 +139,64 @@ def parse_markdown_table(markdown_content, section_name):
             data.append(cells)
     return data, headers
 
+class ReportIndex:
+    """
+    Single pass over the merged report: every "# section" heading is mapped to
+    its parsed (rows, headers) table. Lookups afterwards never touch the text again.
+    """
+    def __init__(self, content):
+        self.sections = {}
+        title, table_lines = None, []
+        for line in content.split('\n'):
+            if line.startswith('# '):
+                self._add(title, table_lines)
+                title, table_lines = line[2:].strip(), []
+            elif title is not None and line.strip().startswith('|'):
+                table_lines.append(line)
+        self._add(title, table_lines)
+
+    @classmethod
+    def from_dict(cls, sections):
+        index = cls.__new__(cls)
+        index.sections = {t: (TableRows(rows), headers) for t, (rows, headers) in sections.items()}
+        return index
+
+    @classmethod
+    def from_spans(cls, read_span, spans):
+        """Builds the index from known section byte ranges, parsing only those slices."""
+        index = cls.__new__(cls)
+        index.sections = {}
+        for title, (offset, length) in spans.items():
+            lines = read_span(offset, length).decode('utf-8').split('\n')
+            index._add(title, [l for l in lines if l.strip().startswith('|')])
+        return index
+
+    def to_dict(self):
+        # Plain lists only, so the cache pickle does not carry lookup memos
+        return {t: ([list(r) for r in rows], headers) for t, (rows, headers) in self.sections.items()}
+
+    def _add(self, title, table_lines):
+        # First occurrence wins, like re.search in the old per-section parser
+        if title is not None and title not in self.sections:
+            self.sections[title] = parse_table_lines(table_lines)
+
+    def table(self, section_name):
+        if section_name in self.sections:
+            return self.sections[section_name]
+        for title, parsed in self.sections.items():
+            if title.startswith(section_name): return parsed
+        return TableRows(), []
+
+@functools.lru_cache(maxsize=4)
+def _content_index(markdown_content):
+    # Keyed by the text itself (str caches its hash), so a loop over sections parses once
+    return ReportIndex(markdown_content)
+
+def parse_markdown_table(markdown_content, section_name):
+    return _content_index(markdown_content).table(section_name)
+
 def extract_named_row(data, keyword_col_index, keyword):
+    if isinstance(data, TableRows): return data.find(keyword_col_index, keyword)
     for row in data:
         if len(row) > keyword_col_index and keyword in row[keyword_col_index]: return row
     return None
@@ -111,116 +230,210 @@ def calculate_industry_median(rows, col_index):
     return (values[n//2 - 1] + values[n//2]) / 2 if n % 2 == 0 else values[n//2]
 
 # --- Main Logic ---
-def analyze_report(file_path, target_code=DEFAULT_TARGET_CODE, target_name=DEFAULT_TARGET_NAME):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-    # Initialize Bayesian Engine (Base Rate = 10%)
-    bayes = BayesianAnalyzer(initial_prior=0.10)
-    metrics = {}
-    
-    # 1. Growth Inference
-    rows, headers = parse_markdown_table(content, "成长性_czxbj")
-    col_g3y = find_col_index(headers, ['3年复合', '基本每股收益']) 
-    if col_g3y == -1 and len(headers) > 3: col_g3y = 3 
-    
-    target_row = extract_named_row(rows, 1, target_code)
-    
-    if target_row:
-        g3y = safe_float(target_row[col_g3y])
-        metrics['growth_3y'] = g3y
-        
-        if g3y is not None:
-            if g3y > 15:
-                # High Growth: Quality Co (80%), Average Co (20%)
-                bayes.update("High Growth (>15%)", f"{g3y}%", 0.8, 0.2)
-            elif g3y < 5:
-                # Low Growth: Quality Co (10%), Average Co (60%)
-                bayes.update("Low Growth (<5%)", f"{g3y}%", 0.1, 0.6)
-            
-            # Relative Growth
-            ind_row = extract_named_row(rows, 0, '行业平均')
-            if ind_row:
-                ind_g3y = safe_float(ind_row[col_g3y])
-                if ind_g3y is not None:
-                    if g3y > ind_g3y:
-                        # Outperformance: Quality (75%), Avg (30%)
-                        bayes.update("Outperformed Industry", f"vs {ind_g3y}%", 0.75, 0.3)
-    
-    # 2. Quality/Profitability Inference (Strongest Signal)
-    rows, headers = parse_markdown_table(content, "杜邦分析_dbfxbj")
-    col_roe = find_col_index(headers, ['ROE', '净资产收益率']) or 3
-    target_row = extract_named_row(rows, 1, target_code)
-    
-    if target_row:
-        roe = safe_float(target_row[col_roe])
-        metrics['roe'] = roe
-        
-        if roe is not None:
-            if roe > 25:
-                # Exceptional ROE: Very strong indicator of Moat
-                # Quality (90%), Average (5%) -> Huge Likelihood Ratio
-                bayes.update("Exceptional ROE (>25%)", f"{roe}%", 0.9, 0.05)
-            elif roe > 15:
-                bayes.update("Strong ROE (>15%)", f"{roe}%", 0.7, 0.2)
-            elif roe < 8:
-                bayes.update("Weak ROE (<8%)", f"{roe}%", 0.05, 0.5)
-
-    # 3. Valuation (Safety Check) - This affects 'Buy Probability', not 'Quality Probability' directly
-    # But for this report we treat "Good Investment" as Quality + Value.
-    # Let's assess Quality first, then separately assessing "Attractiveness".
-    # Actually, let's keep it simple: "Probability this is a Strong Buy".
-    
-    rows, headers = parse_markdown_table(content, "估值比较_gzbj")
-    col_pe = find_col_index(headers, ['市盈率', 'PE'], exclude=['PEG']) or 4
-    col_peg = find_col_index(headers, ['PEG']) or 3
-    
-    target_row = extract_named_row(rows, 1, target_code)
-    if target_row:
-        pe = safe_float(target_row[col_pe])
-        peg = safe_float(target_row[col_peg])
-        ind_median_pe = calculate_industry_median(rows, col_pe)
-        
-        metrics['pe'] = pe
-        metrics['ind_median_pe'] = ind_median_pe
-        
-        # Valuation Context:
-        # If PE is low relative to Industry, it increases "Attractiveness" probability.
-        if pe is not None and ind_median_pe is not None and ind_median_pe > 0:
-            rel_val = pe / ind_median_pe
-            if rel_val < 0.8:
-                bayes.update("Undervalued vs Industry", f"PE {pe} vs {ind_median_pe}", 0.7, 0.3)
-            elif rel_val > 1.5:
-                bayes.update("Overvalued vs Industry", f"PE {pe} vs {ind_median_pe}", 0.2, 0.6)
-        
-        # PEG Logic
-        if peg is not None:
-            if 0 < peg < 1:
-                bayes.update("Undervalued Growth (PEG<1)", f"{peg}", 0.7, 0.3)
-
-    # 4. Dividend & Risks
-    rows, headers = parse_markdown_table(content, "分红_fhrzgl")
-    if rows:
-        col_yield = find_col_index(headers, ['股息率']) or 0
-        div_yield = safe_float(rows[0][col_yield])
-        metrics['div_yield'] = div_yield
-        
-        if div_yield is not None:
-            if div_yield > 3.0:
-                bayes.update("High Dividend Yield", f"{div_yield}%", 0.6, 0.3)
-                
-                # Value Trap Check (Determinstic Penalty)
-                # If Yield is High but Growth is Neg, it's a strong signal of Value Trap (Not Quality)
-                g3y = metrics.get('growth_3y')
-                if g3y is not None and g3y < 0:
-                    # Trait: High Yield + Neg Growth
-                    # Quality (1%), Average/Trap (40%)
-                    bayes.update("Value Trap Warning", "Yield >3% & Neg Growth", 0.01, 0.40)
+def is_stock_code(val):
+    return val.isdigit() and len(val) == 6
+
+def parse_report_sections(content):
+    # Scan the report once, then pick the sections the scorer needs from the index
+    return select_sections(ReportIndex(content))
+
+def select_sections(index, titles=()):
+    # Built-in sections under their short keys, plus any other titles a rule set reads
+    sections = {key: index.table(name) for key, name in SECTIONS.items()}
+    for title in titles:
+        if title not in SECTION_KEYS: sections[title] = index.table(title)
+    return sections
+
+def section_table(sections, title):
+    return sections.get(SECTION_KEYS.get(title, title)) or (TableRows(), [])
+
+def read_section_spans(file_path):
+    # Returns the streaming merge's section offsets, or None if missing or stale.
+    # Same size and mtime as when the sidecar was written: trusted. Same size under a new
+    # mtime (rewrite, touch, copy): only if the content hash still matches.
+    index_path = file_path + SECTION_INDEX_SUFFIX
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        st = os.stat(file_path)
+        if meta['size'] != st.st_size: return None
+        if meta['mtime_ns'] != st.st_mtime_ns and meta['sha1'] != file_sha1(file_path): return None
+        return meta['sections']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def load_report_index(file_path, use_cache=True):
+    spans = read_section_spans(file_path)
+
+    # Unchanged reports are served from the on-disk parse cache (see report_cache.py)
+    if not use_cache:
+        if spans is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return ReportIndex(f.read())
+        with open(file_path, 'rb') as f:
+            def read_span(offset, length):
+                f.seek(offset)
+                return f.read(length)
+            return ReportIndex.from_spans(read_span, spans)
+
+    def parse(raw):
+        if spans is None: return ReportIndex(raw.decode('utf-8')).to_dict()
+        return ReportIndex.from_spans(lambda offset, length: raw[offset:offset + length], spans).to_dict()
+
+    sections = cached_parse(file_path, parse, version=PARSER_VERSION, raw=True)
+    return ReportIndex.from_dict(sections)
+
+def load_report_sections(file_path, use_cache=True, rules=None):
+    return select_sections(load_report_index(file_path, use_cache), rules.sections if rules else ())
+
+def cell_value(row, col):
+    return safe_float(row[col]) if row is not None and 0 <= col < len(row) else None
+
+def bind_features(sections, rules, overrides=None):
+    """
+    Resolves the rule set's features against one report: table, column and, for features
+    shared by every stock (industry rows, medians), the value itself. Done once per report.
+    overrides: {feature name: value} replacing shared values (e.g. a metric store median).
+    """
+    bound = []
+    for feature in rules.features:
+        rows, headers = section_table(sections, feature.section)
+        col = find_col_index(headers, feature.columns, exclude=feature.exclude)
+        if col == -1: col = feature.default_column
+        shared = None
+        if overrides and feature.name in overrides:
+            shared = overrides[feature.name]
+        elif feature.row == '@median':
+            shared = calculate_industry_median(rows, col)
+        elif feature.row == '@first':
+            shared = cell_value(rows[0] if rows else None, col)
+        elif feature.shared:
+            shared = cell_value(extract_named_row(rows, 0, feature.row), col)
+        bound.append((feature, rows, col, shared))
+    return bound
+
+def stock_values(bound, target_code, include_home=True):
+    """
+    Feature values of one stock. A feature is present only when the stock has a row in its
+    section (the whole table for "@first"); present but unparsable values are None.
+    """
+    values, metrics, own_rows = {}, {}, {}
+    for feature, rows, col, shared in bound:
+        if feature.home_only and not include_home: continue
+        if feature.row == '@first':
+            if not rows: continue
+            value = shared
+        else:
+            # Several features usually read the same section; find the stock's row once
+            if feature.section not in own_rows:
+                own_rows[feature.section] = extract_named_row(rows, 1, target_code)
+            row = own_rows[feature.section]
+            if row is None: continue
+            value = cell_value(row, col) if not feature.shared else shared
+        values[feature.name] = value
+        if feature.metric: metrics[feature.name] = value
+    return values, metrics
+
+def score_stock(sections, target_code, ind_median_pe=None, include_dividend=True, rules=None, bound=None):
+    """
+    Runs the Bayesian update chain for one stock against already parsed sections.
+
+    ind_median_pe: pre-computed industry median PE (batch mode computes it once).
+    include_dividend: the 分红 table belongs to the exported stock only, so peers skip it.
+    rules: compiled bayes_rules.RuleSet, bayes_rules.json by default.
+    bound: bind_features() result to reuse across stocks of the same report; bound here
+           (ind_median_pe applied) when omitted.
+    Returns (bayes, metrics).
+    """
+    rules = rules or load_rules()
+    if bound is None:
+        overrides = {'ind_median_pe': ind_median_pe} if ind_median_pe is not None else None
+        bound = bind_features(sections, rules, overrides)
+    values, metrics = stock_values(bound, target_code, include_home=include_dividend)
+
+    bayes = BayesianAnalyzer(initial_prior=rules.prior)
+    for factor in rules.factors:
+        bayes.apply(factor, values)
+    return bayes, metrics
+
+def analyze_report(file_path, target_code=DEFAULT_TARGET_CODE, target_name=DEFAULT_TARGET_NAME,
+                   out_path=DEFAULT_OUT_PATH, use_cache=True, metric_store=None, rules=None):
+    """metric_store: optional metric_store.MetricStore; its PE cross-section replaces the table median."""
+    rules = rules or load_rules()
+    sections = load_report_sections(file_path, use_cache, rules)
+    ind_median_pe = metric_store.industry_median('pe') if metric_store is not None else None
+    overrides = {'ind_median_pe': ind_median_pe} if ind_median_pe is not None else None
+    bound = bind_features(sections, rules, overrides)
+    bayes, metrics = score_stock(sections, target_code, rules=rules, bound=bound)
 
     # Generate Report
-    generate_markdown_report(target_code, target_name, bayes, metrics)
+    generate_markdown_report(target_code, target_name, bayes, metrics, out_path)
+    return bayes, metrics
+
+def model_fingerprint(rules=None):
+    # Hash of the scoring code and the rule definitions: any change to rules or likelihoods
+    # invalidates incremental results
+    h = hashlib.sha1()
+    for module in (__file__, bayes_rules.__file__):
+        with open(os.path.abspath(module), 'rb') as f:
+            h.update(f.read())
+    h.update((rules or load_rules()).fingerprint.encode('ascii'))
+    return h.hexdigest()
+
+# --- Batch Screener ---
+def list_peer_codes(sections):
+    """
+    Collects every 6-digit code row of the peer tables, in first-seen order.
+    Returns (codes, names, home_code) where home_code is the exported stock itself
+    (its 排名 cell reads like "15/39").
+    """
+    codes, names, home_code = [], {}, None
+    for key in ('growth', 'dupont', 'valuation'):
+        rows, _ = sections[key]
+        for row in rows:
+            if len(row) > 2 and is_stock_code(row[1]):
+                if row[1] not in names:
+                    codes.append(row[1])
+                    names[row[1]] = row[2]
+                if home_code is None and '/' in row[0]:
+                    home_code = row[1]
+    return codes, names, home_code
+
+def analyze_all(file_path, out_path=DEFAULT_RANK_PATH, use_cache=True, metric_store=None, rules=None):
+    """Scores every peer in the report with a single parse and writes a ranked table."""
+    rules = rules or load_rules()
+    sections = load_report_sections(file_path, use_cache, rules)
+    codes, names, home_code = list_peer_codes(sections)
+
+    # Columns and shared values (industry median PE, ...) are resolved once for all peers
+    ind_median_pe = metric_store.industry_median('pe') if metric_store is not None else None
+    overrides = {'ind_median_pe': ind_median_pe} if ind_median_pe is not None else None
+    bound = bind_features(sections, rules, overrides)
+
+    results = []
+    for code in codes:
+        bayes, metrics = score_stock(sections, code, include_dividend=(code == home_code),
+                                     rules=rules, bound=bound)
+        results.append({
+            'code': code,
+            'name': names[code],
+            'posterior': bayes.prior,
+            'metrics': metrics,
+            'evidence': len(bayes.evidence_log),
+        })
+    results.sort(key=lambda r: r['posterior'], reverse=True)
 
-def generate_markdown_report(code, name, bayes, metrics):
+    generate_ranking_report(results, out_path, prior=rules.prior)
+    return results
+
+def classify_action(final_prob):
+    action = "观望 (Hold)"
+    if final_prob > 90: action = "强力买入 (Strong Buy)"
+    elif final_prob > 75: action = "买入 (Buy)"
+    elif final_prob < 30: action = "卖出 (Sell)"
+    return action
+
+def generate_markdown_report(code, name, bayes, metrics, out_path=DEFAULT_OUT_PATH):
     final_prob = bayes.prior * 100
     
     lines = []
@@ -228,10 +441,7 @@ def generate_markdown_report(code, name, bayes, metrics):
     lines.append(f"> **优质标的置信度 (Confidence of Quality): {final_prob:.1f}%**\n\n")
     
     # 1. Conclusion
-    action = "观望 (Hold)"
-    if final_prob > 90: action = "强力买入 (Strong Buy)"
-    elif final_prob > 75: action = "买入 (Buy)"
-    elif final_prob < 30: action = "卖出 (Sell)"
+    action = classify_action(final_prob)
     
     lines.append(f"## 核心结论: {action}\n\n")
     
@@ -239,7 +449,7 @@ def generate_markdown_report(code, name, bayes, metrics):
     lines.append("## 贝叶斯推理路径 (Bayesian Inference Trace)\n")
     lines.append("| 证据因子 (Evidence) | 数值 | 似然比 (L-Ratio) | 概率变动 (Prob Change) |\n")
     lines.append("| --- | --- | --- | --- |\n")
-    lines.append(f"| **初始先验 (Base Rate)** | 市场基准 | - | 10.0% |\n")
+    lines.append(f"| **初始先验 (Base Rate)** | 市场基准 | - | {bayes.initial_prior*100:.1f}% |\n")
     
     for log in bayes.evidence_log:
         direction = "🔺" if log['impact'] == "Positive" else "🔻"
@@ -257,14 +467,48 @@ def generate_markdown_report(code, name, bayes, metrics):
     
     lines.append("\n---\n> **免责声明**: 概率仅代表历史数据特征的匹配度，不代表未来收益承诺。\n")
 
-    out_path = '/Users/tang/PycharmProjects/pythonProject/chajian/data/beiyesi_out.md'
     with open(out_path, 'w', encoding='utf-8') as f:
         f.writelines(lines)
     print(f"Bayesian Analysis Complete: {out_path}")
 
+def format_metric(val, suffix=''):
+    return '--' if val is None else f"{val}{suffix}"
+
+def generate_ranking_report(results, out_path=DEFAULT_RANK_PATH, prior=0.10):
+    lines = []
+    lines.append("# 贝叶斯批量筛选排名 (Bayesian Screener Ranking)\n")
+    lines.append(f"> 样本数量: {len(results)}，初始先验 (Base Rate): {prior*100:.1f}%\n\n")
+    lines.append("| 排名 | 代码 | 简称 | 置信度 | 结论 | 3年复合增长 | ROE | PE | 证据数 |\n")
+    lines.append("| --- | --- | --- | --- | --- | --- | --- | --- | --- |\n")
+
+    for i, r in enumerate(results, 1):
+        final_prob = r['posterior'] * 100
+        m = r['metrics']
+        lines.append(
+            f"| {i} | {r['code']} | {r['name']} | **{final_prob:.1f}%** | {classify_action(final_prob)} | "
+            f"{format_metric(m.get('growth_3y'), '%')} | {format_metric(m.get('roe'), '%')} | "
+            f"{format_metric(m.get('pe'))} | {r['evidence']} |\n"
+        )
+
+    lines.append("\n---\n> **免责声明**: 概率仅代表历史数据特征的匹配度，不代表未来收益承诺。\n")
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    print(f"Bayesian Screener Complete: {out_path} ({len(results)} stocks)")
+
 if __name__ == "__main__":
-    report_path = '/Users/tang/PycharmProjects/pythonProject/chajian/data/merged_report.md'
-    if len(sys.argv) > 1 and sys.argv[1].isdigit():
-        analyze_report(report_path, target_code=sys.argv[1])
+    report_path = DEFAULT_REPORT_PATH
+    args = sys.argv[1:]
+    rules = None
+    if '--rules' in args:
+        # Score with another model variant: python analyze_report.py --all --rules variant.json
+        i = args.index('--rules')
+        rules = load_rules(args[i + 1])
+        del args[i:i + 2]
+    if args and args[0] == '--all':
+        # Batch mode: rank every peer code in the report
+        analyze_all(report_path, rules=rules)
+    elif args and args[0].isdigit():
+        analyze_report(report_path, target_code=args[0], rules=rules)
     elif os.path.exists(report_path):
-        analyze_report(report_path)
+        analyze_report(report_path, rules=rules)
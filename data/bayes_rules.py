@@ -0,0 +1,191 @@
+import os
+import json
+import hashlib
+from bisect import bisect_right
+
+# --- Data-driven Bayesian rules ---
+# A rule set is a JSON file (bayes_rules.json is the default model) with:
+#   prior     base rate P(Q) before any evidence
+#   features  named inputs read from the merged report:
+#               section         report section title, e.g. "成长性_czxbj"
+#               columns         header keywords (find_col_index), "exclude" to skip headers
+#               default_column  used when no header matches
+#               row             "code" (the stock's own row, default), "@median" (industry
+#                               median over the code rows), "@first" (first table row), or
+#                               text matched against the first cell, e.g. "行业平均"
+#               home_only       only the exported stock gets it (the 分红 table is its own)
+#               metric          copy the value into the metrics dict of score_stock()
+#   factors   evidence read off one feature, applied in file order:
+#               feature         input; "minus" / "over" another feature to compare against it
+#               when            {feature: band} gates the factor on another feature
+#               value           str.format template for the evidence log, e.g. "{roe}%"
+#               bands           [{"above" (>) | "min" (>=), "below" (<) | "max" (<=),
+#                                 "name", "p_q": P(E|Q), "p_not_q": P(E|~Q)}]
+#                               bands of a factor must not overlap; at most one fires.
+# load_rules() compiles each factor's bands into sorted edges plus one outcome per interval
+# (once per file), so scoring a stock is one bisect per factor instead of walking threshold chains.
+
+RULES_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES_PATH = os.path.join(RULES_DIR, 'bayes_rules.json')
+
+LOWER_KEYS = {'above': 1, 'min': 0}
+UPPER_KEYS = {'below': 0, 'max': 1}
+
+# Edges are (threshold, flag) tuples. A value x lies right of edge (v, 0) when x >= v and
+# right of (v, 1) when x > v, so probing with (x, 0.5) makes bisect_right count the edges
+# x has passed, which is the index of its interval.
+PROBE = 0.5
+
+class RuleError(ValueError):
+    pass
+
+class Feature:
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.section = spec['section']
+        self.columns = list(spec['columns'])
+        self.exclude = list(spec.get('exclude', [])) or None
+        self.default_column = spec.get('default_column', -1)
+        self.row = spec.get('row', 'code')
+        self.home_only = bool(spec.get('home_only', False))
+        self.metric = bool(spec.get('metric', False))
+
+    @property
+    def shared(self):
+        # One value per report rather than per stock
+        return self.row != 'code'
+
+class Band:
+    def __init__(self, spec):
+        self.name = spec.get('name')
+        self.p_q = spec.get('p_q')
+        self.p_not_q = spec.get('p_not_q')
+        lower = [(spec[k], flag) for k, flag in LOWER_KEYS.items() if k in spec]
+        upper = [(spec[k], flag) for k, flag in UPPER_KEYS.items() if k in spec]
+        if len(lower) > 1 or len(upper) > 1:
+            raise RuleError(f"band {self.name!r}: give at most one lower and one upper bound")
+        self.lower = (float(lower[0][0]), lower[0][1]) if lower else None
+        self.upper = (float(upper[0][0]), upper[0][1]) if upper else None
+        self.lo = self.hi = None  # interval range, set by compile_bands()
+
+def compile_bands(bands, where):
+    """Sorted edges and the band owning each interval between them (None = no evidence)."""
+    edges = sorted({e for b in bands for e in (b.lower, b.upper) if e is not None})
+    position = {e: i for i, e in enumerate(edges)}
+    outcomes = [None] * (len(edges) + 1)
+    for band in bands:
+        band.lo = position[band.lower] + 1 if band.lower else 0
+        band.hi = position[band.upper] if band.upper else len(edges)
+        if band.lo > band.hi:
+            raise RuleError(f"{where}: band {band.name!r} is empty")
+        for i in range(band.lo, band.hi + 1):
+            if outcomes[i] is not None:
+                raise RuleError(f"{where}: bands {outcomes[i].name!r} and {band.name!r} overlap")
+            outcomes[i] = band
+    return edges, outcomes
+
+def interval_of(edges, x):
+    return bisect_right(edges, (x, PROBE))
+
+class Gate:
+    """A single band from a factor's "when" clause."""
+    def __init__(self, feature, spec, where):
+        self.feature = feature
+        self.band = Band(spec)
+        self.edges, _ = compile_bands([self.band], where)
+
+    def allows(self, values):
+        x = values.get(self.feature)
+        if x is None or x != x: return False
+        return self.band.lo <= interval_of(self.edges, x) <= self.band.hi
+
+class Factor:
+    def __init__(self, spec, index):
+        self.feature = spec['feature']
+        self.minus = spec.get('minus')
+        self.over = spec.get('over')
+        self.value = spec.get('value', '{' + self.feature + '}')
+        where = f"factor #{index} ({self.feature})"
+        self.when = [Gate(f, band, where) for f, band in spec.get('when', {}).items()]
+        self.bands = [Band(b) for b in spec['bands']]
+        for band in self.bands:
+            if not band.name or band.p_q is None or band.p_not_q is None:
+                raise RuleError(f"{where}: every band needs name, p_q and p_not_q")
+            if not (0 < band.p_q <= 1 and 0 < band.p_not_q <= 1):
+                raise RuleError(f"{where}: band {band.name!r} likelihoods must be in (0, 1]")
+        self.edges, self.outcomes = compile_bands(self.bands, where)
+        self.plain = not (self.minus or self.over or self.when)
+
+    def inputs(self):
+        return [self.feature] + [f for f in (self.minus, self.over) if f] + [g.feature for g in self.when]
+
+    def observed(self, values):
+        """The number the bands are looked up with, or None when an input is missing."""
+        x = values.get(self.feature)
+        if x is None: return None
+        if self.minus:
+            other = values.get(self.minus)
+            if other is None: return None
+            x = x - other
+        if self.over:
+            other = values.get(self.over)
+            if other is None or not other > 0: return None
+            x = x / other
+        if x != x: return None  # NaN never fires, like a failed comparison
+        for gate in self.when:
+            if not gate.allows(values): return None
+        return x
+
+    def lookup(self, values):
+        if self.plain:
+            x = values.get(self.feature)
+            if x is None or x != x: return None
+        else:
+            x = self.observed(values)
+            if x is None: return None
+        return self.outcomes[interval_of(self.edges, x)]
+
+    def describe(self, values):
+        return self.value.format_map(FormatValues(values))
+
+class FormatValues(dict):
+    def __missing__(self, key):
+        return None
+
+class RuleSet:
+    def __init__(self, spec, source=None):
+        self.source = source
+        self.name = spec.get('name', os.path.basename(source) if source else 'rules')
+        self.prior = float(spec.get('prior', 0.10))
+        if not 0 < self.prior < 1:
+            raise RuleError(f"{self.name}: prior must be in (0, 1)")
+        self.features = [Feature(f) for f in spec['features']]
+        self.feature_names = [f.name for f in self.features]
+        if len(set(self.feature_names)) != len(self.feature_names):
+            raise RuleError(f"{self.name}: duplicate feature names")
+        self.factors = [Factor(f, i) for i, f in enumerate(spec['factors'], 1)]
+        for factor in self.factors:
+            missing = [f for f in factor.inputs() if f not in self.feature_names]
+            if missing:
+                raise RuleError(f"{self.name}: unknown feature(s) {missing} in factor {factor.feature}")
+        # Canonical form of the definition, for model_fingerprint()
+        self.fingerprint = hashlib.sha1(
+            json.dumps(spec, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @property
+    def sections(self):
+        return list(dict.fromkeys(f.section for f in self.features))
+
+_compiled = {}
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """Compiled RuleSet for path; recompiled only when the file changes."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _compiled.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        cached = _compiled[path] = (key, RuleSet(spec, source=path))
+    return cached[1]
@@ -0,0 +1,154 @@
+import sys
+import weakref
+import numpy as np
+
+from analyze_report import (
+    BayesianAnalyzer, DEFAULT_REPORT_PATH, DEFAULT_RANK_PATH,
+    load_report_sections, list_peer_codes, safe_float, bind_features, generate_ranking_report,
+)
+from bayes_rules import load_rules
+
+# --- Vectorized Bayesian Engine ---
+# Same rule set as score_stock() (bayes_rules.json by default), evaluated for every stock
+# at once. Posteriors are computed in log-odds space:
+#   logit(P(Q|E1..En)) = logit(P(Q)) + sum(log(P(Ei|Q) / P(Ei|~Q)))
+# Feature matrix columns are the rule set's features, in file order (RuleSet.feature_names).
+
+def _factor_input(factor, X, col):
+    # Vector form of Factor.observed(): NaN wherever the scalar path would get None
+    x = X[:, col[factor.feature]]
+    if factor.minus:
+        x = x - X[:, col[factor.minus]]
+    if factor.over:
+        d = X[:, col[factor.over]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.where(d > 0, x / d, np.nan)
+    for gate in factor.when:
+        x = np.where(_in_band(gate.edges, gate.band, X[:, col[gate.feature]]), x, np.nan)
+    return x
+
+def _in_band(edges, band, x):
+    # Counting the edges x has passed gives the same interval index as the scalar bisect
+    idx = np.zeros(x.shape, dtype=np.int64)
+    for v, flag in edges:
+        idx += (x > v) if flag else (x >= v)
+    return ~np.isnan(x) & (idx >= band.lo) & (idx <= band.hi)
+
+def compile_vector_rules(rules):
+    """
+    (factor, condition over the feature matrix, value formatter, P(E|Q), P(E|~Q)), one entry
+    per band, in the update order of score_stock() so traces replay identically.
+    """
+    col = {name: i for i, name in enumerate(rules.feature_names)}
+    compiled = []
+    for factor in rules.factors:
+        for band in factor.bands:
+            cond = lambda X, factor=factor, band=band: _in_band(factor.edges, band, _factor_input(factor, X, col))
+            compiled.append((band.name, cond, factor.describe, band.p_q, band.p_not_q))
+    return compiled
+
+# Compiled rules per RuleSet; load_rules() hands out a new RuleSet when the file changes
+_compiled = weakref.WeakKeyDictionary()
+
+def vector_rules(rules):
+    compiled = _compiled.get(rules)
+    if compiled is None:
+        compiled = _compiled[rules] = compile_vector_rules(rules)
+    return compiled
+
+def _logit(p):
+    return np.log(p) - np.log1p(-p)
+
+class VectorBayesEngine:
+    def __init__(self, rules=None, initial_prior=None):
+        """rules: compiled bayes_rules.RuleSet (default rule set if None); its prior unless overridden."""
+        self.ruleset = rules or load_rules()
+        self.features = self.ruleset.feature_names
+        self.rules = vector_rules(self.ruleset)
+        self.initial_prior = self.ruleset.prior if initial_prior is None else initial_prior
+        p_q = np.array([r[3] for r in self.rules], dtype=np.float64)
+        p_a = np.array([r[4] for r in self.rules], dtype=np.float64)
+        self.log_lr = np.log(p_q) - np.log(p_a)
+
+    def evidence(self, X):
+        """Boolean (n_stocks, n_rules) matrix of which rules fire for each stock."""
+        E = np.zeros((X.shape[0], len(self.rules)), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for j, rule in enumerate(self.rules):
+                E[:, j] = rule[1](X)
+        return E
+
+    def posterior(self, E):
+        log_odds = _logit(self.initial_prior) + E.astype(np.float64) @ self.log_lr
+        return 1.0 / (1.0 + np.exp(-log_odds))
+
+    def score(self, X):
+        E = self.evidence(X)
+        return self.posterior(E), E
+
+    def trace(self, X, E, i):
+        """Replays stock i through BayesianAnalyzer to rebuild its evidence log on demand."""
+        values = {name: _py(X[i, j]) for j, name in enumerate(self.features)}
+        bayes = BayesianAnalyzer(initial_prior=self.initial_prior)
+        for j in np.flatnonzero(E[i]):
+            name, _, fmt, p_q, p_a = self.rules[j]
+            bayes.update(name, fmt(values), p_q, p_a)
+        return bayes
+
+def _py(val):
+    return None if np.isnan(val) else float(val)
+
+def build_feature_matrix(sections, codes, home_code=None, rules=None):
+    """Extracts the scorer inputs of every code into a float64 matrix (NaN = missing)."""
+    rules = rules or load_rules()
+    X = np.full((len(codes), len(rules.features)), np.nan)
+    index = {code: i for i, code in enumerate(codes)}
+
+    for j, (feature, rows, col, shared) in enumerate(bind_features(sections, rules)):
+        if feature.home_only:
+            # e.g. the 分红 table: it describes the exported stock only
+            if home_code in index and shared is not None: X[index[home_code], j] = shared
+        elif feature.shared:
+            if shared is not None: X[:, j] = shared
+        else:
+            seen = set()
+            for row in rows:
+                # First matching row wins, like extract_named_row
+                if len(row) > 1 and row[1] in index and row[1] not in seen and 0 <= col < len(row):
+                    seen.add(row[1])
+                    val = safe_float(row[col])
+                    if val is not None: X[index[row[1]], j] = val
+
+    return X
+
+def screen(file_path=DEFAULT_REPORT_PATH, out_path=DEFAULT_RANK_PATH, engine=None, use_cache=True):
+    """Vectorized counterpart of analyze_all(): one parse, one matrix product."""
+    engine = engine or VectorBayesEngine()
+    sections = load_report_sections(file_path, use_cache, engine.ruleset)
+    codes, names, home_code = list_peer_codes(sections)
+    X = build_feature_matrix(sections, codes, home_code, engine.ruleset)
+    col = {name: j for j, name in enumerate(engine.features)}
+
+    post, E = engine.score(X)
+
+    results = []
+    for i in np.argsort(-post, kind='stable'):
+        results.append({
+            'code': codes[i],
+            'name': names[codes[i]],
+            'posterior': float(post[i]),
+            'metrics': {m: _py(X[i, col[m]]) if m in col else None for m in ('growth_3y', 'roe', 'pe')},
+            'evidence': int(E[i].sum()),
+        })
+
+    generate_ranking_report(results, out_path, prior=engine.initial_prior)
+    return results
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    engine = None
+    if '--rules' in args:
+        i = args.index('--rules')
+        engine = VectorBayesEngine(load_rules(args[i + 1]))
+        del args[i:i + 2]
+    screen(args[0] if args else DEFAULT_REPORT_PATH, engine=engine)
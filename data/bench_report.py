@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+import analyze_report as ar
+
+# --- Benchmark: report parsing and Bayesian scoring hot path ---
+# Generates merged reports in the format of merged_report.md with N peer rows per table
+# (plus filler sections), times each stage and reports rows/sec and peak memory.
+#   python bench_report.py                          # default sizes
+#   python bench_report.py --sizes 10 500 5000 --save-baseline bench_baseline.json
+#   python bench_report.py --compare bench_baseline.json --threshold 20
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+FILLER_SECTIONS = 20
+
+GROWTH_HEADER = "| 排名 | 代码 | 简称 | 基本每股收益增长率(%) | 营业收入增长率(%) | 净利润增长率(%) |  |"
+VALUATION_HEADER = "| 排名 | 代码 | 简称 | PEG | 市盈率 | 市销率 | 市净率 | 市现率① | 市现率② | EV/EBITDA |  |"
+DUPONT_HEADER = "| 排名 | 代码 | 简称 | ROE(%) | 净利率(%) | 总资产周转率(%) | 权益乘数(%) |  |"
+
+def _cells(rng, n, lo, hi, missing=0.1):
+    return ['--' if rng.random() < missing else f"{rng.uniform(lo, hi):.2f}" for _ in range(n)]
+
+def _table(lines, header, sub_header, rows):
+    lines.append(header)
+    lines.append("| " + " | ".join(['---'] * (header.count('|') - 1)) + " |")
+    lines.append(sub_header)
+    lines.extend(rows)
+
+def generate_report(n_peers, seed=0, filler_sections=FILLER_SECTIONS):
+    """Synthetic merged report with n_peers code rows in each peer table."""
+    rng = random.Random(seed)
+    codes = [f"{600000 + i:06d}" for i in range(n_peers)]
+    names = [f"样本{i}" for i in range(n_peers)]
+
+    def peer_rows(n_cols, lo, hi):
+        rows = [f"| 1/{n_peers} | {codes[0]} | {names[0]} | " + " | ".join(_cells(rng, n_cols, lo, hi, 0)) + " |",
+                "| 行业平均 | " + " | ".join(_cells(rng, n_cols, lo, hi, 0)) + " |",
+                "| 行业中值 | " + " | ".join(_cells(rng, n_cols, lo, hi, 0)) + " |"]
+        for i in range(1, n_peers):
+            rows.append(f"| {i} | {codes[i]} | {names[i]} | " + " | ".join(_cells(rng, n_cols, lo, hi)) + " |")
+        return rows
+
+    lines = ["# 财务报表综合分析报告", "> 合并时间: 2026/01/01 00:00:00", "", "---", ""]
+
+    lines += ["# 成长性_czxbj", "", "## 表格 1", ""]
+    _table(lines, GROWTH_HEADER, "| 3年复合 | 24A | TTM | 25E | 26E | 27E |", peer_rows(18, -20, 40))
+    lines += ["", "---", ""]
+
+    lines += ["# 估值比较_gzbj", "", "## 表格 1", ""]
+    _table(lines, VALUATION_HEADER, "| 24A | TTM | 25E | 26E | 27E |", peer_rows(18, 0.1, 60))
+    lines += ["", "---", ""]
+
+    lines += ["# 杜邦分析_dbfxbj", "", "## 表格 1", ""]
+    _table(lines, DUPONT_HEADER, "| 3年平均 | 22A | 23A | 24A |", peer_rows(16, 0, 40))
+    lines += ["", "---", ""]
+
+    lines += ["# 分红_fhrzgl", "", "## 表格 1", "",
+              "| 股息率 | 股利支付率 | 派现融资比 |", "| --- | --- | --- |",
+              f"| {rng.uniform(0, 6):.2f}% | 75.00% | 163.43倍 |", "", "---", ""]
+
+    # Filler sections the parser has to skip over
+    for s in range(filler_sections):
+        lines += [f"# 附加数据_{s}", "", "| 项目 | 值 |", "| --- | --- |"]
+        lines += [f"| 指标{j} | {rng.uniform(0, 100):.2f} |" for j in range(n_peers // 10 + 1)]
+        lines += ["", "---", ""]
+
+    return "\n".join(lines) + "\n", codes
+
+# --- Timing ---
+def measure(fn, repeat=3):
+    """Best-of-repeat wall time and peak traced memory of fn()."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def bench_size(n_peers, repeat=3, tmp_dir=None):
+    content, codes = generate_report(n_peers)
+    report_path = os.path.join(tmp_dir, f"bench_{n_peers}.md")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    rank_path = os.path.join(tmp_dir, f"bench_{n_peers}_rank.md")
+    out_path = os.path.join(tmp_dir, f"bench_{n_peers}_out.md")
+
+    sections = ar.parse_report_sections(content)
+    rows, headers = sections['valuation']
+    col_pe = ar.find_col_index(headers, ['市盈率', 'PE'], exclude=['PEG']) or 4
+    n_updates = 1000
+
+    def updates():
+        bayes = ar.BayesianAnalyzer(0.10)
+        for i in range(n_updates):
+            bayes.update("bench", i, 0.7, 0.3)
+            if bayes.prior > 0.99: bayes.prior = 0.10
+
+    def quiet(fn):
+        def run():
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try: fn()
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+        return run
+
+    stages = {
+        # name: (callable, rows processed per call)
+        # Cleared each call so every run pays the one parse the section loop needs
+        'parse_markdown_table': (lambda: (ar._content_index.cache_clear(),
+                                          [ar.parse_markdown_table(content, name) for name in ar.SECTIONS.values()]),
+                                 3 * n_peers),
+        'report_index': (lambda: ar.ReportIndex(content), 3 * n_peers),
+        'find_col_index': (lambda: [ar.find_col_index(headers, ['市盈率', 'PE'], exclude=['PEG']) for _ in range(1000)],
+                           1000),
+        'calculate_industry_median': (lambda: ar.calculate_industry_median(rows, col_pe), n_peers),
+        'bayes_update': (updates, n_updates),
+        'score_stock_lookup': (lambda: [ar.score_stock(sections, c) for c in codes[:200]], min(200, n_peers)),
+        'analyze_report': (quiet(lambda: ar.analyze_report(report_path, codes[0], out_path=out_path, use_cache=False)),
+                           3 * n_peers),
+        'analyze_all': (quiet(lambda: ar.analyze_all(report_path, rank_path, use_cache=False)), n_peers),
+        'analyze_all_cached': (quiet(lambda: ar.analyze_all(report_path, rank_path, use_cache=True)), n_peers),
+    }
+    try:
+        import bayes_vector
+        stages['vector_screen'] = (quiet(lambda: bayes_vector.screen(report_path, rank_path, use_cache=False)), n_peers)
+    except ImportError:
+        pass
+
+    results = {}
+    for name, (fn, n_rows) in stages.items():
+        seconds, peak = measure(fn, repeat)
+        results[name] = {'seconds': seconds, 'rows_per_sec': n_rows / seconds if seconds else None,
+                         'peak_bytes': peak}
+    return results
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            results[str(n)] = bench_size(n, repeat, tmp_dir)
+    return results
+
+# --- Reporting ---
+def print_results(results, baseline=None, threshold=20.0):
+    """Prints one table per size; with a baseline, flags stages slower by more than threshold %."""
+    regressions = []
+    for size, stages in results.items():
+        print(f"\n## {size} peer rows")
+        print(f"{'stage':<28}{'seconds':>12}{'rows/sec':>14}{'peak KB':>12}{'vs base':>10}")
+        for name, r in stages.items():
+            delta = ''
+            base = (baseline or {}).get(size, {}).get(name)
+            if base and base['seconds']:
+                change = (r['seconds'] - base['seconds']) / base['seconds'] * 100
+                delta = f"{change:+.1f}%"
+                if change > threshold:
+                    delta += ' !'
+                    regressions.append((size, name, change))
+            rps = f"{r['rows_per_sec']:.0f}" if r['rows_per_sec'] else '-'
+            print(f"{name:<28}{r['seconds']:>12.6f}{rps:>14}{r['peak_bytes'] / 1024:>12.1f}{delta:>10}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0f}%:")
+        for size, name, change in regressions:
+            print(f"  {name} @ {size} rows: {change:+.1f}%")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark report parsing and Bayesian scoring')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='peer rows per table')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (best is kept)')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write results as a baseline JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved baseline JSON')
+    parser.add_argument('--threshold', type=float, default=20.0, help='regression threshold in percent')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = run_benchmarks(args.sizes, args.repeat)
+    regressions = print_results(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved: {args.save_baseline}")
+    sys.exit(1 if regressions else 0)
@@ -1,20 +1,64 @@
 import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import traceback
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def merge_markdown_files():
-    # 基础目录
-    base_dir = '/Users/tang/PycharmProjects/pythonProject/chajian/data'
-    
-    # 需要合并的文件列表
-    files_to_merge = [
-        '成长性sectionczxbj.md',
-        '估值比较sectiongzbj.md',
-        '杜邦分析sectiondbfxbj.md',
-        '分红sectionfhrzgl.md'
-    ]
+from report_cache import file_sha1
+
+# 基础目录
+BASE_DIR = '/Users/tang/PycharmProjects/pythonProject/chajian/data'
+
+# 需要合并的文件列表
+FILES_TO_MERGE = [
+    '成长性sectionczxbj.md',
+    '估值比较sectiongzbj.md',
+    '杜邦分析sectiondbfxbj.md',
+    '分红sectionfhrzgl.md'
+]
+
+MERGED_FILE_NAME = '成长性_估值_杜邦分析_分红.md'
+ANALYSIS_FILE_NAME = 'beiyesi_out.md'
+
+# 流式合并: 每次复制的块大小，以及分节索引文件后缀（需与 analyze_report.SECTION_INDEX_SUFFIX 一致）
+COPY_CHUNK_SIZE = 64 * 1024
+SECTION_INDEX_SUFFIX = '.index.json'
+
+# 增量模式: 记录每个股票输入/输出哈希的清单文件（位于批量根目录）
+MANIFEST_FILE_NAME = '.merge_manifest.json'
+
+def remove_section_index(output_file):
+    # 报告即将被重写，旧的分节索引偏移随之失效，先删除
+    try:
+        os.remove(output_file + SECTION_INDEX_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+class HashingWriter:
+    """包装输出文件，写入的同时计算内容哈希（写入分节索引用于校验）。"""
+    def __init__(self, f):
+        self.f = f
+        self.sha1 = hashlib.sha1()
+
+    def write(self, data):
+        self.sha1.update(data)
+        return self.f.write(data)
+
+    def tell(self):
+        return self.f.tell()
+
+def merge_markdown_files(base_dir=BASE_DIR, output_file=None, run_analysis=True):
+    files_to_merge = FILES_TO_MERGE
     
     # 输出文件路径
-    output_file = os.path.join(base_dir, '成长性_估值_杜邦分析_分红.md')
+    output_file = output_file or os.path.join(base_dir, MERGED_FILE_NAME)
+    # 此路径不写分节索引，旧索引不能留着
+    remove_section_index(output_file)
     
     merged_content = []
     # 添加一个总标题
@@ -58,6 +102,11 @@ def merge_markdown_files():
 
     print(f"合并完成！已生成文件: {output_file}")
     
+    if run_analysis:
+        run_bayesian_analysis(output_file)
+    return output_file
+
+def run_bayesian_analysis(output_file):
     # 自动执行贝叶斯分析
     try:
         from analyze_report import analyze_report
@@ -68,6 +117,237 @@ def merge_markdown_files():
     except Exception as e:
         print(f"分析过程中出错: {e}")
 
+# --- 流式合并: 内存占用与导出文件大小无关 ---
+def skip_export_header(f):
+    """
+    跳过导出文件开头的元信息（# 表格数据导出、> 导出时间、> 来源、--- 及空行），
+    按内容识别而不是固定删除 8 行。f 为二进制文件对象，返回后文件指针位于正文开头。
+    """
+    start = f.tell()
+    first = f.readline()
+    if not first.startswith(b'# '):
+        # 没有导出头，整份文件都是正文
+        f.seek(start)
+        return
+
+    seen_rule = False
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line:
+            return
+        text = line.strip()
+        if not text or (not seen_rule and text.startswith(b'>')):
+            continue
+        if text == b'---' and not seen_rule:
+            seen_rule = True
+            continue
+        # 第一行正文，退回到行首
+        f.seek(pos)
+        return
+
+def stream_merge_markdown_files(base_dir=BASE_DIR, output_file=None, write_index=True, run_analysis=True):
+    """
+    与 merge_markdown_files 输出相同，但逐块把每个分节文件复制到输出文件，
+    不在内存中累积内容。write_index 为 True 时同时写出 <output>.index.json，
+    记录每个分节在输出文件中的字节偏移，供 analyze_report 直接定位，无需重新扫描。
+    """
+    output_file = output_file or os.path.join(base_dir, MERGED_FILE_NAME)
+    sections = {}
+    # 先删旧索引: 中途失败时不会留下与新内容不符的偏移
+    remove_section_index(output_file)
+
+    with open(output_file, 'wb') as raw_out:
+        out = HashingWriter(raw_out)
+        now_str = datetime.now().strftime('%Y/%m/%d %H:%M:%S')
+        out.write("# 财务报表综合分析报告\n".encode('utf-8'))
+        out.write(f"> 合并时间: {now_str}\n\n---\n\n".encode('utf-8'))
+
+        for file_name in FILES_TO_MERGE:
+            file_path = os.path.join(base_dir, file_name)
+
+            if not os.path.exists(file_path):
+                print(f"警告: 文件 {file_name} 不存在，跳过。")
+                continue
+
+            print(f"正在处理: {file_name}")
+
+            section_title = file_name.replace('section', '_').replace('.md', '')
+            offset = out.tell()
+            out.write(f"# {section_title}\n\n".encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                skip_export_header(f)
+                shutil.copyfileobj(f, out, COPY_CHUNK_SIZE)
+            out.write(b"\n\n---\n\n")
+            sections[section_title] = [offset, out.tell() - offset]
+
+        total_size = out.tell()
+
+    if write_index:
+        # size + mtime_ns 快速校验，mtime 变化时再比对内容哈希（见 analyze_report.read_section_spans）
+        index_path = output_file + SECTION_INDEX_SUFFIX
+        meta = {'size': total_size, 'mtime_ns': os.stat(output_file).st_mtime_ns,
+                'sha1': out.sha1.hexdigest(), 'sections': sections}
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, index_path)
+
+    print(f"合并完成！已生成文件: {output_file}")
+
+    if run_analysis:
+        run_bayesian_analysis(output_file)
+    return output_file
+
+# --- 批量处理: 每个股票代码一个目录 ---
+def discover_ticker_dirs(root_dir):
+    # 目录名为 6 位代码，且至少包含一个待合并的分节文件
+    ticker_dirs = []
+    for name in sorted(os.listdir(root_dir)):
+        path = os.path.join(root_dir, name)
+        if not (os.path.isdir(path) and name.isdigit() and len(name) == 6):
+            continue
+        if any(os.path.exists(os.path.join(path, f)) for f in FILES_TO_MERGE):
+            ticker_dirs.append(path)
+    return ticker_dirs
+
+def process_ticker(ticker_dir):
+    """合并并分析单个股票目录，异常不会抛出，而是记录在返回结果中。"""
+    from analyze_report import analyze_report, load_report_sections, list_peer_codes
+
+    code = os.path.basename(ticker_dir.rstrip(os.sep))
+    result = {'code': code, 'dir': ticker_dir, 'ok': False, 'error': None}
+    t0 = time.perf_counter()
+    try:
+        merged_file = stream_merge_markdown_files(ticker_dir, run_analysis=False)
+        t1 = time.perf_counter()
+
+        sections = load_report_sections(merged_file)
+        # 一张表都没解析出来（导出文件损坏或格式变了）时先验 0.1 并不是分析结果，必须算失败，
+        # 否则增量模式会把它记入清单并永远跳过
+        if not any(rows for rows, _ in sections.values()):
+            raise ValueError('分节文件中没有解析出任何表格')
+        _, names, _ = list_peer_codes(sections)
+        out_path = os.path.join(ticker_dir, ANALYSIS_FILE_NAME)
+        bayes, metrics = analyze_report(merged_file, target_code=code, target_name=names.get(code, code),
+                                        out_path=out_path)
+        if all(v is None for v in metrics.values()):
+            raise ValueError(f'表格中没有 {code} 的任何指标')
+        t2 = time.perf_counter()
+
+        result.update(ok=True, merge_seconds=t1 - t0, analyze_seconds=t2 - t1,
+                      posterior=bayes.prior, output_hash=file_sha1(out_path))
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - t0
+    return result
+
+# --- 增量模式 ---
+def input_hashes(ticker_dir):
+    # 每个存在的分节文件 -> 内容哈希
+    return {f: file_sha1(os.path.join(ticker_dir, f))
+            for f in FILES_TO_MERGE if os.path.exists(os.path.join(ticker_dir, f))}
+
+def load_manifest(root_dir):
+    path = os.path.join(root_dir, MANIFEST_FILE_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'tickers': {}}
+
+def save_manifest(root_dir, manifest):
+    path = os.path.join(root_dir, MANIFEST_FILE_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def is_up_to_date(entry, inputs, model, ticker_dir):
+    # 输入、模型参数均未变化，且上次的分析结果仍在且未被改动
+    if not entry or entry.get('inputs') != inputs or entry.get('model') != model:
+        return False
+    out_path = os.path.join(ticker_dir, ANALYSIS_FILE_NAME)
+    return os.path.exists(out_path) and file_sha1(out_path) == entry.get('output_hash')
+
+def merge_all_tickers(root_dir, workers=None, incremental=False):
+    """
+    在进程池中并行处理 root_dir 下所有股票目录，单个失败不影响整体。
+    incremental 为 True 时，输入分节文件与模型参数均未变化的股票直接跳过，
+    只重新合并、分析有变化的股票，并把结果哈希写入 root_dir 下的清单文件。
+    """
+    ticker_dirs = discover_ticker_dirs(root_dir)
+    print(f"发现 {len(ticker_dirs)} 个股票目录，进程数: {workers or os.cpu_count()}")
+
+    manifest, model, hashes, skipped = None, None, {}, []
+    if incremental:
+        from analyze_report import model_fingerprint
+        manifest = load_manifest(root_dir)
+        model = model_fingerprint()
+        pending = []
+        for d in ticker_dirs:
+            code = os.path.basename(d)
+            hashes[code] = input_hashes(d)
+            if is_up_to_date(manifest['tickers'].get(code), hashes[code], model, d):
+                skipped.append(code)
+            else:
+                pending.append(d)
+        print(f"增量模式: {len(skipped)} 个未变化已跳过，{len(pending)} 个需要重新分析")
+        ticker_dirs = pending
+
+    results = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_ticker, d): d for d in ticker_dirs}
+        for future in as_completed(futures):
+            try:
+                r = future.result()
+            except Exception as e:
+                # 进程崩溃等无法在 process_ticker 内捕获的错误
+                d = futures[future]
+                r = {'code': os.path.basename(d), 'dir': d, 'ok': False,
+                     'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+            results.append(r)
+            if r['ok']:
+                print(f"[完成] {r['code']} 用时 {r['seconds']:.3f}s "
+                      f"(合并 {r['merge_seconds']:.3f}s, 分析 {r['analyze_seconds']:.3f}s)")
+            else:
+                print(f"[失败] {r['code']} 用时 {r['seconds']:.3f}s: {r['error']}")
+
+    if incremental:
+        for r in results:
+            if r['ok']:
+                manifest['tickers'][r['code']] = {
+                    'inputs': hashes[r['code']],
+                    'model': model,
+                    'posterior': r['posterior'],
+                    'output_hash': r['output_hash'],
+                }
+            else:
+                # 失败的股票下次必须重跑
+                manifest['tickers'].pop(r['code'], None)
+        save_manifest(root_dir, manifest)
+
+    failed = [r for r in results if not r['ok']]
+    print(f"批量处理完成: 成功 {len(results) - len(failed)}，失败 {len(failed)}，"
+          f"跳过 {len(skipped)}，总用时 {time.perf_counter() - t0:.2f}s")
+    results.sort(key=lambda r: r['code'])
+    return results
+
 if __name__ == "__main__":
-    merge_markdown_files()
+    parser = argparse.ArgumentParser(description='合并分节导出文件并执行贝叶斯分析')
+    parser.add_argument('--batch', metavar='ROOT_DIR', help='批量模式: 处理 ROOT_DIR 下每个 6 位代码目录')
+    parser.add_argument('--workers', type=int, default=None, help='批量模式进程数 (默认 CPU 核数)')
+    parser.add_argument('--stream', action='store_true', help='流式合并，并写出分节索引文件')
+    parser.add_argument('--incremental', action='store_true', help='批量模式下只处理输入或模型有变化的股票')
+    args = parser.parse_args()
+
+    if args.batch:
+        results = merge_all_tickers(args.batch, workers=args.workers, incremental=args.incremental)
+        sys.exit(1 if any(not r['ok'] for r in results) else 0)
+    if args.stream:
+        stream_merge_markdown_files()
+    else:
+        merge_markdown_files()
 
@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import numpy as np
+
+from analyze_report import (
+    DATA_DIR, DEFAULT_REPORT_PATH, DEFAULT_RANK_PATH, load_report_sections, list_peer_codes,
+    generate_ranking_report,
+)
+from bayes_vector import VectorBayesEngine, build_feature_matrix
+from bayes_rules import load_rules
+from statements import STORE_DIR, STATEMENT_FILES, load_statement
+
+# --- Memory-mapped Metric Store ---
+# One fixed-layout float64 array of shape (tickers, periods, metrics), C order:
+#   <store>/header.json   {"tickers": [...], "periods": [...], "metrics": [...], "names": {...}}
+#   <store>/values.f64    raw array, NaN = missing
+# Cross-sectional queries (one metric, one period, every ticker) are strided views into
+# the mapping, so "industry median PE over 4000 stocks" is a single np.nanmedian call.
+
+METRIC_STORE_DIR = os.path.join(DATA_DIR, 'metric_store')
+HEADER_FILE = 'header.json'
+VALUES_FILE = 'values.f64'
+
+# Peer table snapshots are stored under this period label
+SNAPSHOT_PERIOD = 'snapshot'
+
+def snapshot_metrics(rules):
+    # Feature matrix columns kept per ticker. "@median" features (industry median PE) are
+    # not stored: they are derived from the store's own cross-section at query time.
+    return [f.name for f in rules.features if f.row != '@median']
+
+def median_source(rules, feature):
+    # The per-ticker feature a "@median" feature is the median of: same table column
+    for f in rules.features:
+        if f.row == 'code' and (f.section, f.columns, f.exclude) == (feature.section, feature.columns, feature.exclude):
+            return f.name
+    return None
+
+class MetricStore:
+    def __init__(self, path, header, values):
+        self.path = path
+        self.tickers = header['tickers']
+        self.periods = header['periods']
+        self.metrics = header['metrics']
+        self.names = header.get('names', {})
+        self.values = values
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+        self.period_index = {p: i for i, p in enumerate(self.periods)}
+        self.metric_index = {m: i for i, m in enumerate(self.metrics)}
+
+    @classmethod
+    def create(cls, path, tickers, periods, metrics, names=None):
+        os.makedirs(path, exist_ok=True)
+        header = {'tickers': list(tickers), 'periods': list(periods), 'metrics': list(metrics),
+                  'names': names or {}}
+        shape = (len(tickers), len(periods), len(metrics))
+        values_path = os.path.join(path, VALUES_FILE)
+        if all(shape):
+            values = np.memmap(values_path, dtype=np.float64, mode='w+', shape=shape)
+            values[:] = np.nan
+        else:
+            # np.memmap cannot map an empty file
+            open(values_path, 'wb').close()
+            values = np.full(shape, np.nan)
+        with open(os.path.join(path, HEADER_FILE), 'w', encoding='utf-8') as f:
+            json.dump(header, f, ensure_ascii=False)
+        return cls(path, header, values)
+
+    @classmethod
+    def open(cls, path=METRIC_STORE_DIR, mode='r'):
+        with open(os.path.join(path, HEADER_FILE), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        shape = (len(header['tickers']), len(header['periods']), len(header['metrics']))
+        if not all(shape):
+            return cls(path, header, np.full(shape, np.nan))
+        values = np.memmap(os.path.join(path, VALUES_FILE), dtype=np.float64, mode=mode, shape=shape)
+        return cls(path, header, values)
+
+    def flush(self):
+        if isinstance(self.values, np.memmap): self.values.flush()
+
+    def put(self, ticker, period, metric, value):
+        self.values[self.ticker_index[ticker], self.period_index[period], self.metric_index[metric]] = value
+
+    def get(self, ticker, period, metric):
+        val = self.values[self.ticker_index[ticker], self.period_index[period], self.metric_index[metric]]
+        return None if np.isnan(val) else float(val)
+
+    def cross_section(self, metric, period):
+        """All tickers' values of one metric in one period (a view, no copy)."""
+        return self.values[:, self.period_index[period], self.metric_index[metric]]
+
+    def history(self, ticker, metric):
+        return self.values[self.ticker_index[ticker], :, self.metric_index[metric]]
+
+    def median(self, metric, period, tickers=None):
+        col = self.cross_section(metric, period)
+        if tickers is not None:
+            col = col[[self.ticker_index[t] for t in tickers if t in self.ticker_index]]
+        if col.size == 0 or np.isnan(col).all(): return None
+        return float(np.nanmedian(col))
+
+    def industry_median(self, metric, tickers=None):
+        # Snapshot counterpart of calculate_industry_median(); used by analyze_report
+        if SNAPSHOT_PERIOD not in self.period_index or metric not in self.metric_index: return None
+        return self.median(metric, SNAPSHOT_PERIOD, tickers)
+
+# --- Ingestion ---
+def peer_table_records(report_path=DEFAULT_REPORT_PATH, period=SNAPSHOT_PERIOD, rules=None):
+    """(ticker, period, metric, value) records of the safe_float-normalized peer tables."""
+    rules = rules or load_rules()
+    sections = load_report_sections(report_path, rules=rules)
+    codes, names, home_code = list_peer_codes(sections)
+    X = build_feature_matrix(sections, codes, home_code, rules)
+    stored = snapshot_metrics(rules)
+    records = []
+    for j, metric in enumerate(rules.feature_names):
+        if metric not in stored: continue
+        for i, code in enumerate(codes):
+            if not np.isnan(X[i, j]): records.append((code, period, metric, float(X[i, j])))
+    return records, names
+
+def statement_records(statement_store=STORE_DIR, metrics=None):
+    """Records of the per-ticker statement store (statements.py), metric names prefixed by statement."""
+    records = []
+    if not os.path.isdir(statement_store): return records
+    for code in sorted(os.listdir(statement_store)):
+        for key in STATEMENT_FILES.values():
+            statement = load_statement(code, key, statement_store)
+            if statement is None: continue
+            for m, metric in enumerate(statement.metrics):
+                name = f"{key}.{metric}"
+                if metrics is not None and name not in metrics: continue
+                for q, period in enumerate(statement.periods):
+                    val = statement.values[m, q]
+                    if not np.isnan(val): records.append((code, period, name, float(val)))
+    return records
+
+def build_metric_store(path, records, names=None):
+    """Two passes: collect the axes, then write every record into a fresh mapping."""
+    tickers, periods, metrics = {}, {}, {}
+    for ticker, period, metric, _ in records:
+        tickers.setdefault(ticker, None)
+        periods.setdefault(period, None)
+        metrics.setdefault(metric, None)
+
+    store = MetricStore.create(path, list(tickers), sorted(periods), list(metrics), names)
+    for ticker, period, metric, value in records:
+        store.put(ticker, period, metric, value)
+    store.flush()
+    return store
+
+# --- Screening straight from the store ---
+def feature_matrix_from_store(store, tickers=None, period=SNAPSHOT_PERIOD, rules=None):
+    """
+    Rebuilds the bayes_vector feature matrix from stored snapshots, no markdown involved.
+    Columns follow rules.feature_names, the layout VectorBayesEngine(rules) expects.
+    """
+    rules = rules or load_rules()
+    tickers = list(store.tickers) if tickers is None else [t for t in tickers if t in store.ticker_index]
+    rows = [store.ticker_index[t] for t in tickers]
+    q = store.period_index[period]
+
+    X = np.full((len(tickers), len(rules.features)), np.nan)
+    for j, feature in enumerate(rules.features):
+        if feature.row == '@median':
+            source = median_source(rules, feature)
+            value = store.median(source, period, tickers) if source in store.metric_index else None
+            if value is not None: X[:, j] = value
+        elif feature.name in store.metric_index:
+            X[:, j] = store.values[rows, q, store.metric_index[feature.name]]
+    return tickers, X
+
+def screen_store(store, tickers=None, out_path=DEFAULT_RANK_PATH, engine=None):
+    engine = engine or VectorBayesEngine()
+    tickers, X = feature_matrix_from_store(store, tickers, rules=engine.ruleset)
+    post, E = engine.score(X)
+
+    results = []
+    for i in np.argsort(-post, kind='stable'):
+        metrics = {m: store.get(tickers[i], SNAPSHOT_PERIOD, m) if m in store.metric_index else None
+                   for m in ('growth_3y', 'roe', 'pe')}
+        results.append({'code': tickers[i], 'name': store.names.get(tickers[i], tickers[i]),
+                        'posterior': float(post[i]), 'metrics': metrics, 'evidence': int(E[i].sum())})
+    generate_ranking_report(results, out_path, prior=engine.initial_prior)
+    return results
+
+if __name__ == "__main__":
+    report_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_REPORT_PATH
+    records, names = peer_table_records(report_path)
+    records += statement_records()
+    store = build_metric_store(METRIC_STORE_DIR, records, names)
+    print(f"Metric store: {len(store.tickers)} tickers x {len(store.periods)} periods x "
+          f"{len(store.metrics)} metrics -> {store.path}")
+    print(f"Industry median PE: {store.median('pe', SNAPSHOT_PERIOD)}")
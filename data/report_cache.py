@@ -0,0 +1,121 @@
+import os
+import pickle
+import hashlib
+
+# --- Parsed Report Cache ---
+# Parsed section tables are pickled under <report dir>/.report_cache/, one file per
+# report path. An entry is valid while the report's mtime and size are unchanged;
+# if only the mtime moved (re-export of identical data, touch, copy) the content
+# hash decides. Oldest entries are evicted once the cache exceeds its bounds.
+
+CACHE_DIR_NAME = '.report_cache'
+MAX_ENTRIES = 64
+MAX_BYTES = 64 * 1024 * 1024
+
+def default_cache_dir(file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+
+def _entry_path(cache_dir, file_path):
+    key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key + '.pkl')
+
+def _read_entry(entry_path):
+    try:
+        with open(entry_path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def _write_entry(entry_path, entry):
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+    tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, entry_path)
+
+def _touch(entry_path):
+    # Entry mtime doubles as last-used time for eviction
+    try: os.utime(entry_path)
+    except OSError: pass
+
+def evict(cache_dir, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+    """Removes least recently used entries until both bounds hold. Returns removed count."""
+    if not os.path.isdir(cache_dir): return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.pkl'): continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+
+    total = sum(e[1] for e in entries)
+    removed = 0
+    while entries and (len(entries) > max_entries or total > max_bytes):
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+def file_sha1(file_path, chunk_size=1024 * 1024):
+    """sha1 of a file's bytes, read in chunks (also used by analyze_report / merge_reports)."""
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def invalidate(file_path, cache_dir=None):
+    entry_path = _entry_path(cache_dir or default_cache_dir(file_path), file_path)
+    if os.path.exists(entry_path):
+        os.remove(entry_path)
+
+def cached_parse(file_path, parse_fn, version=1, cache_dir=None, verify_hash=False,
+                 max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, raw=False):
+    """
+    Returns parse_fn(content) for the report at file_path, reusing the pickled result
+    of a previous run when the file has not changed.
+
+    version: bump when parse_fn's output format changes; older entries become misses.
+    verify_hash: always compare the content hash, even when mtime/size match.
+    raw: pass the undecoded bytes to parse_fn (needed for byte-offset section indexes).
+    """
+    cache_dir = cache_dir or default_cache_dir(file_path)
+    entry_path = _entry_path(cache_dir, file_path)
+    st = os.stat(file_path)
+
+    entry = _read_entry(entry_path)
+    if entry and entry.get('version') != version: entry = None
+
+    if entry and not verify_hash and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+        _touch(entry_path)
+        return entry['data']
+
+    with open(file_path, 'rb') as f:
+        raw_bytes = f.read()
+    digest = hashlib.sha1(raw_bytes).hexdigest()
+
+    if entry and entry['sha1'] == digest:
+        # Same content under a new mtime: refresh the stat key only
+        entry['mtime_ns'], entry['size'] = st.st_mtime_ns, st.st_size
+        _write_entry(entry_path, entry)
+        return entry['data']
+
+    data = parse_fn(raw_bytes if raw else raw_bytes.decode('utf-8'))
+    _write_entry(entry_path, {
+        'version': version,
+        'path': os.path.abspath(file_path),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'sha1': digest,
+        'data': data,
+    })
+    evict(cache_dir, max_entries, max_bytes)
+    return data
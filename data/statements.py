@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import json
+import numpy as np
+
+from analyze_report import DATA_DIR
+
+# --- Full-history Financial Statement Store ---
+# The wide quarter-by-quarter exports (资产负债表 / 现金流 / 利润表 / 财务主要指标) are parsed once
+# and stored per ticker as float64 metric x quarter matrices:
+#   <store>/<code>/<statement>.npy   values, NaN where the export shows "--"
+#   <store>/<code>/<statement>.json  {"metrics": [...], "periods": [...], "source": ...}
+# The .npy files are opened with mmap_mode='r', so factor code reads only what it touches.
+
+STORE_DIR = os.path.join(DATA_DIR, 'store')
+
+# Export file suffix -> statement key
+STATEMENT_FILES = {
+    'zcfzb': 'balance',     # 资产负债表
+    'xjllb': 'cashflow',    # 现金流量表
+    'lrb': 'income',        # 利润表
+    'zyzb': 'indicators',   # 主要财务指标
+}
+
+CN_UNITS = {'万亿': 1e12, '亿': 1e8, '万': 1e4}
+NUMBER_PATTERN = re.compile(r'^([+-]?\d+(?:\.\d+)?)(万亿|亿|万)?')
+DATE_PATTERN = re.compile(r'^(\d{2}|\d{4})-(\d{2})-(\d{2})$')
+CODE_PATTERN = re.compile(r'code=(\d{6})')
+
+def parse_cn_number(val_str):
+    """
+    Normalizes export cells to floats: "1309亿" -> 1.309e11, "2553万152.00%" -> 2.553e7
+    (trailing YoY/占比 annotations are dropped), "51.5300" -> 51.53, "--"/"----" -> None.
+    """
+    if not val_str: return None
+    match = NUMBER_PATTERN.match(val_str.strip().replace(',', ''))
+    if not match: return None
+    value = float(match.group(1))
+    unit = match.group(2)
+    return value * CN_UNITS[unit] if unit else value
+
+def normalize_period(cell):
+    # "25-09-30" -> "2025-09-30"; returns None for non-date cells
+    match = DATE_PATTERN.match(cell.strip())
+    if not match: return None
+    year = match.group(1)
+    if len(year) == 2: year = '20' + year
+    return f"{year}-{match.group(2)}-{match.group(3)}"
+
+def statement_key(file_name):
+    match = re.search(r'([a-z]+)_table\.md$', file_name)
+    return STATEMENT_FILES.get(match.group(1)) if match else None
+
+def parse_statement_file(file_path):
+    """
+    Streams one export file. Returns (code, metrics, periods, values) where values is a
+    len(metrics) x len(periods) float64 array. Sub-header rows (dates repeated under
+    each block) and category rows without any numbers are skipped.
+    """
+    code, periods = None, None
+    metrics, rows, seen = [], [], {}
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if code is None and line.startswith('>'):
+                match = CODE_PATTERN.search(line)
+                if match: code = match.group(1)
+                continue
+            if not line.strip().startswith('|'):
+                continue
+
+            cells = [c.strip() for c in line.strip().strip('|').split('|')]
+            if all(c and set(c) <= set('-:') for c in cells):
+                continue  # | --- | --- | separator (data cells like "----" never fill the label column)
+            dates = [normalize_period(c) for c in cells[1:]]
+            if dates and all(dates):
+                if periods is None: periods = dates
+                continue
+            if periods is None:
+                continue
+
+            values = [parse_cn_number(c) for c in cells[1:1 + len(periods)]]
+            if all(v is None for v in values):
+                continue
+            values += [None] * (len(periods) - len(values))
+
+            # Disambiguate repeated labels (e.g. "其中:永续债" appears under equity and liabilities)
+            label = cells[0]
+            seen[label] = seen.get(label, 0) + 1
+            if seen[label] > 1: label = f"{label}#{seen[label]}"
+
+            metrics.append(label)
+            rows.append([np.nan if v is None else v for v in values])
+
+    values = np.array(rows, dtype=np.float64).reshape(len(rows), len(periods or []))
+    return code, metrics, periods or [], values
+
+# --- Store ---
+class Statement:
+    def __init__(self, values, metrics, periods):
+        self.values = values
+        self.metrics = metrics
+        self.periods = periods
+        self.metric_index = {m: i for i, m in enumerate(metrics)}
+
+    def series(self, metric):
+        """Values of one metric across periods (newest first, as exported), or None."""
+        i = self.metric_index.get(metric)
+        return None if i is None else self.values[i]
+
+    def find_metric(self, keyword):
+        # Exact label first, then the first label containing the keyword
+        if keyword in self.metric_index: return keyword
+        return next((m for m in self.metrics if keyword in m), None)
+
+def save_statement(store_dir, code, key, metrics, periods, values, source=None):
+    ticker_dir = os.path.join(store_dir, code)
+    os.makedirs(ticker_dir, exist_ok=True)
+    np.save(os.path.join(ticker_dir, key + '.npy'), values)
+    with open(os.path.join(ticker_dir, key + '.json'), 'w', encoding='utf-8') as f:
+        json.dump({'metrics': metrics, 'periods': periods, 'source': source}, f, ensure_ascii=False)
+
+def load_statement(code, key, store_dir=STORE_DIR, mmap=True):
+    base = os.path.join(store_dir, code, key)
+    if not os.path.exists(base + '.npy'): return None
+    with open(base + '.json', 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    values = np.load(base + '.npy', mmap_mode='r' if mmap else None)
+    return Statement(values, meta['metrics'], meta['periods'])
+
+def ingest_statements(src_dir=DATA_DIR, store_dir=STORE_DIR, code=None):
+    """Parses every *_table.md export in src_dir into the store. Returns {key: (code, n_metrics, n_periods)}."""
+    ingested = {}
+    for file_name in sorted(os.listdir(src_dir)):
+        key = statement_key(file_name)
+        if key is None: continue
+        file_path = os.path.join(src_dir, file_name)
+        file_code, metrics, periods, values = parse_statement_file(file_path)
+        file_code = code or file_code
+        if file_code is None:
+            print(f"警告: {file_name} 中找不到股票代码，跳过。")
+            continue
+        save_statement(store_dir, file_code, key, metrics, periods, values, source=file_name)
+        ingested[key] = (file_code, len(metrics), len(periods))
+        print(f"Ingested {file_name}: {file_code} {key} ({len(metrics)} metrics x {len(periods)} periods)")
+    return ingested
+
+# --- Multi-quarter factors ---
+def _aligned(a, b):
+    # Two (periods, values) series joined on common periods, oldest first
+    (pa, va), (pb, vb) = a, b
+    common = sorted(set(pa) & set(pb))
+    ia = {p: i for i, p in enumerate(pa)}
+    ib = {p: i for i, p in enumerate(pb)}
+    return common, np.array([va[ia[p]] for p in common]), np.array([vb[ib[p]] for p in common])
+
+def compute_history_factors(code, store_dir=STORE_DIR):
+    """
+    Factors that need years of history instead of one peer-table snapshot:
+    - cashflow_coverage: operating cash flow / net profit per period (>1 = profits backed by cash)
+    - roe_trend: slope of annual weighted ROE in percentage points per year
+    """
+    factors = {}
+    cashflow = load_statement(code, 'cashflow', store_dir)
+    income = load_statement(code, 'income', store_dir)
+    if cashflow is not None and income is not None:
+        ocf = cashflow.series('经营活动产生的现金流量净额')
+        profit = income.series('净利润')
+        if ocf is not None and profit is not None:
+            periods, ocf, profit = _aligned((cashflow.periods, ocf), (income.periods, profit))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                coverage = np.where(profit > 0, ocf / profit, np.nan)
+            factors['cashflow_coverage'] = dict(zip(periods, coverage.tolist()))
+
+    indicators = load_statement(code, 'indicators', store_dir)
+    if indicators is not None:
+        metric = indicators.find_metric('净资产收益率(加权)')
+        if metric is not None:
+            roe = indicators.series(metric)
+            annual = sorted((p, float(roe[i])) for i, p in enumerate(indicators.periods)
+                            if p.endswith('-12-31') and not np.isnan(roe[i]))
+            factors['roe_annual'] = dict(annual)
+            if len(annual) >= 2:
+                years = np.array([int(p[:4]) for p, _ in annual], dtype=np.float64)
+                factors['roe_trend'] = float(np.polyfit(years, [v for _, v in annual], 1)[0])
+    return factors
+
+if __name__ == "__main__":
+    src_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else STORE_DIR
+    ingested = ingest_statements(src_dir, store_dir)
+    for code in sorted({c for c, _, _ in ingested.values()}):
+        print(code, compute_history_factors(code, store_dir))
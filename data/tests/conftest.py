@@ -0,0 +1,19 @@
+import os
+import sys
+import shutil
+import pytest
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DATA_DIR)
+
+SAMPLE_CODE = '600519'  # the sample exports in data/ are 贵州茅台's peer tables
+
+@pytest.fixture
+def ticker_root(tmp_path):
+    """Batch root with one ticker directory holding copies of the sample section exports."""
+    from merge_reports import FILES_TO_MERGE
+    ticker_dir = tmp_path / SAMPLE_CODE
+    ticker_dir.mkdir()
+    for name in FILES_TO_MERGE:
+        shutil.copy(os.path.join(DATA_DIR, name), ticker_dir / name)
+    return tmp_path
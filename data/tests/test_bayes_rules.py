@@ -0,0 +1,80 @@
+import os
+import re
+import json
+import copy
+import pytest
+from analyze_report import analyze_all, model_fingerprint
+from bayes_rules import DEFAULT_RULES_PATH, RuleError, RuleSet, load_rules
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT = os.path.join(DATA_DIR, 'merged_report.md')
+
+with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
+    DEFAULT_SPEC = json.load(f)
+
+def one_factor(*bands):
+    return {'features': [{'name': 'x', 'section': 's', 'columns': ['x']}],
+            'factors': [{'feature': 'x', 'bands': list(bands)}]}
+
+def band(name, **bounds):
+    return dict(bounds, name=name, p_q=0.5, p_not_q=0.5)
+
+def fired(rules, x):
+    hit = rules.factors[0].lookup({'x': x})
+    return hit.name if hit else None
+
+def test_band_bounds():
+    rules = RuleSet(one_factor(band('low', below=5), band('mid', min=5, max=15), band('high', above=15)))
+    assert [fired(rules, x) for x in (4.99, 5, 10, 15, 15.01)] == ['low', 'mid', 'mid', 'mid', 'high']
+    assert fired(rules, None) is None and fired(rules, float('nan')) is None
+
+    gap = RuleSet(one_factor(band('low', below=5), band('high', above=15)))
+    assert [fired(gap, x) for x in (5, 15)] == [None, None]
+
+@pytest.mark.parametrize('spec, message', [
+    (one_factor(band('a', above=1), band('b', above=2)), 'overlap'),
+    (one_factor(band('a', above=5, below=5)), 'empty'),
+    (one_factor(band('a', above=1, min=2)), 'at most one'),
+    (one_factor({'name': 'a', 'above': 1, 'p_q': 0.5}), 'p_not_q'),
+    (one_factor(dict(band('a', above=1), p_q=1.5)), '(0, 1]'),
+    (dict(one_factor(band('a', above=1)), prior=1), 'prior'),
+    (dict(one_factor(band('a', above=1)), factors=[{'feature': 'y', 'bands': [band('a')]}]), 'unknown feature'),
+])
+def test_invalid_rule_sets(spec, message):
+    with pytest.raises(RuleError, match=re.escape(message)):
+        RuleSet(spec)
+
+def test_duplicate_features():
+    spec = one_factor(band('a', above=1))
+    spec['features'] *= 2
+    with pytest.raises(RuleError, match='duplicate'):
+        RuleSet(spec)
+
+def test_load_rules_recompiles_only_on_change(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(DEFAULT_SPEC), encoding='utf-8')
+    first = load_rules(str(path))
+    assert load_rules(str(path)) is first
+
+    spec = copy.deepcopy(DEFAULT_SPEC)
+    spec['prior'] = 0.2
+    path.write_text(json.dumps(spec), encoding='utf-8')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    second = load_rules(str(path))
+    assert second is not first and second.prior == 0.2
+    assert second.fingerprint != first.fingerprint
+    assert model_fingerprint(second) != model_fingerprint(first)
+
+def test_a_variant_rule_set_changes_the_ranking(tmp_path):
+    spec = copy.deepcopy(DEFAULT_SPEC)
+    spec['factors'] = [f for f in spec['factors'] if f['feature'] != 'roe']
+    path = tmp_path / 'no_roe.json'
+    path.write_text(json.dumps(spec), encoding='utf-8')
+
+    default = {r['code']: r for r in analyze_all(REPORT, str(tmp_path / 'a.md'), use_cache=False)}
+    variant = {r['code']: r for r in analyze_all(REPORT, str(tmp_path / 'b.md'), use_cache=False,
+                                                 rules=load_rules(str(path)))}
+    assert default.keys() == variant.keys()
+    assert all(variant[c]['evidence'] <= default[c]['evidence'] for c in default)
+    assert any(variant[c]['posterior'] != default[c]['posterior'] for c in default)
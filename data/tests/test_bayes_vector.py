@@ -0,0 +1,48 @@
+import os
+import itertools
+import numpy as np
+import pytest
+from analyze_report import BayesianAnalyzer, analyze_all
+from bayes_rules import load_rules
+from bayes_vector import VectorBayesEngine, screen
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT = os.path.join(DATA_DIR, 'merged_report.md')
+
+def scalar_score(rules, values):
+    bayes = BayesianAnalyzer(initial_prior=rules.prior)
+    for factor in rules.factors:
+        bayes.apply(factor, values)
+    return bayes
+
+def test_matches_score_stock_on_threshold_edges():
+    # Every combination of values sitting on, just inside and outside the band edges, plus missing ones
+    rules = load_rules()
+    grid = {
+        'growth_3y': [None, -1.0, 0.0, 5.0, 15.0, 15.01],
+        'ind_growth_3y': [None, 15.0],
+        'roe': [None, 8.0, 15.0, 25.0, 25.5],
+        'pe': [None, 16.0, 30.0],
+        'peg': [None, 0.0, 0.5, 1.0],
+        'ind_median_pe': [None, 0.0, 20.0],
+        'div_yield': [None, 3.0, 3.5],
+    }
+    assert set(grid) == set(rules.feature_names)
+    stocks = [dict(zip(grid, combo)) for combo in itertools.product(*grid.values())]
+    X = np.array([[np.nan if s[f] is None else s[f] for f in rules.feature_names] for s in stocks])
+
+    engine = VectorBayesEngine(rules)
+    post, E = engine.score(X)
+    for i, values in enumerate(stocks):
+        bayes = scalar_score(rules, values)
+        assert post[i] == pytest.approx(bayes.prior, rel=1e-12), values
+        assert engine.trace(X, E, i).evidence_log == bayes.evidence_log
+
+def test_screen_matches_analyze_all(tmp_path):
+    vector = screen(REPORT, str(tmp_path / 'vector.md'), use_cache=False)
+    scalar = analyze_all(REPORT, str(tmp_path / 'scalar.md'), use_cache=False)
+    assert [r['code'] for r in vector] == [r['code'] for r in scalar]
+    for v, s in zip(vector, scalar):
+        assert v['posterior'] == pytest.approx(s['posterior'], rel=1e-12)
+        assert v['evidence'] == s['evidence']
+        assert v['metrics'] == {m: s['metrics'].get(m) for m in ('growth_3y', 'roe', 'pe')}
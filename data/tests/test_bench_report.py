@@ -0,0 +1,21 @@
+import bench_report
+from analyze_report import ReportIndex, list_peer_codes, select_sections
+
+def test_generated_report_parses_like_a_real_export():
+    content, codes = bench_report.generate_report(25)
+    found, names, home_code = list_peer_codes(select_sections(ReportIndex(content)))
+    assert found == codes and home_code == codes[0]
+    assert names[codes[1]] == '样本1'
+    assert bench_report.generate_report(25) == (content, codes)  # seeded
+
+def test_smoke_run_and_regression_check(capsys):
+    results = bench_report.run_benchmarks(sizes=[5], repeat=1)
+    stages = results['5']
+    assert {'report_index', 'analyze_all', 'analyze_all_cached', 'vector_screen'} <= set(stages)
+    assert all(r['seconds'] >= 0 and r['peak_bytes'] >= 0 for r in stages.values())
+
+    assert bench_report.print_results(results, baseline=results) == []
+    faster = {'5': {name: dict(r, seconds=r['seconds'] / 2) for name, r in stages.items()}}
+    regressions = bench_report.print_results(results, baseline=faster, threshold=20)
+    assert {name for _, name, _ in regressions} == {n for n, r in stages.items() if r['seconds'] > 0}
+    assert 'regression(s) over 20%' in capsys.readouterr().out
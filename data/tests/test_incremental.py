@@ -0,0 +1,38 @@
+import json
+from merge_reports import FILES_TO_MERGE, MANIFEST_FILE_NAME, merge_all_tickers
+
+def manifest(root):
+    return json.loads((root / MANIFEST_FILE_NAME).read_text(encoding='utf-8'))['tickers']
+
+def test_unchanged_tickers_are_skipped(ticker_root):
+    first = merge_all_tickers(str(ticker_root), workers=1, incremental=True)
+    assert [(r['code'], r['ok']) for r in first] == [('600519', True)]
+    entry = manifest(ticker_root)['600519']
+    assert entry['posterior'] == first[0]['posterior'] and set(entry['inputs']) == set(FILES_TO_MERGE)
+
+    assert merge_all_tickers(str(ticker_root), workers=1, incremental=True) == []
+
+    # An edited export is picked up again
+    path = ticker_root / '600519' / FILES_TO_MERGE[0]
+    path.write_text(path.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+    assert [r['code'] for r in merge_all_tickers(str(ticker_root), workers=1, incremental=True)] == ['600519']
+
+def test_deleted_output_is_reanalysed(ticker_root):
+    merge_all_tickers(str(ticker_root), workers=1, incremental=True)
+    (ticker_root / '600519' / 'beiyesi_out.md').unlink()
+    assert len(merge_all_tickers(str(ticker_root), workers=1, incremental=True)) == 1
+
+def test_ticker_with_nothing_parsed_fails_and_stays_pending(ticker_root):
+    garbled = ticker_root / '000001'
+    garbled.mkdir()
+    for name in FILES_TO_MERGE:
+        (garbled / name).write_text('导出失败，没有表格\n', encoding='utf-8')
+
+    results = {r['code']: r for r in merge_all_tickers(str(ticker_root), workers=1, incremental=True)}
+    assert results['600519']['ok']
+    assert not results['000001']['ok'] and results['000001']['error']
+    assert list(manifest(ticker_root)) == ['600519']
+
+    # Not recorded, so the next run tries them again
+    again = merge_all_tickers(str(ticker_root), workers=1, incremental=True)
+    assert [r['code'] for r in again] == ['000001']
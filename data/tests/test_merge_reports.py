@@ -0,0 +1,28 @@
+import hashlib
+import analyze_report
+import merge_reports
+import report_cache
+from merge_reports import FILES_TO_MERGE, ANALYSIS_FILE_NAME, file_sha1, merge_all_tickers, process_ticker
+
+def test_one_file_sha1_helper(tmp_path):
+    assert merge_reports.file_sha1 is report_cache.file_sha1 is analyze_report.file_sha1
+    path = tmp_path / 'big.bin'
+    data = bytes(range(256)) * 5000  # spans several chunks
+    path.write_bytes(data)
+    assert file_sha1(path, chunk_size=4096) == hashlib.sha1(data).hexdigest()
+
+def test_process_ticker(ticker_root):
+    r = process_ticker(str(ticker_root / '600519'))
+    assert r['ok'], r.get('traceback')
+    assert 0 < r['posterior'] < 1
+    assert r['output_hash'] == file_sha1(ticker_root / '600519' / ANALYSIS_FILE_NAME)
+
+def test_batch_isolates_a_failing_ticker(ticker_root):
+    broken = ticker_root / '000001'
+    broken.mkdir()
+    (broken / FILES_TO_MERGE[0]).mkdir()  # unreadable: a directory where the export should be
+    (ticker_root / 'notes').mkdir()         # not a 6-digit code: ignored
+
+    results = merge_all_tickers(str(ticker_root), workers=2)
+    assert [(r['code'], r['ok']) for r in results] == [('000001', False), ('600519', True)]
+    assert results[0]['error']
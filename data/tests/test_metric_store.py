@@ -0,0 +1,66 @@
+import os
+import shutil
+import numpy as np
+import pytest
+from analyze_report import analyze_report, calculate_industry_median, find_col_index, load_report_sections
+from bayes_vector import screen
+from metric_store import (SNAPSHOT_PERIOD, MetricStore, build_metric_store, peer_table_records,
+                          screen_store, statement_records)
+from statements import ingest_statements
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / 'merged_report.md'
+    shutil.copy(os.path.join(DATA_DIR, 'merged_report.md'), path)
+    return str(path)
+
+def test_round_trip_through_the_mapping(tmp_path):
+    records = [('600519', '2024-12-31', 'roe', 36.0), ('000858', '2024-12-31', 'roe', 24.0),
+               ('000568', '2024-12-31', 'roe', 30.0), ('600519', '2023-12-31', 'roe', 34.2)]
+    build_metric_store(str(tmp_path / 'store'), records, names={'600519': '贵州茅台'})
+
+    store = MetricStore.open(str(tmp_path / 'store'))
+    assert isinstance(store.values, np.memmap)
+    assert store.periods == ['2023-12-31', '2024-12-31']
+    assert store.get('600519', '2023-12-31', 'roe') == 34.2
+    assert store.get('000858', '2023-12-31', 'roe') is None
+    assert store.cross_section('roe', '2024-12-31').tolist() == [36.0, 24.0, 30.0]
+    assert store.median('roe', '2024-12-31') == 30.0
+    assert store.median('roe', '2024-12-31', tickers=['600519', '000858', 'nope']) == 30.0
+    assert store.median('roe', '2023-12-31', tickers=['000858']) is None
+    assert np.isnan(store.history('000858', 'roe')[0])
+    assert store.industry_median('roe') is None  # no snapshot period
+
+def test_empty_store(tmp_path):
+    build_metric_store(str(tmp_path / 'store'), [])
+    store = MetricStore.open(str(tmp_path / 'store'))
+    assert store.values.shape == (0, 0, 0)
+
+def test_snapshot_median_matches_the_peer_table(report):
+    records, names = peer_table_records(report)
+    store = build_metric_store(os.path.join(os.path.dirname(report), 'store'), records, names)
+    rows, headers = load_report_sections(report)['valuation']
+    col = find_col_index(headers, ['市盈率', 'PE'], exclude=['PEG'])
+    assert store.industry_median('pe') == calculate_industry_median(rows, col)
+
+    bayes, _ = analyze_report(report, out_path=report + '.one.md')
+    with_store, _ = analyze_report(report, out_path=report + '.two.md', metric_store=store)
+    assert with_store.prior == bayes.prior
+
+    from_store = screen_store(store, out_path=report + '.store.md')
+    from_report = screen(report, report + '.rank.md')
+    assert {r['code'] for r in from_store} == {r['code'] for r in from_report}
+    by_code = {r['code']: r for r in from_report}
+    for r in from_store:
+        assert r['posterior'] == pytest.approx(by_code[r['code']]['posterior'])
+        assert r['name'] == by_code[r['code']]['name']
+
+def test_statement_records(tmp_path):
+    ingest_statements(DATA_DIR, str(tmp_path / 'statements'))
+    records = statement_records(str(tmp_path / 'statements'), metrics={'income.净利润'})
+    assert records and {r[2] for r in records} == {'income.净利润'}
+    store = build_metric_store(str(tmp_path / 'store'), records)
+    assert store.get('600519', '2025-09-30', 'income.净利润') == pytest.approx(669.0e8)
+    assert statement_records(str(tmp_path / 'missing')) == []
@@ -0,0 +1,87 @@
+import os
+import shutil
+import pytest
+import report_cache
+from report_cache import cached_parse, evict
+from analyze_report import load_report_index
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / 'report.md'
+    path.write_text('# a\n| x |\n', encoding='utf-8')
+    return path
+
+@pytest.fixture
+def parse():
+    calls = []
+    def parse_fn(content):
+        calls.append(content)
+        return content.upper()
+    parse_fn.calls = calls
+    return parse_fn
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+def test_unchanged_report_is_parsed_once(report, parse):
+    assert cached_parse(report, parse) == '# A\n| X |\n'
+    assert cached_parse(report, parse) == '# A\n| X |\n'
+    assert len(parse.calls) == 1
+    assert os.listdir(report.parent / report_cache.CACHE_DIR_NAME)
+
+def test_edits_and_version_bumps_reparse(report, parse):
+    cached_parse(report, parse)
+    report.write_text('# b\n| y |\n', encoding='utf-8')
+    bump_mtime(report)  # same size: only the mtime tells them apart
+    assert cached_parse(report, parse) == '# B\n| Y |\n'
+    assert cached_parse(report, parse, version=2) == '# B\n| Y |\n'
+    assert len(parse.calls) == 3
+
+def test_touch_with_same_content_is_a_hit(report, parse):
+    cached_parse(report, parse)
+    bump_mtime(report)
+    cached_parse(report, parse)
+    cached_parse(report, parse)
+    assert len(parse.calls) == 1
+
+def test_verify_hash_catches_edits_that_keep_the_mtime(report, parse):
+    cached_parse(report, parse)
+    st = os.stat(report)
+    report.write_text('# c\n| z |\n', encoding='utf-8')
+    os.utime(report, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cached_parse(report, parse, verify_hash=True) == '# C\n| Z |\n'
+
+def test_corrupt_entry_is_a_miss(report, parse):
+    cached_parse(report, parse)
+    cache_dir = report.parent / report_cache.CACHE_DIR_NAME
+    for name in os.listdir(cache_dir):
+        (cache_dir / name).write_bytes(b'not a pickle')
+    assert cached_parse(report, parse) == '# A\n| X |\n'
+    assert len(parse.calls) == 2
+
+def test_eviction_keeps_the_newest_entries(tmp_path, parse):
+    cache_dir = tmp_path / 'cache'
+    paths = []
+    for i in range(4):
+        path = tmp_path / f'r{i}.md'
+        path.write_text(f'# {i}\n', encoding='utf-8')
+        paths.append(path)
+        cached_parse(path, parse, cache_dir=str(cache_dir), max_entries=2)
+        # Entry mtimes are the LRU clock; keep them apart on coarse filesystems
+        entry = report_cache._entry_path(str(cache_dir), path)
+        os.utime(entry, (i * 10, i * 10))
+    assert len(os.listdir(cache_dir)) == 2
+    cached_parse(paths[3], parse, cache_dir=str(cache_dir))
+    cached_parse(paths[0], parse, cache_dir=str(cache_dir))
+    assert len(parse.calls) == 5  # r0 was evicted, r3 was not
+    assert evict(str(cache_dir), max_entries=0) == 3
+
+def test_cached_report_index_matches_a_fresh_parse(tmp_path):
+    path = tmp_path / 'merged_report.md'
+    shutil.copy(os.path.join(DATA_DIR, 'merged_report.md'), path)
+    fresh = load_report_index(str(path), use_cache=False).sections
+    assert load_report_index(str(path)).sections == fresh  # miss
+    assert load_report_index(str(path)).sections == fresh  # hit
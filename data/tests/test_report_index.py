@@ -0,0 +1,46 @@
+from analyze_report import ReportIndex, TableRows, extract_named_row, parse_markdown_table
+
+REPORT = '''# 成长性_czxbj
+| 排名 | 代码 | 简称 | 3年复合 |
+| --- | --- | --- | --- |
+| 1/3 | 600519 | 贵州茅台 | 18.02 |
+| 2 | 000858 | 五粮液 | 12.5 |
+| 行业平均 | | | 9.1 |
+some prose that is not a table
+
+# 估值比较_gzbj
+| 排名 | 代码 | 简称 | PE |
+| --- | --- | --- | --- |
+| 1 | 600519 | 贵州茅台 | 22.0 |
+
+# 成长性_czxbj
+| 排名 | 代码 |
+| 9 | 999999 |
+
+# 空节
+'''
+
+def test_sections_are_indexed_once():
+    index = ReportIndex(REPORT)
+    rows, headers = index.table('成长性_czxbj')
+    assert headers == ['排名', '代码', '简称', '3年复合']
+    assert [r[1] for r in rows] == ['600519', '000858', '']  # the repeated title later on is ignored
+    assert index.table('估值比较')[0][0][3] == '22.0'  # prefix match on the title
+    assert index.table('空节') == ([], [])
+    assert index.table('分红') == ([], [])
+
+def test_parse_markdown_table_reuses_the_index():
+    parse_markdown_table(REPORT, '成长性_czxbj')
+    rows, _ = parse_markdown_table(REPORT, '估值比较_gzbj')
+    assert isinstance(rows, TableRows) and rows[0][2] == '贵州茅台'
+
+def test_round_trip_through_the_cache_format():
+    index = ReportIndex(REPORT)
+    again = ReportIndex.from_dict(index.to_dict())
+    assert again.sections == index.sections
+
+def test_find_matches_the_linear_scan():
+    rows = TableRows([['行业平均', 'x'], ['行业中值', 'y'], ['600519', 'z'], ['600519', 'dup']])
+    plain = [list(r) for r in rows]
+    for keyword in ('行业平均', '行业', '600519', '6005', 'missing', ''):
+        assert extract_named_row(rows, 0, keyword) == extract_named_row(plain, 0, keyword)
@@ -0,0 +1,35 @@
+import os
+import pytest
+from analyze_report import analyze_all, analyze_report, load_report_sections, list_peer_codes, score_stock
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT = os.path.join(DATA_DIR, 'merged_report.md')
+
+@pytest.fixture(scope='module')
+def sections():
+    return load_report_sections(REPORT, use_cache=False)
+
+def test_peer_codes(sections):
+    codes, names, home_code = list_peer_codes(sections)
+    assert home_code == '600519' and names['600519'] == '贵州茅台'
+    assert len(codes) == len(set(codes)) > 1
+    assert all(len(c) == 6 and c.isdigit() for c in codes)
+
+def test_batch_matches_one_stock_at_a_time(sections, tmp_path):
+    out = tmp_path / 'rank.md'
+    results = analyze_all(REPORT, str(out), use_cache=False)
+    codes, _, home_code = list_peer_codes(sections)
+    assert sorted(r['code'] for r in results) == sorted(codes)
+    assert [r['posterior'] for r in results] == sorted((r['posterior'] for r in results), reverse=True)
+
+    for r in results:
+        # Peers have no 分红 table of their own
+        bayes, metrics = score_stock(sections, r['code'], include_dividend=(r['code'] == home_code))
+        assert r['posterior'] == bayes.prior and r['metrics'] == metrics
+
+    home = next(r for r in results if r['code'] == home_code)
+    bayes, _ = analyze_report(REPORT, home_code, out_path=str(tmp_path / 'one.md'), use_cache=False)
+    assert home['posterior'] == bayes.prior
+
+    table = out.read_text(encoding='utf-8')
+    assert f'| 1 | {results[0]["code"]} |' in table and f'样本数量: {len(results)}' in table
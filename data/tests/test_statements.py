@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pytest
+from statements import (compute_history_factors, ingest_statements, load_statement, normalize_period,
+                        parse_cn_number, parse_statement_file, statement_key)
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize('cell, value', [
+    ('1309亿', 1.309e11),
+    ('2553万152.00%', 2.553e7),
+    ('1.2万亿', 1.2e12),
+    ('-3.5亿', -3.5e8),
+    ('1,234.5', 1234.5),
+    ('51.5300', 51.53),
+    ('--', None),
+    ('------', None),
+    ('', None),
+])
+def test_parse_cn_number(cell, value):
+    assert parse_cn_number(cell) == (pytest.approx(value) if value is not None else None)
+
+def test_periods_and_file_names():
+    assert normalize_period('25-09-30') == '2025-09-30'
+    assert normalize_period('2024-12-31') == '2024-12-31'
+    assert normalize_period('净利润') is None
+    assert statement_key('利润表lrb_table.md') == 'income'
+    assert statement_key('成长性sectionczxbj.md') is None
+
+def test_repeated_labels_and_empty_rows(tmp_path):
+    path = tmp_path / 'xx_table.md'
+    path.write_text('\n'.join([
+        '> 来源: https://example.com/?code=000001.SZ',
+        '| 报告期 | 24-12-31 | 23-12-31 |',
+        '| --- | --- | --- |',
+        '| 负债 | ------ | ------ |',
+        '| 其中:永续债 | 1亿 | -- |',
+        '| 24-12-31 | 24-12-31 | 23-12-31 |',
+        '| 其中:永续债 | 2亿 |',
+    ]), encoding='utf-8')
+    code, metrics, periods, values = parse_statement_file(path)
+    assert code == '000001' and periods == ['2024-12-31', '2023-12-31']
+    assert metrics == ['其中:永续债', '其中:永续债#2']
+    assert values[0, 0] == 1e8 and np.isnan(values[0, 1])
+    assert values[1, 0] == 2e8 and np.isnan(values[1, 1])
+
+def test_ingest_sample_exports(tmp_path):
+    ingested = ingest_statements(DATA_DIR, str(tmp_path))
+    assert set(ingested) == {'income', 'cashflow', 'indicators', 'balance'}
+    assert {code for code, _, _ in ingested.values()} == {'600519'}
+
+    income = load_statement('600519', 'income', str(tmp_path))
+    assert isinstance(income.values, np.memmap)
+    assert income.periods[0] == '2025-09-30'
+    assert income.series('净利润')[0] == pytest.approx(669.0e8)
+    assert income.series('不存在') is None
+    assert load_statement('600519', 'nope', str(tmp_path)) is None
+
+    factors = compute_history_factors('600519', str(tmp_path))
+    assert set(factors) == {'cashflow_coverage', 'roe_annual', 'roe_trend'}
+    assert all(p.endswith('-12-31') for p in factors['roe_annual'])
+    years = sorted(factors['roe_annual'])
+    assert (factors['roe_trend'] > 0) == (factors['roe_annual'][years[-1]] > factors['roe_annual'][years[0]])
@@ -0,0 +1,63 @@
+import os
+import re
+import json
+import pytest
+from analyze_report import ReportIndex, load_report_index, read_section_spans
+from merge_reports import (FILES_TO_MERGE, MERGED_FILE_NAME, SECTION_INDEX_SUFFIX,
+                           merge_markdown_files, stream_merge_markdown_files)
+
+def without_timestamp(data):
+    return re.sub('> 合并时间: [^\n]*'.encode('utf-8'), b'', data)
+
+@pytest.fixture
+def merged(ticker_root):
+    base_dir = str(ticker_root / '600519')
+    return stream_merge_markdown_files(base_dir, run_analysis=False)
+
+def test_same_output_as_the_in_memory_merge(ticker_root, merged):
+    base_dir = str(ticker_root / '600519')
+    old = merge_markdown_files(base_dir, os.path.join(base_dir, 'old.md'), run_analysis=False)
+    with open(merged, 'rb') as a, open(old, 'rb') as b:
+        assert without_timestamp(a.read()) == without_timestamp(b.read())
+    assert os.path.basename(merged) == MERGED_FILE_NAME
+
+def test_sidecar_offsets_point_at_the_sections(merged):
+    spans = read_section_spans(merged)
+    assert len(spans) == len(FILES_TO_MERGE)
+    with open(merged, 'rb') as f:
+        data = f.read()
+    for title, (offset, length) in spans.items():
+        assert data[offset:offset + length].startswith(f'# {title}\n'.encode('utf-8'))
+
+    with open(merged, 'r', encoding='utf-8') as f:
+        full = ReportIndex(f.read())
+    for use_cache in (False, True):
+        index = load_report_index(merged, use_cache=use_cache)
+        assert all(index.table(t) == full.table(t) for t in spans)
+
+def test_stale_sidecar_is_ignored(merged):
+    assert read_section_spans(merged) is not None
+    # Touched but unchanged: the hash still matches
+    st = os.stat(merged)
+    os.utime(merged, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert read_section_spans(merged) is not None
+
+    # Rewritten in place with the same size
+    with open(merged, 'r+b') as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b'XXXX')
+    os.utime(merged, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+    assert read_section_spans(merged) is None
+
+    with open(merged, 'ab') as f:
+        f.write(b'\n')
+    assert read_section_spans(merged) is None
+
+def test_missing_or_broken_sidecar(merged):
+    index_path = merged + SECTION_INDEX_SUFFIX
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump({'size': 1}, f)
+    assert read_section_spans(merged) is None
+    os.remove(index_path)
+    assert read_section_spans(merged) is None
+    assert load_report_index(merged, use_cache=False).table('估值比较_gzbj')[0]
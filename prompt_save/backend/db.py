@@ -1,13 +1,38 @@
 import sqlite3
 import json
+import queue
+import threading
+import hashlib
+import re
+import zlib
+import time
+import os
 from datetime import datetime
 
 DB_NAME = 'prompts.db'
 
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
+# Connection pool settings
+POOL_SIZE = 8
+POOL_TIMEOUT = 10  # seconds to wait for a free connection
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+
+# Applied to every pooled connection. WAL lets readers run while a writer commits;
+# NORMAL sync is durable across app crashes in WAL mode.
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA cache_size = -16000',  # 16 MB page cache
+    'PRAGMA temp_store = MEMORY',
+]
+
+# --- Schema migrations ---
+# PRAGMA user_version holds the number of migrations applied. migrate() runs the
+# pending ones in order inside a single transaction, so startup on an up-to-date
+# database is one pragma read. Append new steps to MIGRATIONS; never edit or reorder
+# released ones.
+
+def create_base_tables(c):
     # Create prompts table
     c.execute('''
         CREATE TABLE IF NOT EXISTS prompts (
@@ -28,11 +53,647 @@ def init_db():
             order_index INTEGER DEFAULT 0
         )
     ''')
-    
-    conn.commit()
-    conn.close()
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
+def add_order_columns(c):
+    # Databases from before drag-and-drop ordering lack order_index
+    for table in ('prompts', 'tags'):
+        columns = {row[1] for row in c.execute(f'PRAGMA table_info({table})')}
+        if 'order_index' not in columns:
+            c.execute(f'ALTER TABLE {table} ADD COLUMN order_index INTEGER DEFAULT 0')
+
+def add_order_indexes(c):
+    # Serve the listing ORDER BYs (and keyset pagination) straight from an index. The
+    # listing sorts on COALESCE(order_index, 0) (see prompt_rows), so the index does too
+    c.execute('DROP INDEX IF EXISTS idx_prompts_order')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_prompts_order_key ON prompts (COALESCE(order_index, 0), updated_at DESC, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tags_order ON tags (order_index, name)')
+
+# Change log for delta sync: triggers record every insert/update/delete of prompts and
+# tags. Only the latest entry per entity is kept (older ones are deleted by the trigger),
+# so the log grows with the number of entities and tombstones, not with edit count.
+CHANGE_LOG_TRIGGERS = {
+    # (table, key column, entity name)
+    'prompts': ('id', 'prompt'),
+    'tags': ('name', 'tag'),
+}
+
+def init_change_log(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,     -- 'prompt' | 'tag'
+            entity_id TEXT NOT NULL,
+            op TEXT NOT NULL,         -- 'upsert' | 'delete'
+            changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER) * 1000)
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_change_log_entity ON change_log (entity, entity_id)')
+
+    for table, (key_col, entity) in CHANGE_LOG_TRIGGERS.items():
+        for event, row, op in (('INSERT', 'NEW', 'upsert'), ('UPDATE', 'NEW', 'upsert'), ('DELETE', 'OLD', 'delete')):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_log AFTER {event} ON {table}
+                BEGIN
+                    DELETE FROM change_log WHERE entity = '{entity}' AND entity_id = {row}.{key_col};
+                    INSERT INTO change_log (entity, entity_id, op) VALUES ('{entity}', {row}.{key_col}, '{op}');
+                END
+            ''')
+
+# prompts.tags stays the JSON list the API returns; prompt_tags is its normalized copy,
+# rebuilt by triggers whenever a prompt's tags change, so tag lookups and tag-wide
+# updates go through the (tag, prompt_id) index instead of scanning every JSON blob.
+def init_prompt_tags(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS prompt_tags (
+            prompt_id TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            position INTEGER NOT NULL,  -- index in the prompt's JSON list
+            PRIMARY KEY (prompt_id, tag)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag ON prompt_tags (tag, prompt_id)')
+
+    fill = '''
+        INSERT OR IGNORE INTO prompt_tags (prompt_id, tag, position)
+        SELECT NEW.id, value, key FROM json_each(NEW.tags) WHERE type = 'text';
+    '''
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_insert_tags AFTER INSERT ON prompts
+        BEGIN {fill} END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_update_tags AFTER UPDATE OF id, tags ON prompts
+        BEGIN
+            DELETE FROM prompt_tags WHERE prompt_id = OLD.id;
+            {fill}
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_delete_tags AFTER DELETE ON prompts
+        BEGIN
+            DELETE FROM prompt_tags WHERE prompt_id = OLD.id;
+        END
+    ''')
+
+    # Backfill from the JSON column of existing rows
+    c.execute('''
+        INSERT OR IGNORE INTO prompt_tags (prompt_id, tag, position)
+        SELECT prompts.id, j.value, j.key FROM prompts, json_each(prompts.tags) AS j
+        WHERE json_valid(prompts.tags) AND j.type = 'text'
+    ''')
+
+# Full-text index over prompt titles and bodies. The trigram tokenizer gives substring
+# matching (same semantics as the popup's includes() filter) and works for CJK text,
+# which the default unicode61 tokenizer treats as one token per run of characters.
+# Rows share prompts.rowid so triggers can update them without a lookup; search
+# results join back through prompt_id, so only the triggers depend on rowids.
+def init_search_index(c):
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+            title, content, prompt_id UNINDEXED,
+            tokenize = 'trigram'
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_insert_fts AFTER INSERT ON prompts
+        BEGIN
+            INSERT INTO prompts_fts (rowid, title, content, prompt_id) VALUES (NEW.rowid, NEW.title, NEW.content, NEW.id);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_update_fts AFTER UPDATE OF id, title, content ON prompts
+        BEGIN
+            DELETE FROM prompts_fts WHERE rowid = OLD.rowid;
+            INSERT INTO prompts_fts (rowid, title, content, prompt_id) VALUES (NEW.rowid, NEW.title, NEW.content, NEW.id);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_delete_fts AFTER DELETE ON prompts
+        BEGIN
+            DELETE FROM prompts_fts WHERE rowid = OLD.rowid;
+        END
+    ''')
+    c.execute('DELETE FROM prompts_fts')
+    c.execute('INSERT INTO prompts_fts (rowid, title, content, prompt_id) SELECT rowid, title, content, id FROM prompts')
+
+# --- Content-addressed prompt bodies ---
+# Bodies live in prompt_blobs keyed by the sha256 of their UTF-8 text, compressed with
+# zlib when that helps, so identical bodies are stored once. prompts.content_hash points
+# at the blob and prompts.content is left empty. Packing and unpacking happen in Python:
+# the schema has no custom SQL functions, so the sqlite3 CLI or a backup script can still
+# read and write prompts. A row written that way (text in prompts.content, no
+# content_hash) is served and indexed as is.
+# Bulk writes (/api/sync, /api/import) store new bodies raw, since zlib was the largest
+# cost of a big sync; index_pending() compresses them when it indexes those rows.
+BLOB_MIN_COMPRESS = 64  # shorter bodies are stored raw; zlib would only add overhead
+
+def pack_body(text):
+    """(hash, codec, data, size) row for prompt_blobs."""
+    raw = text.encode('utf-8')
+    return _pack(hashlib.sha256(raw).hexdigest(), raw)
+
+def _pack(digest, raw):
+    if len(raw) >= BLOB_MIN_COMPRESS:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return digest, 'zlib', packed, len(raw)
+    return digest, 'raw', raw, len(raw)
+
+def unpack_body(codec, data):
+    if data is None:
+        return None
+    if codec == 'zlib':
+        data = zlib.decompress(data)
+    return bytes(data).decode('utf-8')
+
+def store_bodies(conn, texts, compress=True):
+    """Inserts the missing blobs for texts and returns their hashes, in order."""
+    raws = [t.encode('utf-8') for t in texts]
+    hashes = [hashlib.sha256(raw).hexdigest() for raw in raws]
+    # Only bodies that aren't stored yet get compressed: a re-sync costs one lookup
+    known = set()
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), 500):
+        chunk = unique[start:start + 500]
+        known.update(r[0] for r in conn.execute(
+            f'SELECT hash FROM prompt_blobs WHERE hash IN ({",".join("?" * len(chunk))})', chunk).fetchall())
+    blobs = {}
+    for digest, raw in zip(hashes, raws):
+        if digest not in known and digest not in blobs:
+            blobs[digest] = _pack(digest, raw) if compress else (digest, 'raw', raw, len(raw))
+    conn.executemany('INSERT OR IGNORE INTO prompt_blobs (hash, codec, data, size) VALUES (?, ?, ?, ?)', blobs.values())
+    return hashes
+
+def pack_raw_blobs(conn, bodies):
+    """Compresses the blobs of bodies ({hash: text}) that a bulk write stored raw."""
+    hashes = list(bodies)
+    for start in range(0, len(hashes), 500):
+        chunk = hashes[start:start + 500]
+        raw = conn.execute(
+            f"SELECT hash FROM prompt_blobs WHERE codec = 'raw' AND size >= ? AND hash IN ({','.join('?' * len(chunk))})",
+            [BLOB_MIN_COMPRESS] + chunk).fetchall()
+        packed = [pack_body(bodies[h]) for (h,) in raw]
+        conn.executemany("UPDATE prompt_blobs SET codec = ?, data = ? WHERE hash = ? AND codec = 'raw'",
+                         [(codec, data, h) for h, codec, data, _ in packed if codec != 'raw'])
+
+def load_bodies(conn, hashes):
+    """{hash: text} for the hashes that have a blob."""
+    hashes = list(dict.fromkeys(hashes))
+    bodies = {}
+    for start in range(0, len(hashes), 500):
+        chunk = hashes[start:start + 500]
+        rows = conn.execute(
+            f'SELECT hash, codec, data FROM prompt_blobs WHERE hash IN ({",".join("?" * len(chunk))})', chunk
+        ).fetchall()
+        bodies.update((h, unpack_body(codec, data)) for h, codec, data in rows)
+    return bodies
+
+# prompts joined with their blob; body_of() turns a row into the text. A NULL order_index
+# (rows from other tools) reads as 0, so sorting and keyset cursors never see a NULL.
+PROMPT_ROWS_VIEW = '''
+    CREATE VIEW IF NOT EXISTS prompt_rows AS
+    SELECT p.rowid AS rid, p.id, p.title, p.content, b.codec AS body_codec, b.data AS body_data,
+           p.tags, p.created_at, p.updated_at, COALESCE(p.order_index, 0) AS order_index, p.content_hash
+    FROM prompts p LEFT JOIN prompt_blobs b ON b.hash = p.content_hash
+'''
+
+def body_of(row):
+    if row['body_data'] is not None:
+        return unpack_body(row['body_codec'], row['body_data'])
+    return row['content']
+
+# --- Search index (v7) ---
+# prompts_fts is a contentless FTS5 table: it holds the index only, no copy of the text.
+# Triggers can't see the text of a blob-backed row, so the index is fed from Python:
+# the prompts triggers only queue the rowid of every inserted, edited or deleted prompt
+# in prompts_fts_queue, and index_pending() drains the queue. prompts_fts_docs records
+# the title and body hash each rowid was indexed with, which is what removing an entry
+# from a contentless table takes. The server drains the queue inside its own write
+# transactions; rows changed by other tools are picked up by the next write or search.
+#
+# Tokens come from unicode61, which splits on spaces and punctuation. Chinese/Japanese/
+# Korean text has no spaces, so search_text() puts one around every CJK character and
+# fts_query() matches a CJK term as a phrase of its characters: "翻译" finds the
+# substring 翻译 at any length, one character included. Latin words match by prefix.
+INDEX_BATCH_SIZE = 500
+CJK_RUN = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\U00020000-\U0002ebef]+')
+
+def search_text(text):
+    """text as it is fed to prompts_fts."""
+    return CJK_RUN.sub(lambda m: ' ' + ' '.join(m.group(0)) + ' ', text or '')
+
+def fts_query(terms):
+    """MATCH expression requiring every term, or None if no term has anything to match."""
+    parts = []
+    for term in terms:
+        if not re.search(r'\w', term):
+            continue
+        phrase = '"' + ' '.join(search_text(term).split()).replace('"', '""') + '"'
+        # Prefix match on a trailing Latin word; a CJK character is a whole token
+        parts.append(phrase if CJK_RUN.fullmatch(term[-1]) else phrase + '*')
+    return ' AND '.join(parts) or None
+
+def init_search_tables(c):
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+            title, content,
+            content = '',
+            tokenize = 'unicode61'
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS prompts_fts_docs (
+            rid INTEGER PRIMARY KEY,  -- prompts.rowid
+            title TEXT NOT NULL,
+            content_hash TEXT         -- NULL: indexed with an empty body
+        )
+    ''')
+    c.execute('CREATE TABLE IF NOT EXISTS prompts_fts_queue (rid INTEGER PRIMARY KEY)')
+    # Not INSERT OR IGNORE: inside a trigger the outer statement's conflict handling (an
+    # upsert's DO UPDATE) would override it
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_insert_fts AFTER INSERT ON prompts
+        BEGIN
+            INSERT INTO prompts_fts_queue (rid) SELECT NEW.rowid WHERE NOT EXISTS (SELECT 1 FROM prompts_fts_queue WHERE rid = NEW.rowid);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_update_fts AFTER UPDATE OF title, content, content_hash ON prompts
+        BEGIN
+            INSERT INTO prompts_fts_queue (rid) SELECT OLD.rowid WHERE NOT EXISTS (SELECT 1 FROM prompts_fts_queue WHERE rid = OLD.rowid);
+            INSERT INTO prompts_fts_queue (rid) SELECT NEW.rowid WHERE NOT EXISTS (SELECT 1 FROM prompts_fts_queue WHERE rid = NEW.rowid);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_prompts_delete_fts AFTER DELETE ON prompts
+        BEGIN
+            INSERT INTO prompts_fts_queue (rid) SELECT OLD.rowid WHERE NOT EXISTS (SELECT 1 FROM prompts_fts_queue WHERE rid = OLD.rowid);
+        END
+    ''')
+
+def index_pending(conn, bodies=None, limit=None):
+    """
+    Updates prompts_fts for the queued rowids (at most limit of them) and returns how
+    many were processed. bodies maps content_hash -> text the caller just stored, so
+    those aren't inflated again. Run it inside the write transaction.
+    """
+    bodies = dict(bodies or {})
+    sql = 'SELECT rid FROM prompts_fts_queue ORDER BY rid'
+    if limit:
+        sql += f' LIMIT {int(limit)}'
+    rids = [r[0] for r in conn.execute(sql).fetchall()]
+    for start in range(0, len(rids), INDEX_BATCH_SIZE):
+        chunk = rids[start:start + INDEX_BATCH_SIZE]
+        marks = ','.join('?' * len(chunk))
+        indexed = {rid: (title, h) for rid, title, h in conn.execute(
+            f'SELECT rid, title, content_hash FROM prompts_fts_docs WHERE rid IN ({marks})', chunk).fetchall()}
+        rows = conn.execute(
+            f'SELECT rowid, title, content, content_hash FROM prompts WHERE rowid IN ({marks})', chunk).fetchall()
+        # Inline text (written by another tool) gets a blob too, so its entry can be removed later
+        inline_hashes = iter(store_bodies(conn, [r[2] or '' for r in rows if r[3] is None]))
+        current = {}
+        for rid, title, content, content_hash in rows:
+            if content_hash is None:
+                content_hash = next(inline_hashes)
+                bodies[content_hash] = content or ''
+            current[rid] = (title, content_hash)
+
+        stale = {rid: old for rid, old in indexed.items() if current.get(rid) != old}
+        fresh = {rid: new for rid, new in current.items() if indexed.get(rid) != new}
+        wanted = [h for _, h in list(stale.values()) + list(fresh.values()) if h is not None and h not in bodies]
+        bodies.update(load_bodies(conn, wanted))
+        pack_raw_blobs(conn, {h: bodies[h] for _, h in fresh.values() if h in bodies})
+
+        conn.executemany(
+            "INSERT INTO prompts_fts (prompts_fts, rowid, title, content) VALUES ('delete', ?, ?, ?)",
+            [(rid, search_text(title), search_text(bodies.get(h))) for rid, (title, h) in stale.items()])
+        conn.executemany(
+            'INSERT INTO prompts_fts (rowid, title, content) VALUES (?, ?, ?)',
+            [(rid, search_text(title), search_text(bodies.get(h))) for rid, (title, h) in fresh.items()])
+        conn.executemany('DELETE FROM prompts_fts_docs WHERE rid = ?', [(rid,) for rid in stale if rid not in current])
+        conn.executemany(
+            'INSERT OR REPLACE INTO prompts_fts_docs (rid, title, content_hash) VALUES (?, ?, ?)',
+            [(rid, title, h if h in bodies else None) for rid, (title, h) in fresh.items()])
+        conn.execute(f'DELETE FROM prompts_fts_queue WHERE rid IN ({marks})', chunk)
+    return len(rids)
+
+def rebuild_search_index(c):
+    # Also needed after VACUUM, which may renumber rowids of tables without an INTEGER PRIMARY KEY
+    c.execute("INSERT INTO prompts_fts (prompts_fts) VALUES ('delete-all')")
+    c.execute('DELETE FROM prompts_fts_docs')
+    c.execute('INSERT OR IGNORE INTO prompts_fts_queue (rid) SELECT rowid FROM prompts')
+    index_pending(c)
+    c.execute("INSERT INTO prompts_fts (prompts_fts) VALUES ('optimize')")
+
+def move_bodies_to_blobs(c, batch_size=1000):
+    # The v5 index stored its own copy of every body; replaced below by a contentless one
+    for event in ('insert', 'update', 'delete'):
+        c.execute(f'DROP TRIGGER IF EXISTS trg_prompts_{event}_fts')
+    c.execute('DROP TABLE IF EXISTS prompts_fts')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS prompt_blobs (
+            hash TEXT PRIMARY KEY,  -- sha256 of the UTF-8 body
+            codec TEXT NOT NULL,    -- 'zlib' | 'raw'
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL   -- uncompressed bytes
+        )
+    ''')
+    columns = {row[1] for row in c.execute('PRAGMA table_info(prompts)')}
+    if 'content_hash' not in columns:
+        c.execute('ALTER TABLE prompts ADD COLUMN content_hash TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_prompts_content_hash ON prompts (content_hash)')
+
+    last = 0
+    while True:
+        rows = c.execute(
+            'SELECT rowid, content FROM prompts WHERE rowid > ? AND content_hash IS NULL ORDER BY rowid LIMIT ?',
+            (last, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        hashes = store_bodies(c, [r[1] for r in rows])
+        c.executemany("UPDATE prompts SET content = '', content_hash = ? WHERE rowid = ?",
+                      [(h, r[0]) for h, r in zip(hashes, rows)])
+        last = rows[-1][0]
+
+    c.execute(PROMPT_ROWS_VIEW)
+    init_search_tables(c)
+    rebuild_search_index(c)
+
+MIGRATIONS = [
+    create_base_tables,   # 1
+    add_order_columns,    # 2
+    init_change_log,      # 3
+    init_prompt_tags,     # 4
+    init_search_index,    # 5
+    add_order_indexes,    # 6
+    move_bodies_to_blobs, # 7
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(db_name=None):
+    """Brings the database to SCHEMA_VERSION. Returns the version it started from."""
+    conn = sqlite3.connect(db_name or DB_NAME, timeout=30, isolation_level=None)
+    try:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return version
+        # IMMEDIATE takes the write lock up front; re-read in case another process migrated meanwhile
+        conn.execute('BEGIN IMMEDIATE')
+        start = version = conn.execute('PRAGMA user_version').fetchone()[0]
+        try:
+            c = conn.cursor()
+            for step in MIGRATIONS[version:]:
+                step(c)
+                version += 1
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if start < version:
+            print(f"Migrated: schema v{start} -> v{version}")
+        return start
+    finally:
+        conn.close()
+
+def _connect(db_name):
+    conn = sqlite3.connect(db_name, timeout=5, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
+
+class PoolExhausted(Exception):
+    """No pooled connection became free within the timeout (server maps this to 503)."""
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived connections. Reusing a connection keeps its pragmas
+    and its prepared statement cache, so a request pays neither connect() nor re-prepare.
+    """
+    def __init__(self, db_name, size=POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self, timeout=POOL_TIMEOUT):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return _connect(self.db_name)
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolExhausted(f"no free connection to {self.db_name} after {timeout}s") from None
+
+    def release(self, conn):
+        # Never hand out a connection in the middle of someone else's transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+# Optional instrumentation hooks (installed by metrics.py)
+trace_callback = None   # f(sql) for every statement SQLite runs, trigger bodies included
+statement_timer = None  # f(sql, seconds) per execute()/executemany()/commit(), row fetching included
+
+class TimedCursor:
+    """Cursor proxy that reports execute + fetch time once its rows are consumed."""
+    def __init__(self, cursor, sql, elapsed):
+        self._cursor = cursor
+        self._sql = sql
+        self._elapsed = elapsed
+        self._reported = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def _report(self):
+        if not self._reported:
+            self._reported = True
+            timer = statement_timer
+            if timer is not None:
+                timer(self._sql, self._elapsed)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is None:
+            self._report()
+        return row
+
+    def fetchmany(self, *args):
+        return self._timed(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._report()
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self._timed(next, self._cursor)
+        except StopIteration:
+            self._report()
+            raise
+
+    def close(self):
+        self._report()
+        self._cursor.close()
+
+    def __del__(self):
+        # Cursors that are dropped half-read (fetchone() of one row) still count
+        self._report()
+
+class PooledConnection:
+    """sqlite3.Connection proxy whose close() returns the connection to the pool."""
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        conn.set_trace_callback(trace_callback)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, sql, *args):
+        if statement_timer is None:
+            return self._conn.execute(sql, *args)
+        start = time.perf_counter()
+        cursor = self._conn.execute(sql, *args)
+        return TimedCursor(cursor, sql, time.perf_counter() - start)
+
+    def executemany(self, sql, *args):
+        if statement_timer is None:
+            return self._conn.executemany(sql, *args)
+        start = time.perf_counter()
+        cursor = self._conn.executemany(sql, *args)
+        statement_timer(sql, time.perf_counter() - start)
+        return cursor
+
+    def commit(self):
+        if statement_timer is None:
+            return self._conn.commit()
+        start = time.perf_counter()
+        self._conn.commit()
+        statement_timer('COMMIT', time.perf_counter() - start)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __del__(self):
+        # Handlers that raise before close() still give the connection back
+        self.close()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_name=None):
+    db_name = db_name or DB_NAME
+    with _pools_lock:
+        if db_name not in _pools:
+            # POOL_SIZE is read here, not at import, so serve.py can configure it
+            _pools[db_name] = ConnectionPool(db_name, POOL_SIZE)
+        return _pools[db_name]
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+def get_db_connection():
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
+
+# --- Compaction ---
+def compact(db_name=None):
+    """
+    Drops blobs no prompt references any more (left behind by edits and deletes),
+    re-packs any inline bodies, VACUUMs and rebuilds the search index.
+    Returns (removed blob count, file bytes before, file bytes after).
+    """
+    db_name = db_name or DB_NAME
+    migrate(db_name)
+    before = os.path.getsize(db_name)
+    conn = sqlite3.connect(db_name, timeout=30, isolation_level=None)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        index_pending(conn)  # the index must not refer to a blob about to be dropped
+        rows = conn.execute("SELECT rowid, content FROM prompts WHERE content_hash IS NULL OR content != ''").fetchall()
+        if rows:
+            hashes = store_bodies(conn, [r[1] for r in rows])
+            conn.executemany("UPDATE prompts SET content = '', content_hash = ? WHERE rowid = ?",
+                             [(h, r[0]) for h, r in zip(hashes, rows)])
+        removed = conn.execute(
+            'DELETE FROM prompt_blobs WHERE hash NOT IN (SELECT content_hash FROM prompts WHERE content_hash IS NOT NULL)'
+        ).rowcount
+        conn.execute('COMMIT')
+        conn.execute('VACUUM')
+        conn.execute('BEGIN IMMEDIATE')
+        rebuild_search_index(conn)
+        conn.execute('COMMIT')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+    return removed, before, os.path.getsize(db_name)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='prompt_save database maintenance')
+    parser.add_argument('command', choices=['migrate', 'compact', 'reindex'])
+    parser.add_argument('--db', default=DB_NAME)
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        migrate(args.db)
+    elif args.command == 'reindex':
+        # Rebuilds prompts_fts from scratch, e.g. after restoring a copy or an external VACUUM
+        migrate(args.db)
+        conn = sqlite3.connect(args.db, timeout=30, isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rebuild_search_index(conn)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    else:
+        removed, before, after = compact(args.db)
+        print(f"Compacted {args.db}: removed {removed} unused blob(s), {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
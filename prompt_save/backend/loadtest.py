@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+import urllib.error
+
+# --- Load test: prompt_save API with synthetic libraries ---
+# Seeds a prompt library of --prompts prompts / --tags tags, then runs --concurrency
+# workers for --duration seconds, each picking operations from a weighted mix, and
+# reports throughput and latency percentiles per operation.
+#   python loadtest.py                                   # in-process (Flask test client), temp DB
+#   python loadtest.py --prompts 100000 --concurrency 16 --duration 60
+#   python loadtest.py --url http://127.0.0.1:5002/api   # against serve.py (seeds THAT database)
+#   python loadtest.py --save-baseline lt_base.json
+#   python loadtest.py --compare lt_base.json --threshold 20
+
+DEFAULT_MIX = {
+    # operation: weight
+    'list': 20,         # GET /api/prompts (popup open)
+    'list_page': 10,    # GET /api/prompts?limit=50 without bodies
+    'tags': 10,         # GET /api/tags
+    'search': 10,       # GET /api/prompts/search
+    'create': 10,       # POST /api/prompts
+    'update': 15,       # PUT /api/prompts/<id>
+    'move': 10,         # POST /api/prompts/move (drag and drop)
+    'reorder': 3,       # POST /api/prompts/reorder
+    'sync': 2,          # POST /api/sync
+    'delete': 10,       # DELETE /api/prompts/<id>
+}
+
+# Operations with fewer samples than this in either run are not compared
+MIN_SAMPLES = 30
+
+WORDS = ('summarize translate review explain rewrite outline draft critique compare list '
+         'code python sql email report meeting notes bug test design api release plan '
+         '翻译 总结 润色 解释 代码 邮件 报告 会议 需求 测试').split()
+
+def synthetic_prompt(rng, i, tags, body_words=120):
+    now = int(time.time() * 1000)
+    return {
+        'id': f'seed-{i}',
+        'title': ' '.join(rng.choices(WORDS, k=4)) + f' {i}',
+        'content': ' '.join(rng.choices(WORDS, k=body_words)),
+        'tags': rng.sample(tags, k=min(len(tags), rng.randint(0, 3))),
+        'createdAt': now - i,
+        'updatedAt': now - i,
+    }
+
+# --- Transports ---
+class InProcessClient:
+    """Flask test client; one per worker thread."""
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open('/api' + path, method=method, json=body)
+        data = response.get_data()
+        return response.status_code, data
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=60) as f:
+                return f.status, f.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+def seed(client, n_prompts, n_tags, seed_value=0, batch=1000):
+    rng = random.Random(seed_value)
+    tags = [f'tag{i}' for i in range(n_tags)]
+    for start in range(0, n_prompts, batch):
+        prompts = [synthetic_prompt(rng, i, tags) for i in range(start, min(start + batch, n_prompts))]
+        status, _ = client.request('POST', '/sync', {'prompts': prompts, 'tags': tags if start == 0 else []})
+        if status != 200:
+            raise RuntimeError(f"seeding failed at {start}: HTTP {status}")
+    return [f'seed-{i}' for i in range(n_prompts)], tags
+
+# --- Workers ---
+class Worker:
+    def __init__(self, index, client, ids, tags, mix, reorder_size, rng):
+        self.index = index
+        self.client = client
+        self.ids = ids  # seeded ids in seeded order, shared read-only
+        self.tags = tags
+        self.ops, self.weights = zip(*mix.items())
+        self.reorder_size = reorder_size
+        self.rng = rng
+        self.created = []  # ids this worker created and may delete
+        self.counter = 0
+        self.samples = {op: [] for op in self.ops}
+        self.errors = {op: 0 for op in self.ops}
+
+    def next_id(self):
+        self.counter += 1
+        return f'lt-{self.index}-{self.counter}'
+
+    def call(self, op):
+        rng = self.rng
+        now = int(time.time() * 1000)
+        if op == 'list':
+            return self.client.request('GET', '/prompts')
+        if op == 'list_page':
+            return self.client.request('GET', '/prompts?limit=50&fields=id,title,tags,updatedAt,contentHash')
+        if op == 'tags':
+            return self.client.request('GET', '/tags')
+        if op == 'search':
+            return self.client.request('GET', '/prompts/search?q=' + urllib.parse.quote(' '.join(rng.sample(WORDS, 2))))
+        if op == 'create':
+            p = synthetic_prompt(rng, 0, self.tags)
+            p['id'] = self.next_id()
+            result = self.client.request('POST', '/prompts', p)
+            self.created.append(p['id'])
+            return result
+        if op == 'update':
+            p = synthetic_prompt(rng, 0, self.tags)
+            p['updatedAt'] = now
+            return self.client.request('PUT', f'/prompts/{rng.choice(self.ids)}', p)
+        if op == 'move':
+            # Drag item m into gap k (between ids[k-1] and ids[k]) of the list as loaded, the
+            # seeded order; gaps m and m+1 touch the item itself and would be a no-op.
+            # The server places it after prevId even if other workers moved things since
+            m = rng.randrange(len(self.ids))
+            k = rng.randrange(len(self.ids) - 1)
+            if k >= m: k += 2
+            return self.client.request('POST', '/prompts/move', {
+                'id': self.ids[m],
+                'prevId': self.ids[k - 1] if k > 0 else None,
+                'nextId': self.ids[k] if k < len(self.ids) else None,
+            })
+        if op == 'reorder':
+            window = rng.sample(self.ids, min(self.reorder_size, len(self.ids)))
+            return self.client.request('POST', '/prompts/reorder', {'orderedIds': window})
+        if op == 'sync':
+            prompts = []
+            for _ in range(50):
+                p = synthetic_prompt(rng, 0, self.tags)
+                p['id'] = rng.choice(self.ids)
+                p['updatedAt'] = now
+                prompts.append(p)
+            return self.client.request('POST', '/sync', {'prompts': prompts, 'tags': []})
+        if op == 'delete':
+            return self.client.request('DELETE', f'/prompts/{self.created.pop()}')
+        raise ValueError(op)
+
+    def run(self, deadline, max_requests=None):
+        done = 0
+        while time.monotonic() < deadline and (max_requests is None or done < max_requests):
+            op = self.rng.choices(self.ops, self.weights)[0]
+            if op == 'delete' and not self.created:
+                op = 'create'  # nothing of ours left to delete; time it as what it is
+            start = time.perf_counter()
+            try:
+                status, _ = self.call(op)
+            except Exception:
+                status = None
+            self.samples.setdefault(op, []).append(time.perf_counter() - start)
+            if status is None or status >= 400:
+                self.errors[op] = self.errors.get(op, 0) + 1
+            done += 1
+
+def percentile(sorted_values, q):
+    if not sorted_values: return None
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+def summarize(workers, elapsed):
+    results = {}
+    # A --mix without create still records the create fallback of delete
+    ops = tuple(dict.fromkeys(op for w in workers for op in w.samples))
+    for op in ops + ('all',):
+        samples = sorted(s for w in workers for o in ops if op in ('all', o) for s in w.samples.get(o, ()))
+        errors = sum(w.errors.get(o, 0) for w in workers for o in ops if op in ('all', o))
+        if not samples: continue
+        results[op] = {
+            'count': len(samples),
+            'errors': errors,
+            'rps': len(samples) / elapsed,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p90_ms': percentile(samples, 90) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+            'max_ms': samples[-1] * 1000,
+        }
+    return results
+
+def run_load(make_client, ids, tags, concurrency, duration, mix=DEFAULT_MIX, reorder_size=200,
+             seed_value=0, max_requests=None):
+    workers = [Worker(i, make_client(), ids, tags, mix, reorder_size, random.Random(seed_value + i + 1))
+               for i in range(concurrency)]
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=w.run, args=(deadline, max_requests)) for w in workers]
+    start = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return summarize(workers, time.perf_counter() - start)
+
+# --- Reporting ---
+def print_results(results, baseline=None, threshold=20.0):
+    """Prints one row per operation; with a baseline, flags p50/p99 slower by more than threshold %."""
+    regressions = []
+    print(f"{'operation':<12}{'count':>8}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}{'vs base':>16}")
+    for op, r in results.items():
+        delta = ''
+        base = (baseline or {}).get('results', {}).get(op)
+        if base and min(base['count'], r['count']) < MIN_SAMPLES:
+            delta = 'few samples'
+        elif base:
+            changes = []
+            for key in ('p50_ms', 'p99_ms'):
+                if base[key]:
+                    change = (r[key] - base[key]) / base[key] * 100
+                    changes.append(f"{change:+.0f}%")
+                    if change > threshold:
+                        regressions.append((op, key, change))
+            delta = '/'.join(changes)
+            if any(reg[0] == op for reg in regressions): delta += ' !'
+        print(f"{op:<12}{r['count']:>8}{r['errors']:>6}{r['rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}{delta:>16}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0f}%:")
+        for op, key, change in regressions:
+            print(f"  {op} {key}: {change:+.1f}%")
+    return regressions
+
+def parse_mix(spec):
+    # "list=20,update=5" -> weights; unspecified operations are dropped
+    mix = {}
+    for part in spec.split(','):
+        op, _, weight = part.partition('=')
+        if op not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {op!r}")
+        mix[op] = float(weight or 1)
+    return mix
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load-test the prompt_save API')
+    parser.add_argument('--prompts', type=int, default=10000, help='seeded prompts')
+    parser.add_argument('--tags', type=int, default=50, help='seeded tags')
+    parser.add_argument('--concurrency', type=int, default=8, help='worker threads')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load after seeding')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='e.g. list=20,update=5,sync=1')
+    parser.add_argument('--reorder-size', type=int, default=200, help='ids per reorder request')
+    parser.add_argument('--url', help='API base of a running server (e.g. http://127.0.0.1:5002/api)')
+    parser.add_argument('--db-dir', help='in-process mode: directory for prompts.db (default: a temp dir)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-baseline', metavar='PATH', help='write results as a baseline JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved baseline JSON')
+    parser.add_argument('--threshold', type=float, default=20.0, help='regression threshold in percent')
+    args = parser.parse_args()
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+        target = args.url
+    else:
+        # server.py opens prompts.db in the working directory at import
+        db_dir = args.db_dir or tempfile.mkdtemp(prefix='prompt_save_lt_')
+        os.makedirs(db_dir, exist_ok=True)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        os.chdir(db_dir)
+        from server import app
+        make_client = lambda: InProcessClient(app)
+        target = os.path.join(db_dir, 'prompts.db')
+
+    t0 = time.perf_counter()
+    ids, tags = seed(make_client(), args.prompts, args.tags, args.seed)
+    print(f"Seeded {len(ids)} prompts / {len(tags)} tags into {target} in {time.perf_counter() - t0:.1f}s")
+    print(f"Running {args.concurrency} workers for {args.duration:.0f}s\n")
+
+    results = run_load(make_client, ids, tags, args.concurrency, args.duration, args.mix,
+                       args.reorder_size, args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = print_results(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        meta = {k: getattr(args, k) for k in ('prompts', 'tags', 'concurrency', 'duration', 'reorder_size', 'url')}
+        meta['mix'] = args.mix
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"\nBaseline saved: {args.save_baseline}")
+    sys.exit(1 if regressions else 0)
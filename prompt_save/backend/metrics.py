@@ -0,0 +1,154 @@
+import time
+import logging
+import threading
+
+import db
+
+# --- Request and SQL metrics ---
+# Per route (the Flask URL rule, e.g. /api/prompts/<id>):
+#   prompt_save_requests_total{method,route,status}
+#   prompt_save_request_duration_seconds   histogram {method,route}
+#   prompt_save_request_bytes / response_bytes   histograms {route}
+#   prompt_save_sql_statements_total{route}     statements the server issues (an executemany
+#                                               counts once); with trace_sql, every statement
+#                                               SQLite runs, trigger bodies included
+#   prompt_save_sql_duration_seconds    histogram {route}, execute + fetching its rows
+# Served in Prometheus text format by GET /api/metrics. Statements slower than
+# slow_query_ms are logged to the "prompt_save.slow_query" logger.
+# trace_sql installs the sqlite3 trace callback. It is off by default: Python expands the
+# bound parameters of the outer statement for every trigger statement too, which made a
+# 20k-prompt /api/sync several times slower.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+SLOW_QUERY_SQL_CHARS = 300
+
+slow_log = logging.getLogger('prompt_save.slow_query')
+
+def _label_str(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return ','.join(pairs)
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{{{_label_str(self.labels, label_values)}}} {value}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self.series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                labels = _label_str(self.labels, label_values)
+                sep = ',' if labels else ''
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_sum{{{labels}}} {series[-1]:.6f}')
+                lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+class Metrics:
+    def __init__(self, slow_query_ms=None, trace_sql=False):
+        self.slow_query_ms = slow_query_ms
+        self.trace_sql = trace_sql
+        self.requests = Counter('prompt_save_requests_total', 'HTTP requests', ('method', 'route', 'status'))
+        self.latency = Histogram('prompt_save_request_duration_seconds', 'Request handling time',
+                                 ('method', 'route'), LATENCY_BUCKETS)
+        self.request_bytes = Histogram('prompt_save_request_bytes', 'Request body size', ('route',), SIZE_BUCKETS)
+        self.response_bytes = Histogram('prompt_save_response_bytes', 'Response body size', ('route',), SIZE_BUCKETS)
+        self.sql_statements = Counter('prompt_save_sql_statements_total',
+                                      'SQL statements executed', ('route',))
+        self.sql_duration = Histogram('prompt_save_sql_duration_seconds', 'Statement time including row fetches',
+                                      ('route',), LATENCY_BUCKETS)
+        self.collectors = [self.requests, self.latency, self.request_bytes, self.response_bytes,
+                           self.sql_statements, self.sql_duration]
+        self._local = threading.local()
+
+    def current_route(self):
+        return getattr(self._local, 'route', None) or '-'
+
+    # db.py hooks; both run on the thread that executes the statement
+    def on_statement(self, sql):
+        self.sql_statements.inc((self.current_route(),))
+
+    def on_statement_timed(self, sql, seconds):
+        route = self.current_route()
+        if not self.trace_sql:
+            self.sql_statements.inc((route,))
+        self.sql_duration.observe((route,), seconds)
+        if self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms:
+            slow_log.warning("%.1f ms %s: %s", seconds * 1000, route, ' '.join(sql.split())[:SLOW_QUERY_SQL_CHARS])
+
+    def install(self, app):
+        from flask import request
+
+        @app.before_request
+        def start_timer():
+            rule = request.url_rule
+            self._local.route = rule.rule if rule is not None else 'unmatched'
+            self._local.start = time.perf_counter()
+
+        @app.after_request
+        def record(response):
+            start = getattr(self._local, 'start', None)
+            if start is None:
+                return response
+            route = self._local.route
+            self.requests.inc((request.method, route, str(response.status_code)))
+            self.latency.observe((request.method, route), time.perf_counter() - start)
+            if request.content_length:
+                self.request_bytes.observe((route,), request.content_length)
+            # Streamed bodies have no length up front and are not counted
+            if response.content_length is not None:
+                self.response_bytes.observe((route,), response.content_length)
+            self._local.start = None
+            return response
+
+        @app.teardown_request
+        def clear_route(exc):
+            self._local.route = None
+
+        if self.trace_sql:
+            db.trace_callback = self.on_statement
+        db.statement_timer = self.on_statement_timed
+
+    def render(self):
+        lines = []
+        for collector in self.collectors:
+            lines.extend(collector.render())
+        return '\n'.join(lines) + '\n'
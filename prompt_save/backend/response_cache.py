@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+# --- Serialized response cache ---
+# Bodies of cacheable GET responses keyed by path + query string, LRU-evicted by entry
+# count and total bytes. Every entry is tagged with the library version it was built at
+# (MAX(change_log.seq), read before the view ran) and is only served to a request that
+# reads the same version, so writes from any process or tool invalidate it without
+# telling us. Entries from an older version can never match again and are dropped as
+# soon as a response for a newer one is stored. Per process; serve.py runs one.
+
+MAX_ENTRIES = 128
+MAX_BYTES = 32 * 1024 * 1024
+
+class ResponseCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (version, body, headers)
+        self.bytes = 0
+        self.version = None  # newest library version stored so far
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        """(body, headers) cached for key at this library version, else None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def put(self, key, version, body, headers):
+        size = len(body)
+        if size > self.max_bytes // 4:
+            return  # one huge listing shouldn't flush everything else
+        with self.lock:
+            if self.version is not None and version < self.version:
+                return  # built from a snapshot older than what is already cached
+            if version != self.version:
+                self._clear()
+                self.version = version
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[1])
+            self.entries[key] = (version, body, headers)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted, _) = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def _clear(self):
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.bytes = 0
+
+    def invalidate(self):
+        # Versions restart in a different database file (restored backup, tests)
+        with self.lock:
+            self._clear()
+            self.version = None
+
+    def render(self):
+        # Prometheus lines; registered as a collector of the /api/metrics registry
+        with self.lock:
+            counters = [('hits', self.hits), ('misses', self.misses), ('evictions', self.evictions),
+                        ('invalidations', self.invalidations)]
+            gauges = [('entries', len(self.entries)), ('bytes', self.bytes)]
+        lines = []
+        for name, value in counters:
+            lines += [f'# TYPE prompt_save_response_cache_{name}_total counter',
+                      f'prompt_save_response_cache_{name}_total {value}']
+        for name, value in gauges:
+            lines += [f'# TYPE prompt_save_response_cache_{name} gauge',
+                      f'prompt_save_response_cache_{name} {value}']
+        return lines
@@ -0,0 +1,91 @@
+import os
+import time
+import signal
+import logging
+import argparse
+
+from waitress.server import create_server
+
+import db
+
+# --- Production server ---
+# Multi-threaded WSGI serving of server.app with waitress instead of Flask's debug server.
+#   python serve.py                                  # 127.0.0.1:5002, 16 threads, 8 DB connections
+#   python serve.py --threads 32 --db-pool 12
+#   PROMPT_SAVE_PORT=8080 python serve.py
+#
+# Concurrency is bounded in two places: --threads request handlers, and --db-pool SQLite
+# connections shared by them (WAL mode, so readers never wait for the writer). A handler
+# that cannot get a connection within db.POOL_TIMEOUT gets a 503 with Retry-After.
+# SIGTERM/SIGINT stop accepting connections, let in-flight requests finish (up to
+# --shutdown-timeout seconds), then close the pool.
+
+def env(name, default, cast=str):
+    return cast(os.environ.get(f'PROMPT_SAVE_{name}', default))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve the prompt_save backend')
+    parser.add_argument('--host', default=env('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=env('PORT', 5002, int))
+    parser.add_argument('--threads', type=int, default=env('THREADS', 16, int),
+                        help='request handler threads')
+    parser.add_argument('--db-pool', type=int, default=env('DB_POOL', db.POOL_SIZE, int),
+                        help='pooled SQLite connections shared by the handlers')
+    parser.add_argument('--connection-limit', type=int, default=env('CONNECTION_LIMIT', 100, int),
+                        help='open client connections before new ones are refused')
+    parser.add_argument('--slow-query-ms', type=float, default=os.environ.get('PROMPT_SAVE_SLOW_QUERY_MS'),
+                        help='log SQL statements slower than this')
+    parser.add_argument('--sql-trace', action='store_true', default=env('SQL_TRACE', '') == '1',
+                        help='count every SQL statement, trigger bodies included (slows bulk writes)')
+    parser.add_argument('--shutdown-timeout', type=float, default=env('SHUTDOWN_TIMEOUT', 10, float),
+                        help='seconds to wait for in-flight requests on shutdown')
+    return parser.parse_args()
+
+def busy_channels(server):
+    return [c for c in list(server.active_channels.values()) if c.requests or c.total_outbufs_len]
+
+def serve(app, host, port, threads, connection_limit, shutdown_timeout):
+    server = create_server(app, host=host, port=port, threads=threads, connection_limit=connection_limit)
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Serving on http://{server.effective_host}:{server.effective_port} "
+          f"({threads} threads, {db.POOL_SIZE} DB connections)")
+    # waitress' own run() cancels queued requests on Ctrl-C; drive its loop ourselves instead.
+    # This uses waitress internals (_map, active_channels, task_dispatcher), hence the exact
+    # version pin in requirements.txt
+    while not stopping:
+        server.asyncore.loop(timeout=server.adj.asyncore_loop_timeout, map=server._map, count=1)
+
+    print("Shutting down: draining in-flight requests...")
+    # Only the listening socket: server.close() would also close the trigger pipe, which
+    # handler threads still pull to hand their finished responses to the loop
+    server.del_channel()
+    server.socket.close()
+    deadline = time.monotonic() + shutdown_timeout
+    while busy_channels(server) and time.monotonic() < deadline:
+        server.asyncore.loop(timeout=0.1, map=server._map, count=1)
+    left = len(busy_channels(server))
+    if left:
+        print(f"Shutdown timeout: abandoning {left} request(s)")
+    server.task_dispatcher.shutdown(cancel_pending=True, timeout=shutdown_timeout)
+    server.close()  # no handler thread is left to pull the trigger
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    db.POOL_SIZE = args.db_pool  # must be set before the first request creates the pool
+    if args.slow_query_ms is not None:
+        os.environ['PROMPT_SAVE_SLOW_QUERY_MS'] = str(args.slow_query_ms)  # read by server at import
+    if args.sql_trace:
+        os.environ['PROMPT_SAVE_SQL_TRACE'] = '1'
+    from server import app, start_index_worker, stop_index_worker
+    indexer = start_index_worker()
+    serve(app, args.host, args.port, args.threads, args.connection_limit, args.shutdown_timeout)
+    stop_index_worker(indexer, args.shutdown_timeout)  # a batch in progress commits or rolls back
+    db.close_pools()
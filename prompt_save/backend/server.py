@@ -1,67 +1,463 @@
 from flask import Flask, request, jsonify
-from db import init_db, get_db_connection
+from db import (migrate, get_db_connection, PoolExhausted, store_bodies, load_bodies, body_of, index_pending,
+                fts_query, INDEX_BATCH_SIZE)
+from metrics import Metrics
+from response_cache import ResponseCache
+import functools
+import logging
+import threading
 import sqlite3
+import base64
+import html
+import zlib
+import re
+import time
 import json
 import os
 
 app = Flask(__name__)
 
-# Initialize database
-if not os.path.exists('prompts.db'):
-    init_db()
-else:
-    # Migration check: Ensure order_index exists
-    try:
-        conn = sqlite3.connect('prompts.db')
-        conn.execute('ALTER TABLE prompts ADD COLUMN order_index INTEGER DEFAULT 0')
-        conn.commit()
-        conn.close()
-        print("Migrated: Added order_index column to prompts")
-    except sqlite3.OperationalError:
-        # Column likely already exists
-        pass
+# Initialize / migrate database (a single PRAGMA read when already up to date)
+migrate()
 
-    # Migration check: Ensure order_index exists in tags
-    try:
-        conn = sqlite3.connect('prompts.db')
-        conn.execute('ALTER TABLE tags ADD COLUMN order_index INTEGER DEFAULT 0')
-        conn.commit()
-        conn.close()
-        print("Migrated: Added order_index column to tags")
-    except sqlite3.OperationalError:
-        pass
+# Request/SQL metrics at /api/metrics; PROMPT_SAVE_SLOW_QUERY_MS=50 logs statements slower than 50 ms,
+# PROMPT_SAVE_SQL_TRACE=1 also counts trigger statements (slow on bulk writes)
+slow_query_ms = os.environ.get('PROMPT_SAVE_SLOW_QUERY_MS')
+metrics = Metrics(slow_query_ms=float(slow_query_ms) if slow_query_ms else None,
+                  trace_sql=os.environ.get('PROMPT_SAVE_SQL_TRACE') == '1')
+metrics.install(app)
+
+# Serialized GET /api/prompts and /api/tags responses, valid for one library version (see cached_response)
+response_cache = ResponseCache()
+metrics.collectors.append(response_cache)
 
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,If-None-Match'
     response.headers['Access-Control-Allow-Methods'] = 'GET,PUT,POST,DELETE,OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag,X-Next-Cursor'
     return response
 
 @app.after_request
 def after_request(response):
     return add_cors_headers(response)
 
+@app.errorhandler(PoolExhausted)
+def pool_exhausted(e):
+    # Every DB connection stayed busy for POOL_TIMEOUT: shed load instead of piling up threads
+    response = jsonify({'error': 'Server busy, retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# API field -> column
+PROMPT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'content': 'content',
+    'tags': 'tags',
+    'createdAt': 'created_at',
+    'updatedAt': 'updated_at',
+    'orderIndex': 'order_index',
+    'contentHash': 'content_hash',  # sha256 of the body, see /api/blobs
+}
+DEFAULT_PROMPT_FIELDS = [f for f in PROMPT_FIELDS if f != 'contentHash']
+
+def prompt_to_dict(p, fields=None):
+    fields = fields or DEFAULT_PROMPT_FIELDS
+    result = {}
+    for field in fields:
+        value = p[PROMPT_FIELDS[field]]
+        if field == 'content':
+            value = body_of(p)
+        elif field == 'tags':
+            value = json.loads(value) if value else []
+        elif field == 'orderIndex':
+            # Handle cases where order_index might be None (though we set default 0)
+            value = value if value is not None else 0
+        result[field] = value
+    return result
+
+# --- Conditional GET ---
+# Every write bumps change_log.seq (AUTOINCREMENT, never reused), so MAX(seq) is a
+# version counter for the whole library. ETags combine it with the query string;
+# a matching If-None-Match gets a 304 without reading any rows.
+def library_version(conn):
+    return conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+
+def make_etag(kind, version):
+    query = request.query_string or b''
+    return f'{kind}-{version}-{zlib.crc32(query):08x}'
+
+def not_modified(etag):
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate on every use
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Cache-Control', 'X-Next-Cursor')
+
+def cached_response(view):
+    """Serves repeated GETs from response_cache: one MAX(seq) lookup, no row reads, no JSON encoding."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.full_path
+        # Read before the view runs, so the stored body is never older than its version
+        conn = get_db_connection()
+        try:
+            version = library_version(conn)
+        finally:
+            conn.close()
+        entry = response_cache.get(key, version)
+        if entry is not None:
+            body, headers = entry
+            etag = headers.get('ETag', '').strip('"')
+            if etag and etag in request.if_none_match:
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+            return app.response_class(body, headers=headers)
+
+        # Views may return (body, status) for errors
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            headers = {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+            response_cache.put(key, version, response.get_data(), headers)
+        return response
+    return wrapper
+
+# --- Keyset pagination over (order_index ASC, updated_at DESC, id ASC) ---
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(p):
+    raw = json.dumps([p['order_index'], p['updated_at'], p['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
+def page_limit(default=None, maximum=MAX_PAGE_SIZE):
+    """?limit= as an int, values above maximum clamped. ValueError unless it is >= 1."""
+    raw = request.args.get('limit')
+    if raw is None:
+        return default
+    limit = int(raw)
+    if limit < 1:
+        raise ValueError(raw)
+    return min(limit, maximum)
+
 @app.route('/api/prompts', methods=['GET'])
+@cached_response
 def get_prompts():
+    # Optional: ?fields=id,title,tags  ?tag=name  ?limit=N  ?cursor=<X-Next-Cursor of the previous page>
+    fields = list(DEFAULT_PROMPT_FIELDS)
+    if request.args.get('fields'):
+        fields = [f for f in request.args['fields'].split(',') if f in PROMPT_FIELDS] or ['id']
+    try:
+        limit = page_limit()
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    cursor = request.args.get('cursor')
+    
+    # Cursor needs the sort key columns even if the client didn't ask for them
+    columns = {PROMPT_FIELDS[f] for f in fields}
+    if 'content' in columns:
+        columns |= {'body_codec', 'body_data'}  # see db.body_of
+    if limit:
+        columns |= {'id', 'order_index', 'updated_at'}
+    
+    conditions, params = [], []
+    for tag in request.args.getlist('tag'):
+        # Repeated ?tag= means the prompt must carry all of them
+        conditions.append('id IN (SELECT prompt_id FROM prompt_tags WHERE tag = ?)')
+        params.append(tag)
+    if cursor:
+        try:
+            order_idx, updated_at, last_id = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        conditions.append('(order_index > ? OR (order_index = ? AND (updated_at < ? OR (updated_at = ? AND id > ?))))')
+        params += [order_idx, order_idx, updated_at, updated_at, last_id]
+    where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+    
+    sql = f'SELECT {", ".join(sorted(columns))} FROM prompt_rows {where} ORDER BY order_index ASC, updated_at DESC, id ASC'
+    if limit:
+        sql += ' LIMIT ?'
+        params.append(limit + 1)
+    
     conn = get_db_connection()
-    prompts = conn.execute('SELECT * FROM prompts ORDER BY order_index ASC, updated_at DESC').fetchall()
-    conn.close()
+    try:
+        etag = make_etag('prompts', library_version(conn))
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        prompts = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
     
-    result = []
-    for p in prompts:
-        # Handle cases where order_index might be None (though we set default 0)
-        order_idx = p['order_index'] if 'order_index' in p.keys() and p['order_index'] is not None else 0
-        
-        result.append({
-            'id': p['id'],
-            'title': p['title'],
-            'content': p['content'],
-            'tags': json.loads(p['tags']) if p['tags'] else [],
-            'createdAt': p['created_at'],
-            'updatedAt': p['updated_at'],
-            'orderIndex': order_idx
-        })
-    return jsonify(result)
+    next_cursor = None
+    if limit and len(prompts) > limit:
+        prompts = prompts[:limit]
+        next_cursor = encode_cursor(prompts[-1])
+    
+    result = [prompt_to_dict(p, fields) for p in prompts]
+    response = with_etag(jsonify(result), etag)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+# --- Full-text search (prompts_fts, see db.init_search_tables) ---
+# GET /api/prompts/search?q=words&limit=20&offset=0
+# Every whitespace-separated term must match: Latin words by prefix, Chinese/Japanese/
+# Korean by substring (see db.fts_query), case-insensitive. Results are ranked by bm25
+# with title hits weighted up, and carry a highlighted snippet instead of the full
+# content. The index is contentless, so highlights and snippets are cut from the page's
+# bodies in Python.
+SEARCH_PAGE_SIZE = 20
+SNIPPET_CHARS = 96
+TITLE_WEIGHT, CONTENT_WEIGHT = 10.0, 1.0
+HIT_OPEN, HIT_CLOSE = '\x02', '\x03'
+
+def render_highlight(text):
+    # Escape first, then turn the sentinels into <mark>, so the result is safe as HTML
+    return html.escape(text or '').replace(HIT_OPEN, '<mark>').replace(HIT_CLOSE, '</mark>')
+
+def mark_terms(text, pattern):
+    return pattern.sub(lambda m: HIT_OPEN + m.group(0) + HIT_CLOSE, text or '')
+
+def make_snippet(text, pattern, width=SNIPPET_CHARS):
+    # About width characters starting a little before the first hit
+    text = text or ''
+    hit = pattern.search(text)
+    start = max(0, hit.start() - width // 4) if hit else 0
+    end = start + width
+    return ('…' if start else '') + mark_terms(text[start:end], pattern) + ('…' if end < len(text) else '')
+
+def index_queued(conn, limit=None):
+    # Rows left queued by a bulk write or written by other tools; returns how many were indexed
+    if not conn.execute('SELECT 1 FROM prompts_fts_queue LIMIT 1').fetchone():
+        return 0
+    conn.execute('BEGIN IMMEDIATE')
+    done = index_pending(conn, limit=limit)
+    conn.commit()
+    return done
+
+# Indexing a bulk write in the request was most of a big /api/sync, so /api/sync and
+# /api/import leave their rows in prompts_fts_queue and set index_wakeup. index_worker()
+# (run in a thread by serve.py and the dev server) then indexes the queue INDEX_BATCH_SIZE
+# rows per transaction, so other writers only wait for one batch. A search indexes
+# whatever is still queued before it queries: results never miss a write, the first
+# search right after a big sync just waits for the rest.
+index_wakeup = threading.Event()
+index_stop = threading.Event()
+index_log = logging.getLogger('prompt_save.indexer')
+
+def index_worker():
+    while not index_stop.is_set():
+        if not index_wakeup.wait(timeout=1.0):
+            continue
+        index_wakeup.clear()
+        while not index_stop.is_set():
+            try:
+                conn = get_db_connection()
+            except PoolExhausted:
+                index_stop.wait(1.0)  # requests come first; try again shortly
+                continue
+            try:
+                if not index_queued(conn, INDEX_BATCH_SIZE):
+                    break
+            except sqlite3.Error:
+                index_log.exception('Indexing queued prompts failed')
+                index_stop.wait(5.0)
+            finally:
+                conn.close()
+
+def start_index_worker():
+    index_stop.clear()
+    thread = threading.Thread(target=index_worker, name='search-indexer', daemon=True)
+    thread.start()
+    index_wakeup.set()  # rows may still be queued from before a restart
+    return thread
+
+def stop_index_worker(thread, timeout=None):
+    index_stop.set()
+    thread.join(timeout)
+
+@app.route('/api/prompts/search', methods=['GET'])
+def search_prompts():
+    terms = request.args.get('q', '').split()
+    if not terms:
+        return jsonify({'error': 'Missing q'}), 400
+    try:
+        limit = page_limit(SEARCH_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    match = fts_query(terms)
+    if match is None:
+        return jsonify({'results': [], 'nextOffset': None})
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(set(terms), key=len, reverse=True)), re.IGNORECASE)
+    
+    conn = get_db_connection()
+    try:
+        index_queued(conn)
+        rows = conn.execute(f'''
+            SELECT r.*, m.score FROM (
+                SELECT rowid AS rid, bm25(prompts_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score
+                FROM prompts_fts WHERE prompts_fts MATCH ?
+            ) m JOIN prompt_rows r ON r.rid = m.rid
+            ORDER BY m.score ASC, r.order_index ASC
+            LIMIT ? OFFSET ?
+        ''', (match, limit + 1, offset)).fetchall()
+    except sqlite3.OperationalError as e:
+        return jsonify({'error': f'Bad query: {e}'}), 400
+    finally:
+        conn.close()
+    
+    hits = [(r, body_of(r)) for r in rows]
+    has_more = len(hits) > limit
+    results = []
+    for r, body in hits[:limit]:
+        item = prompt_to_dict(r, ['id', 'tags', 'createdAt', 'updatedAt', 'orderIndex'])
+        item['title'] = render_highlight(mark_terms(r['title'], pattern))
+        item['snippet'] = render_highlight(make_snippet(body, pattern))
+        item['score'] = -r['score']  # bm25 is lower-is-better; flip so higher = more relevant
+        results.append(item)
+    return jsonify({'results': results, 'nextOffset': offset + limit if has_more else None})
+
+# --- Prompt bodies by hash ---
+# List with ?fields=id,title,tags,...,contentHash to skip bodies, then fetch only the
+# hashes the client has not cached. A hash names immutable content, so GET responses can
+# be cached forever and revalidated by ETag.
+MAX_BLOBS_PER_REQUEST = 1000
+
+@app.route('/api/blobs/<hash>', methods=['GET'])
+def get_blob(hash):
+    etag = hash
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    conn = get_db_connection()
+    try:
+        body = load_bodies(conn, [hash]).get(hash)
+    finally:
+        conn.close()
+    if body is None:
+        return jsonify({'error': 'Not found'}), 404
+    response = app.response_class(body, mimetype='text/plain')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.route('/api/blobs', methods=['POST'])
+def get_blobs():
+    # Body: {"hashes": [...]} -> {"blobs": {hash: content}}; unknown hashes are left out
+    hashes = list(dict.fromkeys((request.json or {}).get('hashes', [])))[:MAX_BLOBS_PER_REQUEST]
+    conn = get_db_connection()
+    try:
+        blobs = load_bodies(conn, hashes)
+    finally:
+        conn.close()
+    return jsonify({'blobs': blobs})
+
+# Ordering keys are sparse: a full reorder spaces rows ORDER_STEP apart, and moving one
+# item takes the midpoint of its new neighbours' keys, so a drag rewrites a single row.
+# When two neighbours get closer than MIN_ORDER_GAP the list is renumbered once.
+ORDER_STEP = 1024
+MIN_ORDER_GAP = 1e-6
+
+# table -> (key column, ORDER BY used for display)
+ORDERED_TABLES = {
+    'prompts': ('id', 'order_index ASC, updated_at DESC'),
+    'tags': ('name', 'order_index ASC, name ASC'),
+}
+
+def bulk_reorder(conn, table, ordered_keys):
+    key_col, _ = ORDERED_TABLES[table]
+    conn.executemany(
+        f'UPDATE {table} SET order_index = ? WHERE {key_col} = ?',
+        [(idx * ORDER_STEP, key) for idx, key in enumerate(ordered_keys)]
+    )
+
+def _order_of(conn, table, key):
+    if key is None:
+        return None
+    key_col, _ = ORDERED_TABLES[table]
+    row = conn.execute(f'SELECT order_index FROM {table} WHERE {key_col} = ?', (key,)).fetchone()
+    return (row[0] or 0) if row else None
+
+def _key_between(prev_order, next_order):
+    if prev_order is None and next_order is None:
+        return 0
+    if prev_order is None:
+        return next_order - ORDER_STEP
+    if next_order is None:
+        return prev_order + ORDER_STEP
+    if next_order - prev_order < MIN_ORDER_GAP:
+        return None
+    return (prev_order + next_order) / 2
+
+class NeighbourNotFound(LookupError):
+    pass
+
+def _gap_around(conn, table, key, prev_key, next_key):
+    """
+    Order keys of the two rows the item goes between. The client's view may be stale, so
+    only one neighbour is taken from the request (prev_key if given, else next_key) and
+    the other is the row actually adjacent to it, never the item being moved.
+    """
+    key_col, _ = ORDERED_TABLES[table]
+    prev_order, next_order = _order_of(conn, table, prev_key), _order_of(conn, table, next_key)
+    for neighbour, order in ((prev_key, prev_order), (next_key, next_order)):
+        if neighbour is not None and order is None:
+            raise NeighbourNotFound(neighbour)
+    # A row tied with the anchor makes the gap 0, which triggers the renumbering below
+    if prev_key is not None:
+        next_order = conn.execute(
+            f'SELECT MIN(order_index) FROM {table} WHERE order_index >= ? AND {key_col} NOT IN (?, ?)',
+            (prev_order, prev_key, key)
+        ).fetchone()[0]
+    elif next_key is not None:
+        prev_order = conn.execute(
+            f'SELECT MAX(order_index) FROM {table} WHERE order_index <= ? AND {key_col} NOT IN (?, ?)',
+            (next_order, next_key, key)
+        ).fetchone()[0]
+    return prev_order, next_order
+
+def move_item(conn, table, key, prev_key=None, next_key=None):
+    """
+    Places key after prev_key (or before next_key when prev_key is None; both None puts
+    it at 0). Returns (new order_index, whether the table was renumbered).
+    Raises NeighbourNotFound for an unknown prev_key / next_key.
+    """
+    key_col, order_by = ORDERED_TABLES[table]
+    new_order = _key_between(*_gap_around(conn, table, key, prev_key, next_key))
+    renumbered = new_order is None
+    if renumbered:
+        # Keys exhausted (or legacy rows sharing order_index 0): renumber in display order, then retry
+        rows = conn.execute(f'SELECT {key_col} FROM {table} ORDER BY {order_by}').fetchall()
+        bulk_reorder(conn, table, [r[0] for r in rows])
+        new_order = _key_between(*_gap_around(conn, table, key, prev_key, next_key))
+        if new_order is None:
+            # Only if the neighbours still tie after renumbering; never write a NULL key
+            if prev_key is not None:
+                new_order = _order_of(conn, table, prev_key)
+            else:
+                new_order = _order_of(conn, table, next_key) - ORDER_STEP
+    conn.execute(f'UPDATE {table} SET order_index = ? WHERE {key_col} = ?', (new_order, key))
+    return new_order, renumbered
 
 @app.route('/api/prompts/reorder', methods=['POST'])
 def reorder_prompts():
@@ -70,12 +466,35 @@ def reorder_prompts():
     ordered_ids = data.get('orderedIds', [])
     
     conn = get_db_connection()
-    for idx, prompt_id in enumerate(ordered_ids):
-        conn.execute('UPDATE prompts SET order_index = ? WHERE id = ?', (idx, prompt_id))
+    bulk_reorder(conn, 'prompts', ordered_ids)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Reordered successfully'})
 
+@app.route('/api/prompts/move', methods=['POST'])
+def move_prompt():
+    data = request.json
+    # Expects { "id": "...", "prevId": "..." | null, "nextId": "..." | null }
+    if not data or not data.get('id'):
+        return jsonify({'error': 'Prompt id required'}), 400
+    
+    if data['id'] in (data.get('prevId'), data.get('nextId')):
+        return jsonify({'error': 'Cannot move a prompt next to itself'}), 400
+    
+    conn = get_db_connection()
+    try:
+        if _order_of(conn, 'prompts', data['id']) is None:
+            return jsonify({'error': 'Prompt not found'}), 404
+        try:
+            new_order, renumbered = move_item(conn, 'prompts', data['id'], data.get('prevId'), data.get('nextId'))
+        except NeighbourNotFound as e:
+            return jsonify({'error': f'Neighbour prompt not found: {e.args[0]}'}), 404
+        conn.commit()
+        # renumbered: every other orderIndex changed too, clients should reload the list
+        return jsonify({'id': data['id'], 'orderIndex': new_order, 'renumbered': renumbered})
+    finally:
+        conn.close()
+
 @app.route('/api/prompts', methods=['POST'])
 def create_prompt():
     data = request.json
@@ -85,16 +504,18 @@ def create_prompt():
     conn = get_db_connection()
     try:
         # Get current min order_index to put new prompt at top (or calculate as needed)
-        # If we sort ASC, smaller index is top. So we can use min(order_index) - 1
+        # If we sort ASC, smaller index is top. So we can use min(order_index) - ORDER_STEP
         min_order = conn.execute('SELECT MIN(order_index) FROM prompts').fetchone()[0]
         if min_order is None:
             min_order = 0
-        new_order = min_order - 1
+        new_order = min_order - ORDER_STEP
         
+        content_hash, = store_bodies(conn, [data['content']])
         conn.execute(
-            'INSERT INTO prompts (id, title, content, tags, created_at, updated_at, order_index) VALUES (?, ?, ?, ?, ?, ?, ?)',
-            (data['id'], data['title'], data['content'], json.dumps(data.get('tags', [])), data['createdAt'], data['updatedAt'], new_order)
+            "INSERT INTO prompts (id, title, content, content_hash, tags, created_at, updated_at, order_index) VALUES (?, ?, '', ?, ?, ?, ?, ?)",
+            (data['id'], data['title'], content_hash, json.dumps(data.get('tags', [])), data['createdAt'], data['updatedAt'], new_order)
         )
+        index_pending(conn, {content_hash: data['content']})
         conn.commit()
         
         # Return the data with the new orderIndex
@@ -109,10 +530,12 @@ def create_prompt():
 def update_prompt(id):
     data = request.json
     conn = get_db_connection()
+    content_hash, = store_bodies(conn, [data['content']])
     conn.execute(
-        'UPDATE prompts SET title = ?, content = ?, tags = ?, updated_at = ? WHERE id = ?',
-        (data['title'], data['content'], json.dumps(data.get('tags', [])), data['updatedAt'], id)
+        "UPDATE prompts SET title = ?, content = '', content_hash = ?, tags = ?, updated_at = ? WHERE id = ?",
+        (data['title'], content_hash, json.dumps(data.get('tags', [])), data['updatedAt'], id)
     )
+    index_pending(conn, {content_hash: data['content']})
     conn.commit()
     conn.close()
     return jsonify(data)
@@ -121,16 +544,24 @@ def update_prompt(id):
 def delete_prompt(id):
     conn = get_db_connection()
     conn.execute('DELETE FROM prompts WHERE id = ?', (id,))
+    index_pending(conn)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Deleted successfully'})
 
 @app.route('/api/tags', methods=['GET'])
+@cached_response
 def get_tags():
     conn = get_db_connection()
-    tags = conn.execute('SELECT name FROM tags ORDER BY order_index ASC, name ASC').fetchall()
-    conn.close()
-    return jsonify([t['name'] for t in tags])
+    try:
+        etag = make_etag('tags', library_version(conn))
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        tags = conn.execute('SELECT name FROM tags ORDER BY order_index ASC, name ASC').fetchall()
+    finally:
+        conn.close()
+    return with_etag(jsonify([t['name'] for t in tags]), etag)
 
 @app.route('/api/tags/reorder', methods=['POST'])
 def reorder_tags():
@@ -138,12 +569,34 @@ def reorder_tags():
     ordered_tags = data.get('orderedTags', [])
     
     conn = get_db_connection()
-    for idx, tag_name in enumerate(ordered_tags):
-        conn.execute('UPDATE tags SET order_index = ? WHERE name = ?', (idx, tag_name))
+    bulk_reorder(conn, 'tags', ordered_tags)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Reordered successfully'})
 
+@app.route('/api/tags/move', methods=['POST'])
+def move_tag():
+    data = request.json
+    # Expects { "name": "...", "prevName": "..." | null, "nextName": "..." | null }
+    if not data or not data.get('name'):
+        return jsonify({'error': 'Tag name required'}), 400
+    
+    if data['name'] in (data.get('prevName'), data.get('nextName')):
+        return jsonify({'error': 'Cannot move a tag next to itself'}), 400
+    
+    conn = get_db_connection()
+    try:
+        if _order_of(conn, 'tags', data['name']) is None:
+            return jsonify({'error': 'Tag not found'}), 404
+        try:
+            new_order, renumbered = move_item(conn, 'tags', data['name'], data.get('prevName'), data.get('nextName'))
+        except NeighbourNotFound as e:
+            return jsonify({'error': f'Neighbour tag not found: {e.args[0]}'}), 404
+        conn.commit()
+        return jsonify({'name': data['name'], 'orderIndex': new_order, 'renumbered': renumbered})
+    finally:
+        conn.close()
+
 @app.route('/api/tags', methods=['POST'])
 def add_tag():
     data = request.json
@@ -155,7 +608,7 @@ def add_tag():
     try:
         # Get current max order_index to append to end
         max_order = conn.execute('SELECT MAX(order_index) FROM tags').fetchone()[0]
-        new_order = (max_order if max_order is not None else -1) + 1
+        new_order = (max_order if max_order is not None else -ORDER_STEP) + ORDER_STEP
         
         conn.execute('INSERT OR IGNORE INTO tags (name, order_index) VALUES (?, ?)', (tag_name, new_order))
         conn.commit()
@@ -163,21 +616,138 @@ def add_tag():
     finally:
         conn.close()
 
+# Tag-wide prompt rewrites. Affected prompts are found through idx_prompt_tags_tag and
+# their JSON list is rebuilt from prompt_tags in list order; the prompts update trigger
+# then refreshes prompt_tags. updated_at is bumped so delta sync and /api/sync conflict
+# checks see the change.
+REMOVE_TAG_SQL = '''
+    UPDATE prompts SET
+        tags = (SELECT json_group_array(tag) FROM
+                    (SELECT tag FROM prompt_tags WHERE prompt_id = prompts.id AND tag != :old ORDER BY position)),
+        updated_at = :now
+    WHERE id IN (SELECT prompt_id FROM prompt_tags WHERE tag = :old)
+'''
+
+RENAME_TAG_SQL = '''
+    UPDATE prompts SET
+        tags = (SELECT json_group_array(tag) FROM
+                    (SELECT CASE WHEN tag = :old THEN :new ELSE tag END AS tag FROM prompt_tags
+                     WHERE prompt_id = prompts.id GROUP BY 1 ORDER BY MIN(position))),
+        updated_at = :now
+    WHERE id IN (SELECT prompt_id FROM prompt_tags WHERE tag = :old)
+'''
+
+def now_ms():
+    return int(time.time() * 1000)
+
 @app.route('/api/tags/<name>', methods=['DELETE'])
 def delete_tag(name):
     conn = get_db_connection()
-    conn.execute('DELETE FROM tags WHERE name = ?', (name,))
-    # Also update prompts to remove this tag? 
-    # Usually handled by client or separate logic, but let's keep it simple for now.
-    # The client logic in popup.js already handles removing tags from prompts locally.
-    # We should update prompts in DB too if we want full consistency, 
-    # but strictly speaking the prompt JSON blob needs to be updated.
-    # For now, let the client handle prompt updates.
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'Tag deleted'})
+    try:
+        conn.execute('DELETE FROM tags WHERE name = ?', (name,))
+        cur = conn.execute(REMOVE_TAG_SQL, {'old': name, 'now': now_ms()})
+        conn.commit()
+        return jsonify({'message': 'Tag deleted', 'updatedPrompts': cur.rowcount})
+    finally:
+        conn.close()
+
+@app.route('/api/tags/<name>', methods=['PUT'])
+def rename_tag(name):
+    # Body: {"newName": "..."}; renaming onto an existing tag merges the two
+    new_name = (request.json or {}).get('newName', '').strip()
+    if not new_name:
+        return jsonify({'error': 'Missing newName'}), 400
+    if new_name == name:
+        return jsonify({'name': name, 'updatedPrompts': 0})
+    
+    conn = get_db_connection()
+    try:
+        if conn.execute('SELECT 1 FROM tags WHERE name = ?', (name,)).fetchone() is None:
+            return jsonify({'error': 'Tag not found'}), 404
+        if conn.execute('SELECT 1 FROM tags WHERE name = ?', (new_name,)).fetchone():
+            conn.execute('DELETE FROM tags WHERE name = ?', (name,))
+        else:
+            conn.execute('UPDATE tags SET name = ? WHERE name = ?', (new_name, name))
+        cur = conn.execute(RENAME_TAG_SQL, {'old': name, 'new': new_name, 'now': now_ms()})
+        conn.commit()
+        return jsonify({'name': new_name, 'updatedPrompts': cur.rowcount})
+    finally:
+        conn.close()
 
 # Bulk Sync Endpoint (for migration)
+# Prompts are upserted in batches of SYNC_BATCH_SIZE, each one multi-row
+# INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE guarded by updated_at, all in one
+# transaction. One statement per batch beats executemany, which steps the statement once
+# per row. The batch size also bounds the IN (...) lookup used to report per-item results
+# (500 rows x 7 columns stays well under SQLite's bound-parameter limit).
+SYNC_BATCH_SIZE = 500
+
+UPSERT_PROMPT_SQL = '''
+    INSERT INTO prompts (id, title, content, content_hash, tags, created_at, updated_at)
+    VALUES {values}
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title,
+        content = '',
+        content_hash = excluded.content_hash,
+        tags = excluded.tags,
+        updated_at = excluded.updated_at
+    WHERE excluded.updated_at > prompts.updated_at
+'''
+
+# Same, but restores the exported order too (used by /api/import)
+UPSERT_ORDERED_PROMPT_SQL = '''
+    INSERT INTO prompts (id, title, content, content_hash, tags, created_at, updated_at, order_index)
+    VALUES {values}
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title,
+        content = '',
+        content_hash = excluded.content_hash,
+        tags = excluded.tags,
+        updated_at = excluded.updated_at,
+        order_index = excluded.order_index
+    WHERE excluded.updated_at > prompts.updated_at
+'''
+
+def _sync_batch(conn, batch, results, with_order=False):
+    ids = [p['id'] for p in batch if isinstance(p, dict) and 'id' in p]
+    placeholders = ','.join('?' * len(ids))
+    existing = {}
+    if ids:
+        existing = dict(conn.execute(
+            f'SELECT id, updated_at FROM prompts WHERE id IN ({placeholders})', ids
+        ).fetchall())
+
+    rows = []
+    for p in batch:
+        try:
+            row = (p['id'], p['title'], p['content'], json.dumps(p.get('tags', [])), p['createdAt'], p['updatedAt'])
+            if with_order:
+                row += (p.get('orderIndex') or 0,)
+        except (KeyError, TypeError):
+            results.append({'id': p.get('id') if isinstance(p, dict) else None, 'status': 'invalid'})
+            continue
+
+        # Mirror the upsert's WHERE clause to report what happened to each item
+        if p['id'] not in existing:
+            status = 'inserted'
+        elif existing[p['id']] is not None and p['updatedAt'] > existing[p['id']]:
+            status = 'updated'
+        else:
+            status = 'unchanged'
+        results.append({'id': p['id'], 'status': status})
+        if status == 'unchanged':
+            continue  # the upsert would skip it anyway; don't store its body
+        existing[p['id']] = p['updatedAt']
+        rows.append(row)
+
+    # Bodies go to prompt_blobs; the row keeps only their hash (position 2 in the row)
+    hashes = store_bodies(conn, [row[2] for row in rows], compress=False)  # packed by index_pending()
+    rows = [row[:2] + (h,) + row[3:] for row, h in zip(rows, hashes)]
+    if rows:
+        value = "(?, ?, '', ?, ?, ?, ?, ?)" if with_order else "(?, ?, '', ?, ?, ?, ?)"
+        sql = UPSERT_ORDERED_PROMPT_SQL if with_order else UPSERT_PROMPT_SQL
+        conn.execute(sql.format(values=', '.join([value] * len(rows))), [v for row in rows for v in row])
+
 @app.route('/api/sync', methods=['POST'])
 def sync_data():
     data = request.json
@@ -185,31 +755,244 @@ def sync_data():
     tags = data.get('tags', [])
     
     conn = get_db_connection()
-    
-    # Sync Tags
-    for tag in tags:
-        conn.execute('INSERT OR IGNORE INTO tags (name) VALUES (?)', (tag,))
+    results = []
+    try:
+        # Take the write lock up front: _sync_batch reads before it writes, and a deferred
+        # transaction whose snapshot went stale fails with "database is locked" on upgrade
+        # instead of waiting out busy_timeout
+        conn.execute('BEGIN IMMEDIATE')
+
+        # Sync Tags
+        conn.executemany('INSERT OR IGNORE INTO tags (name) VALUES (?)', ((tag,) for tag in tags))
         
-    # Sync Prompts
-    for p in prompts:
-        # Check if exists, update if newer, or insert
-        existing = conn.execute('SELECT updated_at FROM prompts WHERE id = ?', (p['id'],)).fetchone()
-        if existing:
-            if p['updatedAt'] > existing['updated_at']:
-                 conn.execute(
-                    'UPDATE prompts SET title = ?, content = ?, tags = ?, updated_at = ? WHERE id = ?',
-                    (p['title'], p['content'], json.dumps(p.get('tags', [])), p['updatedAt'], p['id'])
-                )
-        else:
-            conn.execute(
-                'INSERT INTO prompts (id, title, content, tags, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
-                (p['id'], p['title'], p['content'], json.dumps(p.get('tags', [])), p['createdAt'], p['updatedAt'])
-            )
+        # Sync Prompts; the search index catches up in the background (index_worker)
+        for start in range(0, len(prompts), SYNC_BATCH_SIZE):
+            _sync_batch(conn, prompts[start:start + SYNC_BATCH_SIZE], results)
+        
+        conn.commit()
+    finally:
+        conn.close()
+    index_wakeup.set()
+    
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    return jsonify({'message': 'Sync complete', 'counts': counts, 'results': results})
+
+# Streaming Backup / Restore
+# GET /api/export   -> NDJSON, one record per line, tags first (in order), then prompts:
+#                      {"type": "tag", "name": ..., "orderIndex": ...}
+#                      {"type": "prompt", "id": ..., "title": ..., ..., "orderIndex": ...}
+# POST /api/import  <- the same format; prompts go through the /api/sync upsert (newer
+#                      updatedAt wins), missing tags are added, existing ones kept.
+# Export reads one consistent snapshot row by row from the cursor; import reads the body
+# line by line and buffers up to SYNC_BATCH_SIZE records, then writes them in one short
+# transaction. No transaction is open while the body is being read, so a slow upload never
+# holds the write lock and other writers only wait for one batch.
+# gzip: export compresses for "Accept-Encoding: gzip" (Content-Encoding) or ?gzip=1 (a
+# .ndjson.gz download); import accepts gzip bodies (Content-Encoding: gzip or gzip magic).
+EXPORT_CHUNK_SIZE = 64 * 1024
+IMPORT_READ_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+
+def export_records(conn):
+    conn.execute('BEGIN')  # one read snapshot for tags and prompts (WAL: writers aren't blocked)
+    for t in conn.execute('SELECT name, order_index FROM tags ORDER BY order_index ASC, name ASC'):
+        yield {'type': 'tag', 'name': t['name'], 'orderIndex': t['order_index']}
+    for p in conn.execute('SELECT * FROM prompt_rows ORDER BY order_index ASC, updated_at DESC, id ASC'):
+        record = prompt_to_dict(p)
+        record['type'] = 'prompt'
+        yield record
+
+def ndjson_chunks(records, compress=False):
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits 31 = gzip container
+    buf, size = [], 0
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        buf.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            data = b''.join(buf)
+            buf, size = [], 0
+            data = gz.compress(data) if gz else data
+            if data:
+                yield data
+    data = b''.join(buf)
+    if gz:
+        data = gz.compress(data) + gz.flush()
+    if data:
+        yield data
+
+@app.route('/api/export', methods=['GET'])
+def export_library():
+    as_file = request.args.get('gzip') == '1'
+    negotiated = not as_file and 'gzip' in request.headers.get('Accept-Encoding', '')
+    
+    def generate():
+        conn = get_db_connection()
+        try:
+            yield from ndjson_chunks(export_records(conn), compress=as_file or negotiated)
+        finally:
+            conn.close()  # also runs when the client disconnects mid-stream
+    
+    if as_file:
+        response = app.response_class(generate(), mimetype='application/gzip')
+        response.headers['Content-Disposition'] = 'attachment; filename="prompts.ndjson.gz"'
+    else:
+        response = app.response_class(generate(), mimetype='application/x-ndjson')
+        if negotiated:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def iter_body_chunks(stream, gzipped=None):
+    """Yields the request body in pieces of at most IMPORT_READ_SIZE bytes, gunzipped if needed."""
+    chunk = stream.read(IMPORT_READ_SIZE)
+    if gzipped is None:
+        gzipped = chunk.startswith(GZIP_MAGIC)
+    if not gzipped:
+        while chunk:
+            yield chunk
+            chunk = stream.read(IMPORT_READ_SIZE)
+        return
+    gz = zlib.decompressobj(47)  # 47 = auto-detect gzip/zlib header
+    while chunk:
+        # max_length keeps a highly compressible chunk from expanding all at once
+        yield gz.decompress(chunk, IMPORT_READ_SIZE)
+        while gz.unconsumed_tail:
+            yield gz.decompress(gz.unconsumed_tail, IMPORT_READ_SIZE)
+        chunk = stream.read(IMPORT_READ_SIZE)
+    yield gz.flush()
+    if not gz.eof:
+        raise zlib.error('truncated gzip stream')
+
+def iter_body_lines(stream, gzipped=None):
+    pending = b''
+    for chunk in iter_body_chunks(stream, gzipped):
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+@app.route('/api/import', methods=['POST'])
+def import_library():
+    gzipped = True if request.headers.get('Content-Encoding', '').lower() == 'gzip' else None
+    counts = {}
+    batch, tag_rows, line_no = [], [], 0
+    errors = []
+    
+    def flush_batch(conn):
+        results = []
+        conn.execute('BEGIN IMMEDIATE')  # same reason as sync_data
+        try:
+            conn.executemany('INSERT OR IGNORE INTO tags (name, order_index) VALUES (?, ?)', tag_rows)
+            _sync_batch(conn, batch, results, with_order=True)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        index_wakeup.set()  # indexed in the background, between batches, like /api/sync
+        for r in results:
+            counts[r['status']] = counts.get(r['status'], 0) + 1
+        batch.clear()
+        tag_rows.clear()
+    
+    conn = get_db_connection()
+    try:
+        for line_no, line in enumerate(iter_body_lines(request.stream, gzipped), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                kind = record.get('type')
+            except (ValueError, AttributeError):
+                kind = None
             
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'Sync complete'})
+            if kind == 'tag' and isinstance(record.get('name'), str):
+                tag_rows.append((record['name'], record.get('orderIndex') or 0))
+            elif kind == 'prompt':
+                batch.append(record)
+            else:
+                counts['invalid'] = counts.get('invalid', 0) + 1
+                if len(errors) < 20: errors.append(line_no)
+            if len(batch) + len(tag_rows) >= SYNC_BATCH_SIZE:
+                flush_batch(conn)
+        if batch or tag_rows:
+            flush_batch(conn)
+    except zlib.error as e:
+        # Keep what was imported before the corrupt block
+        if batch or tag_rows:
+            flush_batch(conn)
+        return jsonify({'error': f'Corrupt gzip body: {e}', 'counts': counts, 'lines': line_no}), 400
+    finally:
+        conn.close()
+    
+    return jsonify({'message': 'Import complete', 'counts': counts, 'lines': line_no, 'invalidLines': errors})
+
+# Delta Sync Endpoint
+# GET /api/changes            -> {"cursor": N} current position, take it before a full load
+# GET /api/changes?since=N    -> prompts/tags changed after N, tombstones for deletes
+# since must be a cursor from an earlier response (an integer >= 0) and limit >= 1;
+# anything else is a 400, so a client bug can't silently restart from the current cursor.
+CHANGES_PAGE_SIZE = 1000
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            since = -1
+        if since < 0:
+            return jsonify({'error': 'since must be a cursor (an integer >= 0)'}), 400
+    try:
+        limit = page_limit(CHANGES_PAGE_SIZE, CHANGES_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    
+    conn = get_db_connection()
+    try:
+        if since is None:
+            cursor = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+            return jsonify({'cursor': cursor})
+        
+        entries = conn.execute(
+            'SELECT seq, entity, entity_id, op FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?',
+            (since, limit + 1)
+        ).fetchall()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        
+        upserted_ids = [e['entity_id'] for e in entries if e['entity'] == 'prompt' and e['op'] == 'upsert']
+        prompts = []
+        for start in range(0, len(upserted_ids), 500):
+            chunk = upserted_ids[start:start + 500]
+            rows = conn.execute(
+                f'SELECT * FROM prompt_rows WHERE id IN ({",".join("?" * len(chunk))})', chunk
+            ).fetchall()
+            prompts.extend(prompt_to_dict(p) for p in rows)
+        
+        # The tag list is small and ordered: resend it whole when any tag changed
+        tags_changed = any(e['entity'] == 'tag' for e in entries)
+        tags = None
+        if tags_changed:
+            tags = [t['name'] for t in conn.execute('SELECT name FROM tags ORDER BY order_index ASC, name ASC')]
+        
+        return jsonify({
+            'cursor': entries[-1]['seq'] if entries else since,
+            'hasMore': has_more,
+            'prompts': prompts,
+            'deletedPrompts': [e['entity_id'] for e in entries if e['entity'] == 'prompt' and e['op'] == 'delete'],
+            'tags': tags,
+            'deletedTags': [e['entity_id'] for e in entries if e['entity'] == 'tag' and e['op'] == 'delete'],
+        })
+    finally:
+        conn.close()
 
 if __name__ == '__main__':
+    # Development server; use serve.py for the multi-threaded production server
     # Use a different port to avoid conflict with root app.py (5001)
+    start_index_worker()
     app.run(debug=True, port=5002)
@@ -0,0 +1,58 @@
+import os
+import sys
+import sqlite3
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import db
+
+@pytest.fixture(scope='session')
+def server_module(tmp_path_factory):
+    # server.py migrates prompts.db in the working directory at import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('import'))
+    try:
+        import server
+    finally:
+        os.chdir(cwd)
+    return server
+
+@pytest.fixture
+def server(server_module, tmp_path, monkeypatch):
+    """server module pointed at a fresh prompts.db in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    db.close_pools()
+    db.migrate()
+    server_module.response_cache.invalidate()
+    yield server_module
+    db.close_pools()
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+@pytest.fixture
+def raw_db(server):
+    """Plain sqlite3 connection, like the sqlite3 CLI or a backup script would open."""
+    conn = sqlite3.connect(db.DB_NAME, isolation_level=None)
+    yield conn
+    conn.close()
+
+def _make_prompt(i, **fields):
+    prompt = {
+        'id': f'p{i}',
+        'title': f'title {i}',
+        'content': f'body of prompt {i}',
+        'tags': [],
+        'createdAt': 1000 + i,
+        'updatedAt': 1000 + i,
+    }
+    prompt.update(fields)
+    return prompt
+
+@pytest.fixture
+def make_prompt():
+    """make_prompt(i, **fields) -> a valid prompt payload with id 'p<i>'."""
+    return _make_prompt
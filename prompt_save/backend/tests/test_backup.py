@@ -0,0 +1,95 @@
+import gzip
+import io
+import json
+import sqlite3
+import db
+
+def export_lines(client, **args):
+    r = client.get('/api/export', query_string=args)
+    assert r.status_code == 200
+    data = r.get_data()
+    if args.get('gzip'):
+        data = gzip.decompress(data)
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+def import_body(client, body, **headers):
+    return client.post('/api/import', data=body, content_type='application/x-ndjson', headers=headers)
+
+def seed(client, make_prompt):
+    client.post('/api/sync', json={'prompts': [make_prompt(i, tags=['work'], content=f'清单 {i}') for i in range(5)],
+                                   'tags': ['work', 'home']})
+
+def test_export_then_import_into_an_empty_library(server, client, make_prompt, tmp_path, monkeypatch):
+    seed(client, make_prompt)
+    records = export_lines(client)
+    assert [r['type'] for r in records] == ['tag', 'tag'] + ['prompt'] * 5
+    before = client.get('/api/prompts').get_json()
+    tags = client.get('/api/tags').get_json()
+
+    other = tmp_path / 'other'
+    other.mkdir()
+    monkeypatch.chdir(other)
+    db.close_pools()
+    db.migrate()
+    body = '\n'.join(json.dumps(r, ensure_ascii=False) for r in records).encode('utf-8')
+    r = import_body(client, gzip.compress(body), **{'Content-Encoding': 'gzip'})
+    assert r.status_code == 200
+    assert r.get_json()['counts'] == {'inserted': 5}
+    assert client.get('/api/prompts').get_json() == before
+    assert client.get('/api/tags').get_json() == tags
+    assert len(client.get('/api/prompts/search?q=清单').get_json()['results']) == 5
+
+def test_gzip_export_and_newer_wins_on_import(client, make_prompt):
+    seed(client, make_prompt)
+    records = export_lines(client, gzip=1)
+    records[2]['title'] = 'older'
+    records[3]['title'], records[3]['updatedAt'] = 'newer', 9999
+    body = '\n'.join(json.dumps(r) for r in records) + '\nnot json\n'
+    got = import_body(client, body.encode('utf-8')).get_json()
+    assert got['counts'] == {'unchanged': 4, 'updated': 1, 'invalid': 1}
+    assert got['invalidLines'] == [8]
+    titles = {p['id']: p['title'] for p in client.get('/api/prompts').get_json()}
+    assert titles[records[3]['id']] == 'newer' and 'older' not in titles.values()
+
+def test_corrupt_gzip_keeps_what_was_imported(server, client, make_prompt, monkeypatch):
+    monkeypatch.setattr(server, 'IMPORT_READ_SIZE', 16)
+    good = gzip.compress(b''.join(json.dumps({'type': 'prompt', **make_prompt(i)}).encode() + b'\n' for i in range(3)))
+    r = import_body(client, good[:-8] + b'\x00' * 8, **{'Content-Encoding': 'gzip'})  # bad CRC at the very end
+    assert r.status_code == 400
+    # The last line may share the bad block; everything decoded before it is kept
+    inserted = r.get_json()['counts']['inserted']
+    assert inserted >= 2 and len(client.get('/api/prompts').get_json()) == inserted
+
+class SlowUpload(io.BytesIO):
+    """Request body that checks, before each read, that nobody holds the write lock."""
+    def __init__(self, data, db_name):
+        super().__init__(data)
+        self.probe = sqlite3.connect(db_name, timeout=0, isolation_level=None)
+        self.lock_free = []
+
+    def _check(self):
+        try:
+            self.probe.execute('BEGIN IMMEDIATE')
+            self.probe.execute('ROLLBACK')
+            self.lock_free.append(True)
+        except sqlite3.OperationalError:
+            self.lock_free.append(False)
+
+    def read(self, size=-1):
+        self._check()
+        return super().read(64 if size is None or size < 0 else min(size, 64))
+
+    def readinto(self, buf):
+        self._check()
+        return super().readinto(memoryview(buf)[:64])
+
+def test_import_does_not_hold_the_write_lock_while_reading(server, client, make_prompt, monkeypatch):
+    monkeypatch.setattr(server, 'SYNC_BATCH_SIZE', 2)
+    monkeypatch.setattr(server, 'IMPORT_READ_SIZE', 64)
+    data = b''.join(json.dumps({'type': 'prompt', **make_prompt(i)}).encode() + b'\n' for i in range(6))
+    upload = SlowUpload(data, db.DB_NAME)
+    r = client.post('/api/import', input_stream=upload, content_type='application/x-ndjson',
+                    headers={'Content-Length': str(len(data))})
+    upload.probe.close()
+    assert r.status_code == 200 and r.get_json()['counts'] == {'inserted': 6}
+    assert len(upload.lock_free) > 3 and all(upload.lock_free)
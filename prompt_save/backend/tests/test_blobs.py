@@ -0,0 +1,70 @@
+import db
+
+LONG_BODY = 'Summarize the meeting notes below and list the action items. ' * 20
+
+def search_ids(client, q):
+    r = client.get('/api/prompts/search', query_string={'q': q})
+    assert r.status_code == 200
+    return [item['id'] for item in r.get_json()['results']]
+
+def test_identical_bodies_share_one_compressed_blob(client, raw_db, make_prompt):
+    for i in range(3):
+        assert client.post('/api/prompts', json=make_prompt(i, content=LONG_BODY)).status_code == 201
+
+    blobs = raw_db.execute('SELECT codec, size FROM prompt_blobs').fetchall()
+    assert blobs == [('zlib', len(LONG_BODY.encode('utf-8')))]
+    assert raw_db.execute("SELECT COUNT(*) FROM prompts WHERE content = ''").fetchone()[0] == 3
+    assert {p['content'] for p in client.get('/api/prompts').get_json()} == {LONG_BODY}
+
+def test_blob_endpoints_return_the_text(client, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1, content=LONG_BODY))
+    client.post('/api/prompts', json=make_prompt(2, content='short'))
+    hashes = {p['id']: p['contentHash'] for p in client.get('/api/prompts?fields=id,contentHash').get_json()}
+
+    r = client.get(f"/api/blobs/{hashes['p1']}")
+    assert r.status_code == 200 and r.get_data(as_text=True) == LONG_BODY
+    assert client.get('/api/blobs/' + '0' * 64).status_code == 404
+
+    blobs = client.post('/api/blobs', json={'hashes': [hashes['p2'], 'missing']}).get_json()['blobs']
+    assert blobs == {hashes['p2']: 'short'}
+
+def test_plain_sqlite_connection_can_write_prompts(client, raw_db, make_prompt):
+    # No custom SQL functions: the sqlite3 CLI or a backup script can insert, edit and delete
+    client.post('/api/prompts', json=make_prompt(1, content='kept in a blob'))
+    raw_db.execute("INSERT INTO prompts (id, title, content, tags, created_at, updated_at, order_index) "
+                   "VALUES ('ext', 'external', 'inline marmalade body', '[]', 1, 1, 5)")
+    raw_db.execute("UPDATE prompts SET title = 'renamed quince' WHERE id = 'p1'")
+
+    prompts = {p['id']: p for p in client.get('/api/prompts').get_json()}
+    assert prompts['ext']['content'] == 'inline marmalade body'
+    assert prompts['p1']['content'] == 'kept in a blob'
+
+    # Picked up by the next search
+    assert search_ids(client, 'marmalade') == ['ext']
+    assert search_ids(client, 'quince') == ['p1']
+
+    raw_db.execute("DELETE FROM prompts WHERE id = 'ext'")
+    assert search_ids(client, 'marmalade') == []
+
+def test_edits_replace_the_indexed_text(client, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1, content='apricot jam'))
+    assert search_ids(client, 'apricot') == ['p1']
+
+    client.put('/api/prompts/p1', json=make_prompt(1, content='blackberry jam', updatedAt=5000))
+    assert search_ids(client, 'apricot') == []
+    assert search_ids(client, 'blackberry') == ['p1']
+
+    client.delete('/api/prompts/p1')
+    assert search_ids(client, 'blackberry') == []
+
+def test_compact_drops_unreferenced_blobs(client, server, raw_db, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1, content='first version'))
+    client.put('/api/prompts/p1', json=make_prompt(1, content='second version', updatedAt=5000))
+    assert raw_db.execute('SELECT COUNT(*) FROM prompt_blobs').fetchone()[0] == 2
+
+    db.close_pools()
+    removed, _, _ = db.compact()
+    assert removed == 1
+    assert raw_db.execute('SELECT COUNT(*) FROM prompt_blobs').fetchone()[0] == 1
+    assert search_ids(client, 'second') == ['p1']
+    assert search_ids(client, 'first') == []
@@ -0,0 +1,61 @@
+import pytest
+
+def changes(client, **args):
+    r = client.get('/api/changes', query_string=args)
+    assert r.status_code == 200, r.get_json()
+    return r.get_json()
+
+def test_changes_round_trip(client, make_prompt):
+    start = changes(client)['cursor']
+    client.post('/api/prompts', json=make_prompt(1))
+    client.post('/api/prompts', json=make_prompt(2))
+    client.post('/api/tags', json={'name': 'work'})
+    client.put('/api/prompts/p1', json=make_prompt(1, title='edited', updatedAt=5000))
+    client.delete('/api/prompts/p2')
+
+    delta = changes(client, since=start)
+    assert [p['id'] for p in delta['prompts']] == ['p1']
+    assert delta['prompts'][0]['title'] == 'edited'
+    assert delta['deletedPrompts'] == ['p2']
+    assert delta['tags'] == ['work'] and delta['deletedTags'] == []
+    assert delta['hasMore'] is False
+
+    # Caught up: the cursor stays put and nothing comes back
+    again = changes(client, since=delta['cursor'])
+    assert again['cursor'] == delta['cursor'] == changes(client)['cursor']
+    assert again['prompts'] == [] and again['tags'] is None
+
+def test_changes_pages_follow_the_cursor(client, make_prompt):
+    start = changes(client)['cursor']
+    for i in range(5):
+        client.post('/api/prompts', json=make_prompt(i))
+
+    seen, cursor, pages = [], start, 0
+    while True:
+        page = changes(client, since=cursor, limit=2)
+        assert page['cursor'] > cursor  # every page moves the cursor
+        seen += [p['id'] for p in page['prompts']]
+        cursor, pages = page['cursor'], pages + 1
+        if not page['hasMore']:
+            break
+    assert seen == ['p0', 'p1', 'p2', 'p3', 'p4'] and pages == 3
+
+@pytest.mark.parametrize('args', [
+    {'since': 0, 'limit': 0},
+    {'since': 0, 'limit': -5},
+    {'since': 0, 'limit': 'ten'},
+    {'since': 'abc'},
+    {'since': -1},
+    {'since': '1.5'},
+])
+def test_changes_rejects_bad_arguments(client, args):
+    r = client.get('/api/changes', query_string=args)
+    assert r.status_code == 400
+    assert 'error' in r.get_json()
+
+def test_changes_limit_is_clamped(server, client, make_prompt, monkeypatch):
+    monkeypatch.setattr(server, 'CHANGES_PAGE_SIZE', 2)
+    for i in range(3):
+        client.post('/api/prompts', json=make_prompt(i))
+    page = changes(client, since=0, limit=100)
+    assert len(page['prompts']) == 2 and page['hasMore'] is True
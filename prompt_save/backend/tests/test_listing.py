@@ -0,0 +1,41 @@
+import pytest
+
+def page_through(client, limit, **args):
+    ids, cursor = [], None
+    for _ in range(100):
+        query = {'fields': 'id', 'limit': limit, **args}
+        if cursor:
+            query['cursor'] = cursor
+        r = client.get('/api/prompts', query_string=query)
+        assert r.status_code == 200
+        ids += [p['id'] for p in r.get_json()]
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids
+    pytest.fail('cursor never ended')
+
+def test_cursor_pages_match_the_full_listing(client, make_prompt):
+    for i in range(7):
+        client.post('/api/prompts', json=make_prompt(i, tags=['even'] if i % 2 == 0 else []))
+    full = [p['id'] for p in client.get('/api/prompts?fields=id').get_json()]
+    assert len(full) == 7
+    for limit in (1, 2, 3, 7, 50):
+        assert page_through(client, limit) == full
+    assert page_through(client, 2, tag='even') == [i for i in full if int(i[1:]) % 2 == 0]
+
+def test_cursor_with_null_order_index(client, raw_db, make_prompt):
+    # Rows written by other tools may carry a NULL order_index; they sort as 0
+    for i in range(6):
+        client.post('/api/prompts', json=make_prompt(i))
+    raw_db.execute("UPDATE prompts SET order_index = NULL WHERE id IN ('p1', 'p3', 'p4')")
+    raw_db.execute("UPDATE prompts SET order_index = 0 WHERE id = 'p5'")
+
+    listing = client.get('/api/prompts?fields=id,orderIndex').get_json()
+    assert all(p['orderIndex'] is not None for p in listing)
+    full = [p['id'] for p in listing]
+    for limit in (1, 2, 4):
+        assert page_through(client, limit) == full
+
+@pytest.mark.parametrize('args', [{'limit': 0}, {'limit': -1}, {'limit': 'x'}, {'limit': 2, 'cursor': 'bm90IGpzb24='}])
+def test_listing_rejects_bad_paging(client, args):
+    assert client.get('/api/prompts', query_string=args).status_code == 400
@@ -0,0 +1,34 @@
+import argparse
+import pytest
+import loadtest
+from loadtest import DEFAULT_MIX, InProcessClient, percentile, parse_mix, run_load, seed
+
+def test_seed_and_run_every_operation(server):
+    ids, tags = seed(InProcessClient(server.app), 60, 5, batch=25)
+    assert len(ids) == 60 and tags == [f'tag{i}' for i in range(5)]
+    client = server.app.test_client()
+    assert len(client.get('/api/prompts?fields=id').get_json()) == 60
+
+    results = run_load(lambda: InProcessClient(server.app), ids, tags, concurrency=3, duration=60,
+                       reorder_size=10, max_requests=60)
+    assert results['all']['count'] == 180
+    assert set(results) - {'all'} <= set(DEFAULT_MIX) and len(results) > 5
+    assert {op: r['errors'] for op, r in results.items() if r['errors']} == {}
+    assert all(r['p50_ms'] <= r['p99_ms'] <= r['max_ms'] for r in results.values())
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 51.0 and percentile(values, 99) == 99.0 and percentile(values, 100) == 100.0
+    assert percentile([], 50) is None
+
+def test_regressions_need_enough_samples(capsys):
+    row = {'count': 100, 'errors': 0, 'rps': 1.0, 'p50_ms': 10.0, 'p90_ms': 20.0, 'p99_ms': 30.0, 'max_ms': 40.0}
+    baseline = {'results': {'list': dict(row, p50_ms=5.0), 'tags': dict(row, count=5, p50_ms=1.0)}}
+    results = {'list': row, 'tags': row}
+    assert loadtest.print_results(results, baseline, threshold=20) == [('list', 'p50_ms', 100.0)]
+    assert 'few samples' in capsys.readouterr().out
+
+def test_parse_mix():
+    assert parse_mix('list=20,update') == {'list': 20.0, 'update': 1.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix('list=1,nope=2')
@@ -0,0 +1,72 @@
+import re
+import itertools
+import flask
+import db
+from metrics import Metrics
+
+def metric(text, name, **labels):
+    want = ','.join(f'{k}="{v}"' for k, v in labels.items())
+    m = re.search(rf'^{re.escape(name)}\{{{re.escape(want)}\}} (\S+)$', text, re.M)
+    return float(m.group(1)) if m else None
+
+def test_metrics_endpoint_counts_requests_and_statements(client, make_prompt):
+    # The server's metrics live for the whole test session, so compare before and after
+    def read():
+        text = client.get('/api/metrics').get_data(as_text=True)
+        return [metric(text, 'prompt_save_requests_total', method='POST', route='/api/prompts', status='201') or 0,
+                metric(text, 'prompt_save_request_duration_seconds_count', method='PUT', route='/api/prompts/<id>') or 0,
+                metric(text, 'prompt_save_sql_statements_total', route='/api/prompts') or 0,
+                metric(text, 'prompt_save_sql_duration_seconds_count', route='/api/prompts') or 0]
+
+    before = read()
+    client.post('/api/prompts', json=make_prompt(1))
+    client.put('/api/prompts/p1', json=make_prompt(1, updatedAt=5000))
+    posts, puts, statements, timed = [a - b for a, b in zip(read(), before)]
+    assert (posts, puts) == (1, 1)
+    assert statements >= 1 and timed >= 1
+
+_ids = itertools.count()
+
+def _app_with(metrics, tmp_path):
+    app = flask.Flask(__name__)
+    metrics.install(app)
+
+    @app.route('/sync')
+    def sync():
+        a, b = f'a{next(_ids)}', f'b{next(_ids)}'
+        conn = db.get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute("INSERT INTO prompts (id, title, content, tags, created_at, updated_at) "
+                         "VALUES (?, 't', 'c', '[\"x\"]', 1, 1), (?, 't', 'c', '[]', 1, 1)", (a, b))
+            conn.commit()
+        finally:
+            conn.close()
+        return 'ok'
+    return app
+
+def test_trace_sql_is_opt_in(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'trace_callback', None)
+    monkeypatch.setattr(db, 'statement_timer', None)
+
+    plain = Metrics()
+    app = _app_with(plain, tmp_path)
+    assert db.trace_callback is None
+    db.close_pools()
+    app.test_client().get('/sync')
+    assert metric(plain.render(), 'prompt_save_sql_statements_total', route='/sync') == 3  # BEGIN, INSERT, COMMIT
+
+    traced = Metrics(trace_sql=True)
+    app = _app_with(traced, tmp_path)
+    db.close_pools()  # pooled connections pick the callback up when created
+    app.test_client().get('/sync')
+    # Without the trace, trigger statements (change log, tags, search queue) are not seen
+    assert metric(traced.render(), 'prompt_save_sql_statements_total', route='/sync') > 3
+
+def test_slow_query_log(server, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(db, 'trace_callback', None)
+    monkeypatch.setattr(db, 'statement_timer', None)
+    app = _app_with(Metrics(slow_query_ms=0), tmp_path)
+    with caplog.at_level('WARNING', logger='prompt_save.slow_query'):
+        app.test_client().get('/sync')
+    assert any('/sync: INSERT INTO prompts' in r.getMessage() for r in caplog.records)
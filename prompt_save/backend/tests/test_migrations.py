@@ -0,0 +1,94 @@
+import sqlite3
+import pytest
+import db
+
+def objects(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")}
+    finally:
+        conn.close()
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+def make_legacy_db(path):
+    # Schema of the first release: no order_index on either table, no user_version
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE prompts (id TEXT PRIMARY KEY, title TEXT NOT NULL, content TEXT NOT NULL,
+                              tags TEXT, created_at INTEGER, updated_at INTEGER);
+        CREATE TABLE tags (name TEXT PRIMARY KEY);
+        INSERT INTO tags VALUES ('翻译'), ('work');
+        INSERT INTO prompts VALUES ('a', '中英翻译', '请把下面的段落翻译成英文，保留术语。', '["翻译", "work"]', 1, 10);
+        INSERT INTO prompts VALUES ('b', 'Summary', 'Summarize the text below in three bullet points.', '[]', 2, 20);
+        INSERT INTO prompts VALUES ('c', 'Same body', 'Summarize the text below in three bullet points.', NULL, 3, 30);
+    ''')
+    conn.commit()
+    conn.close()
+
+def test_fresh_database(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    assert db.migrate(path) == 0
+    assert user_version(path) == db.SCHEMA_VERSION == 7
+    assert {'prompts', 'tags', 'change_log', 'prompt_tags', 'prompt_blobs', 'prompts_fts', 'prompts_fts_docs',
+            'prompts_fts_queue', 'prompt_rows', 'idx_prompts_order_key', 'idx_tags_order'} <= objects(path)
+    assert 'idx_prompts_order' not in objects(path)
+    # Up to date: nothing runs
+    assert db.migrate(path) == db.SCHEMA_VERSION
+
+def test_legacy_database_keeps_its_data(server_module, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    make_legacy_db(db.DB_NAME)
+    db.close_pools()
+    assert db.migrate() == 0
+    server_module.response_cache.invalidate()
+    client = server_module.app.test_client()
+    try:
+        prompts = {p['id']: p for p in client.get('/api/prompts').get_json()}
+        assert prompts['a']['content'] == '请把下面的段落翻译成英文，保留术语。'
+        assert prompts['a']['tags'] == ['翻译', 'work'] and prompts['c']['tags'] == []
+        assert {p['orderIndex'] for p in prompts.values()} == {0}
+        assert client.get('/api/tags').get_json() == ['work', '翻译']
+        assert [p['id'] for p in client.get('/api/prompts?fields=id&tag=翻译').get_json()] == ['a']
+        hits = client.get('/api/prompts/search?q=翻译').get_json()['results']
+        assert [h['id'] for h in hits] == ['a']
+    finally:
+        db.close_pools()
+
+    conn = sqlite3.connect(db.DB_NAME)
+    # Bodies moved to blobs, identical ones stored once
+    assert conn.execute("SELECT COUNT(*) FROM prompts WHERE content != '' OR content_hash IS NULL").fetchone()[0] == 0
+    assert conn.execute('SELECT COUNT(*) FROM prompt_blobs').fetchone()[0] == 2
+    conn.close()
+
+def test_resumes_from_an_intermediate_version(tmp_path):
+    path = str(tmp_path / 'v4.db')
+    conn = sqlite3.connect(path, isolation_level=None)
+    c = conn.cursor()
+    for step in db.MIGRATIONS[:4]:
+        step(c)
+    conn.execute("INSERT INTO prompts (id, title, content, tags) VALUES ('x', 'kept', 'body', '[]')")
+    conn.execute('PRAGMA user_version = 4')
+    conn.close()
+
+    assert db.migrate(path) == 4
+    assert user_version(path) == db.SCHEMA_VERSION
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT title, content FROM prompts").fetchall() == [('kept', '')]
+    assert conn.execute('SELECT COUNT(*) FROM prompts_fts_docs').fetchone()[0] == 1
+    conn.close()
+
+def test_failed_step_rolls_back_the_whole_run(tmp_path, monkeypatch):
+    def broken(c):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(db, 'MIGRATIONS', db.MIGRATIONS + [broken])
+    monkeypatch.setattr(db, 'SCHEMA_VERSION', len(db.MIGRATIONS))
+    path = str(tmp_path / 'broken.db')
+    with pytest.raises(RuntimeError):
+        db.migrate(path)
+    assert user_version(path) == 0 and objects(path) == set()
@@ -0,0 +1,62 @@
+import pytest
+
+@pytest.fixture
+def four(client, raw_db, make_prompt):
+    for i in range(4):
+        client.post('/api/prompts', json=make_prompt(i))
+    client.post('/api/prompts/reorder', json={'orderedIds': ['p0', 'p1', 'p2', 'p3']})
+    return raw_db
+
+def move(client, id, prev=None, next=None):
+    r = client.post('/api/prompts/move', json={'id': id, 'prevId': prev, 'nextId': next})
+    return r.status_code, r.get_json()
+
+def listed(client):
+    return [p['id'] for p in client.get('/api/prompts?fields=id').get_json()]
+
+def orders(raw_db):
+    return dict(raw_db.execute('SELECT id, order_index FROM prompts'))
+
+def test_move_writes_the_midpoint(client, four):
+    before = orders(four)
+    status, body = move(client, 'p3', prev='p0', next='p1')
+    assert status == 200 and body['renumbered'] is False
+    assert body['orderIndex'] == (before['p0'] + before['p1']) / 2
+    assert listed(client) == ['p0', 'p3', 'p1', 'p2']
+    assert {k: v for k, v in orders(four).items() if k != 'p3'} == {k: v for k, v in before.items() if k != 'p3'}
+
+def test_move_to_either_end(client, four):
+    assert move(client, 'p2', next='p0')[0] == 200
+    assert move(client, 'p1', prev='p3')[0] == 200
+    assert listed(client) == ['p2', 'p0', 'p3', 'p1']
+
+def test_exhausted_gap_renumbers_once(client, four):
+    four.executemany('UPDATE prompts SET order_index = ? WHERE id = ?',
+                     [(i * 1e-7, f'p{i}') for i in range(4)])
+    status, body = move(client, 'p3', prev='p0', next='p1')
+    assert status == 200 and body['renumbered'] is True
+    assert listed(client) == ['p0', 'p3', 'p1', 'p2']
+    assert None not in orders(four).values()
+
+def test_legacy_rows_tied_at_zero(client, four):
+    four.execute('UPDATE prompts SET order_index = 0')
+    status, body = move(client, 'p2', next='p0')
+    assert status == 200 and body['renumbered'] is True
+    ids = listed(client)
+    assert ids.index('p2') == ids.index('p0') - 1
+
+def test_fallback_never_writes_null(server, client, four, monkeypatch):
+    # Neighbours that still leave no room after renumbering: place the item next to them
+    real = server._key_between
+    monkeypatch.setattr(server, '_key_between', lambda p, n: real(p, n) if p is None and n is None else None)
+    status, body = move(client, 'p3', next='p1')
+    assert status == 200 and body['orderIndex'] is not None
+    assert body['orderIndex'] == orders(four)['p1'] - server.ORDER_STEP
+    status, body = move(client, 'p0', prev='p2')
+    assert body['orderIndex'] == orders(four)['p2']
+    assert None not in orders(four).values()
+
+def test_move_rejects_bad_neighbours(client, four):
+    assert move(client, 'p1', prev='p1')[0] == 400
+    assert move(client, 'p1', prev='nope')[0] == 404
+    assert move(client, 'nope', prev='p1')[0] == 404
@@ -0,0 +1,64 @@
+import threading
+import pytest
+import db
+from db import ConnectionPool, PoolExhausted
+
+@pytest.fixture
+def pool(server):
+    pool = ConnectionPool(db.DB_NAME, size=2)
+    yield pool
+    pool.close_all()
+
+def test_connections_are_tuned_and_reused(pool):
+    conn = pool.acquire()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+def test_pool_is_bounded(pool):
+    a, b = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolExhausted):
+        pool.acquire(timeout=0.05)
+
+    # A waiting thread gets the next connection released
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    pool.release(a)
+    waiter.join(5)
+    assert got == [a]
+    pool.release(b)
+
+def test_release_rolls_back_an_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute("INSERT INTO tags (name) VALUES ('left open')")
+    assert conn.in_transaction
+    pool.release(conn)
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM tags WHERE name = 'left open'").fetchone()[0] == 0
+    pool.release(conn)
+
+def test_readers_are_not_blocked_by_a_writer(client, raw_db, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1))
+    raw_db.execute('BEGIN IMMEDIATE')
+    raw_db.execute("UPDATE prompts SET title = 'uncommitted'")
+    try:
+        r = client.get('/api/prompts?fields=id,title')
+        assert r.status_code == 200 and r.get_json() == [{'id': 'p1', 'title': 'title 1'}]
+    finally:
+        raw_db.execute('ROLLBACK')
+
+def test_exhausted_pool_is_a_503(server, client, monkeypatch):
+    monkeypatch.setattr(db, 'POOL_SIZE', 1)
+    db.close_pools()
+    pool = db.get_pool()
+    monkeypatch.setattr(pool, 'acquire', lambda timeout=0.05: ConnectionPool.acquire(pool, timeout))
+    held = db.get_db_connection()
+    try:
+        r = client.get('/api/tags')
+        assert r.status_code == 503 and r.headers['Retry-After'] == '1'
+    finally:
+        held.close()
+    assert client.get('/api/tags').status_code == 200
@@ -0,0 +1,62 @@
+from response_cache import ResponseCache
+
+def listing(client):
+    r = client.get('/api/prompts?fields=id,title')
+    assert r.status_code == 200
+    return [p['title'] for p in r.get_json()]
+
+def test_repeated_gets_are_served_from_the_cache(server, client, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1))
+    cache = server.response_cache
+    first = listing(client)
+    hits = cache.hits
+    assert listing(client) == first
+    assert cache.hits == hits + 1
+
+    etag = client.get('/api/prompts?fields=id,title').headers['ETag']
+    assert client.get('/api/prompts?fields=id,title', headers={'If-None-Match': etag}).status_code == 304
+
+def test_write_from_another_process_invalidates(server, client, raw_db, make_prompt):
+    # e.g. the sqlite3 CLI or a second server process: nothing calls into this cache
+    client.post('/api/prompts', json=make_prompt(1))
+    assert listing(client) == ['title 1']
+    raw_db.execute("UPDATE prompts SET title = 'edited elsewhere' WHERE id = 'p1'")
+    assert listing(client) == ['edited elsewhere']
+
+def test_api_writes_invalidate(client, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1))
+    assert listing(client) == ['title 1']
+    client.put('/api/prompts/p1', json=make_prompt(1, title='edited', updatedAt=5000))
+    assert listing(client) == ['edited']
+    assert client.get('/api/tags').get_json() == []
+    client.post('/api/tags', json={'name': 'work'})
+    assert client.get('/api/tags').get_json() == ['work']
+
+def test_reads_that_do_not_change_the_library_keep_entries(server, client, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1))
+    listing(client)
+    cache = server.response_cache
+    # Read-only POSTs and writes that match no row leave change_log alone
+    client.post('/api/blobs', json={'hashes': []})
+    client.delete('/api/prompts/nope')
+    hits = cache.hits
+    listing(client)
+    assert cache.hits == hits + 1
+
+def test_older_versions_are_not_stored_or_served():
+    cache = ResponseCache()
+    cache.put('/a', 5, b'five', {})
+    assert cache.get('/a', 5) == (b'five', {})
+    assert cache.get('/a', 6) is None
+    cache.put('/b', 4, b'four', {})  # a slow reader from before version 5
+    assert cache.get('/b', 4) is None
+    cache.put('/b', 6, b'six', {})
+    assert cache.get('/a', 5) is None and len(cache.entries) == 1 and cache.bytes == 3
+
+def test_lru_limits():
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    for key in ('/a', '/b', '/c'):
+        cache.put(key, 1, b'x' * 10, {})
+    assert cache.get('/a', 1) is None and cache.evictions == 1
+    cache.put('/big', 1, b'x' * 30, {})  # over a quarter of max_bytes
+    assert cache.get('/big', 1) is None
@@ -0,0 +1,69 @@
+import pytest
+import db
+
+def search(client, q, **args):
+    r = client.get('/api/prompts/search', query_string={'q': q, **args})
+    assert r.status_code == 200
+    return r.get_json()
+
+def ids(client, q):
+    return [item['id'] for item in search(client, q)['results']]
+
+@pytest.fixture
+def library(client, make_prompt):
+    prompts = [
+        make_prompt(1, title='翻译助手', content='把下面的文字翻译成英文'),
+        make_prompt(2, title='Code review', content='Review this Python function for bugs'),
+        make_prompt(3, title='总结', content='请总结会议记录，列出行动项'),
+        make_prompt(4, title='GPT翻译', content='Translate with 日本語の説明'),
+    ]
+    for p in prompts:
+        assert client.post('/api/prompts', json=p).status_code == 201
+
+def test_search_text_spaces_out_cjk_characters():
+    assert db.search_text('翻译总') == ' 翻 译 总 '
+    assert db.search_text('gpt翻译!') == 'gpt 翻 译 !'
+    assert db.search_text(None) == ''
+
+def test_fts_query():
+    assert db.fts_query(['翻译']) == '"翻 译"'
+    assert db.fts_query(['翻']) == '"翻"'
+    assert db.fts_query(['gpt翻译', 'py', 'a"b']) == '"gpt 翻 译" AND "py"* AND "a""b"*'
+    assert db.fts_query(['!!']) is None
+
+@pytest.mark.usefixtures('library')
+def test_two_character_chinese_word_uses_the_index(client):
+    assert sorted(ids(client, '翻译')) == ['p1', 'p4']
+    assert ids(client, '会议') == ['p3']
+    assert ids(client, '议记') == ['p3']  # any substring, not just word starts
+
+@pytest.mark.usefixtures('library')
+def test_single_cjk_character(client):
+    assert sorted(ids(client, '译')) == ['p1', 'p4']
+    assert ids(client, '项') == ['p3']  # last character of a run
+    assert ids(client, '本語') == ['p4']
+
+@pytest.mark.usefixtures('library')
+def test_latin_prefix_and_mixed_terms(client):
+    assert ids(client, 'pyth') == ['p2']
+    assert ids(client, 'REVIEW') == ['p2']
+    assert ids(client, 'gpt翻译') == ['p4']
+    assert ids(client, '翻译 translate') == ['p4']
+    assert ids(client, 'xyzzy') == []
+    assert search(client, '"(') == {'results': [], 'nextOffset': None}
+
+def test_title_hits_rank_first_and_are_highlighted(client, make_prompt):
+    client.post('/api/prompts', json=make_prompt(1, title='会议', content='请把这段翻译润色一下'))
+    client.post('/api/prompts', json=make_prompt(2, title='翻译助手', content='英文'))
+    results = search(client, '翻译')['results']
+    assert [r['id'] for r in results] == ['p2', 'p1']
+    assert results[0]['title'] == '<mark>翻译</mark>助手'
+    assert results[1]['snippet'] == '请把这段<mark>翻译</mark>润色一下'
+
+def test_search_pages(client, make_prompt):
+    for i in range(5):
+        client.post('/api/prompts', json=make_prompt(i, content=f'提示词 {i}'))
+    first = search(client, '提示', limit=3)
+    rest = search(client, '提示', limit=3, offset=first['nextOffset'])
+    assert len(first['results']) == 3 and len(rest['results']) == 2 and rest['nextOffset'] is None
+    assert client.get('/api/prompts/search').status_code == 400
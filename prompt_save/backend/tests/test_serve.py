@@ -0,0 +1,70 @@
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_until_up(url, proc, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert proc.poll() is None, proc.communicate()
+        try:
+            urllib.request.urlopen(url + '/api/tags', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    pytest.fail('serve.py did not start')
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM') or os.name == 'nt', reason='POSIX signals')
+def test_sigterm_lets_the_in_flight_request_finish(tmp_path):
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    proc = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, 'serve.py'), '--port', str(port), '--threads', '2'],
+                            cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        wait_until_up(url, proc)
+
+        # Hold the write lock so the request below is still running when SIGTERM arrives
+        lock = sqlite3.connect(tmp_path / 'prompts.db', isolation_level=None)
+        lock.execute('BEGIN IMMEDIATE')
+        result = {}
+
+        def post():
+            prompt = {'id': 'p1', 'title': 't', 'content': 'c', 'tags': [], 'createdAt': 1, 'updatedAt': 1}
+            req = urllib.request.Request(url + '/api/prompts', data=json.dumps(prompt).encode(),
+                                         headers={'Content-Type': 'application/json'})
+            result['status'] = urllib.request.urlopen(req, timeout=10).status
+
+        client = threading.Thread(target=post)
+        client.start()
+        time.sleep(0.5)
+        proc.send_signal(signal.SIGTERM)
+        time.sleep(1.5)  # the loop notices the signal within one asyncore_loop_timeout
+        with pytest.raises(OSError):  # no longer listening
+            urllib.request.urlopen(url + '/api/tags', timeout=1)
+        lock.execute('ROLLBACK')
+        lock.close()
+
+        client.join(10)
+        assert result.get('status') == 201
+        output, _ = proc.communicate(timeout=15)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.communicate()
+    assert proc.returncode == 0, output
+    assert 'Bad file descriptor' not in output and 'Traceback' not in output, output
+    assert 'abandoning' not in output
@@ -0,0 +1,75 @@
+import time
+
+def sync(client, prompts, tags=()):
+    r = client.post('/api/sync', json={'prompts': prompts, 'tags': list(tags)})
+    assert r.status_code == 200
+    return r.get_json()
+
+def queued(raw_db):
+    return raw_db.execute('SELECT COUNT(*) FROM prompts_fts_queue').fetchone()[0]
+
+def test_sync_reports_each_item(client, make_prompt):
+    sync(client, [make_prompt(1), make_prompt(2)])
+    body = sync(client, [
+        make_prompt(1, title='newer', updatedAt=5000),  # newer -> updated
+        make_prompt(2, title='older', updatedAt=1),     # older -> unchanged
+        make_prompt(3),                                 # new -> inserted
+        {'id': 'bad', 'title': 'no content'},           # invalid
+    ])
+    assert [r['status'] for r in body['results']] == ['updated', 'unchanged', 'inserted', 'invalid']
+    assert body['counts'] == {'updated': 1, 'unchanged': 1, 'inserted': 1, 'invalid': 1}
+
+    prompts = {p['id']: p for p in client.get('/api/prompts').get_json()}
+    assert sorted(prompts) == ['p1', 'p2', 'p3']
+    assert prompts['p1']['title'] == 'newer' and prompts['p2']['title'] == 'title 2'
+
+def test_sync_round_trip_across_batches(server, client, make_prompt, monkeypatch):
+    monkeypatch.setattr(server, 'SYNC_BATCH_SIZE', 7)
+    prompts = [make_prompt(i, tags=['t%d' % (i % 3)]) for i in range(30)]
+    prompts.append(make_prompt(5, title='same id later in the payload', updatedAt=9000))
+    body = sync(client, prompts, tags=['t0', 't1', 't2'])
+    assert body['counts'] == {'inserted': 30, 'updated': 1}
+
+    got = {p['id']: p for p in client.get('/api/prompts').get_json()}
+    assert len(got) == 30
+    assert got['p5']['title'] == 'same id later in the payload'
+    assert got['p7']['content'] == 'body of prompt 7' and got['p7']['tags'] == ['t1']
+    assert client.get('/api/tags').get_json() == ['t0', 't1', 't2']
+
+    # Syncing the same payload again changes nothing
+    assert sync(client, prompts)['counts'] == {'unchanged': 31}
+
+def test_sync_leaves_indexing_to_the_worker_or_next_search(server, client, raw_db, make_prompt):
+    sync(client, [make_prompt(i, content=f'walnut {i}') for i in range(3)])
+    assert queued(raw_db) == 3
+
+    # No worker running: the search indexes the queue itself
+    r = client.get('/api/prompts/search?q=walnut').get_json()
+    assert len(r['results']) == 3 and queued(raw_db) == 0
+
+    thread = server.start_index_worker()
+    try:
+        sync(client, [make_prompt(i, content=f'pecan {i}') for i in range(3, 6)])
+        deadline = time.monotonic() + 5
+        while queued(raw_db) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert queued(raw_db) == 0
+    finally:
+        server.stop_index_worker(thread, 5)
+    assert not thread.is_alive()
+    assert len(client.get('/api/prompts/search?q=pecan').get_json()['results']) == 3
+
+def test_duplicate_id_in_one_statement_keeps_the_newest(client, make_prompt):
+    body = sync(client, [make_prompt(1), make_prompt(1, title='newest', updatedAt=9000), make_prompt(1, title='stale')])
+    assert [r['status'] for r in body['results']] == ['inserted', 'updated', 'unchanged']
+    assert client.get('/api/prompts').get_json()[0]['title'] == 'newest'
+
+def test_synced_bodies_are_compressed_when_indexed(client, raw_db, make_prompt):
+    long_body = 'Rewrite the paragraph below in plain English. ' * 10
+    sync(client, [make_prompt(1, content=long_body), make_prompt(2, content='short')])
+    codecs = lambda: sorted(r[0] for r in raw_db.execute('SELECT codec FROM prompt_blobs'))
+    assert codecs() == ['raw', 'raw']
+
+    client.get('/api/prompts/search?q=plain')
+    assert codecs() == ['raw', 'zlib']  # too short to be worth compressing stays raw
+    assert {p['content'] for p in client.get('/api/prompts').get_json()} == {long_body, 'short'}
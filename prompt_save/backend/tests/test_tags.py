@@ -0,0 +1,66 @@
+import pytest
+
+@pytest.fixture
+def tagged(client, make_prompt):
+    for name in ('work', 'home', 'draft'):
+        client.post('/api/tags', json={'name': name})
+    client.post('/api/prompts', json=make_prompt(1, tags=['work', 'draft']))
+    client.post('/api/prompts', json=make_prompt(2, tags=['home', 'work']))
+    client.post('/api/prompts', json=make_prompt(3, tags=[]))
+
+def tags_of(client):
+    return {p['id']: p['tags'] for p in client.get('/api/prompts?fields=id,tags').get_json()}
+
+def filtered(client, tag):
+    return sorted(p['id'] for p in client.get('/api/prompts', query_string={'fields': 'id', 'tag': tag}).get_json())
+
+def index_rows(raw_db):
+    return sorted(raw_db.execute('SELECT prompt_id, tag, position FROM prompt_tags'))
+
+def test_tag_filter_follows_edits(client, raw_db, make_prompt, tagged):
+    assert filtered(client, 'work') == ['p1', 'p2']
+    assert filtered(client, 'nope') == []
+    client.put('/api/prompts/p1', json=make_prompt(1, tags=['home'], updatedAt=5000))
+    assert filtered(client, 'work') == ['p2'] and filtered(client, 'home') == ['p1', 'p2']
+
+    # Writes that bypass the API keep the index in step too
+    raw_db.execute('''UPDATE prompts SET tags = '["draft", "work"]' WHERE id = 'p3' ''')
+    assert filtered(client, 'draft') == ['p3']
+    assert index_rows(raw_db) == [('p1', 'home', 0), ('p2', 'home', 0), ('p2', 'work', 1),
+                                  ('p3', 'draft', 0), ('p3', 'work', 1)]
+    raw_db.execute("DELETE FROM prompts WHERE id = 'p3'")
+    assert ('p3', 'draft', 0) not in index_rows(raw_db)
+
+def test_delete_tag_cascades(client, tagged):
+    r = client.delete('/api/tags/work')
+    assert r.status_code == 200 and r.get_json()['updatedPrompts'] == 2
+    assert client.get('/api/tags').get_json() == ['home', 'draft']
+    assert tags_of(client) == {'p1': ['draft'], 'p2': ['home'], 'p3': []}
+    updated = {p['id']: p['updatedAt'] for p in client.get('/api/prompts?fields=id,updatedAt').get_json()}
+    assert updated['p1'] > 1001 and updated['p3'] == 1003
+
+def test_rename_keeps_positions_and_merges(client, tagged):
+    r = client.put('/api/tags/work', json={'newName': 'job'})
+    assert r.get_json() == {'name': 'job', 'updatedPrompts': 2}
+    assert tags_of(client) == {'p1': ['job', 'draft'], 'p2': ['home', 'job'], 'p3': []}
+    assert filtered(client, 'job') == ['p1', 'p2'] and filtered(client, 'work') == []
+
+    # Onto an existing tag: p2 already had "home", so it is not listed twice
+    client.put('/api/tags/job', json={'newName': 'home'})
+    assert tags_of(client) == {'p1': ['home', 'draft'], 'p2': ['home'], 'p3': []}
+    assert client.get('/api/tags').get_json() == ['home', 'draft']
+
+def test_rename_errors(client, tagged):
+    assert client.put('/api/tags/nope', json={'newName': 'x'}).status_code == 404
+    assert client.put('/api/tags/work', json={'newName': '  '}).status_code == 400
+    assert client.put('/api/tags/work', json={'newName': 'work'}).get_json()['updatedPrompts'] == 0
+
+def test_tag_order(client, tagged):
+    assert client.post('/api/tags', json={'name': 'work'}).status_code == 201  # already there: ignored
+    assert client.get('/api/tags').get_json() == ['work', 'home', 'draft']
+    client.post('/api/tags/reorder', json={'orderedTags': ['draft', 'work', 'home']})
+    assert client.get('/api/tags').get_json() == ['draft', 'work', 'home']
+    r = client.post('/api/tags/move', json={'name': 'home', 'prevName': 'draft', 'nextName': 'work'})
+    assert r.status_code == 200
+    assert client.get('/api/tags').get_json() == ['draft', 'home', 'work']
+    assert client.post('/api/tags/move', json={'name': 'nope', 'prevName': 'draft'}).status_code == 404
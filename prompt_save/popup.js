@@ -50,9 +50,68 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Functions
 
+    // Delta sync cursor (server change_log position the local cache reflects)
+    let syncCursor = null;
+
+    function getLocal(keys) {
+        return new Promise(resolve => chrome.storage.local.get(keys, resolve));
+    }
+
+    function sortPrompts() {
+        prompts.sort((a, b) => {
+            const orderA = a.orderIndex !== undefined ? a.orderIndex : 0;
+            const orderB = b.orderIndex !== undefined ? b.orderIndex : 0;
+            if (orderA !== orderB) return orderA - orderB;
+            return b.updatedAt - a.updatedAt;
+        });
+    }
+
+    // Apply only what changed on the server since the stored cursor.
+    // Returns false if the server can't be reached, so the caller falls back.
+    async function deltaSync(cached) {
+        let cursor = cached.syncCursor;
+        const byId = new Map((cached.prompts || []).map(p => [p.id, p]));
+        let newTags = cached.tags || [];
+        let hasMore = true;
+
+        while (hasMore) {
+            const res = await fetch(`${API_BASE}/changes?since=${cursor}`).catch(e => null);
+            if (!res || !res.ok) return false;
+            const delta = await res.json();
+
+            delta.prompts.forEach(p => byId.set(p.id, p));
+            delta.deletedPrompts.forEach(id => byId.delete(id));
+            if (delta.tags !== null) {
+                newTags = delta.tags;
+            } else if (delta.deletedTags.length) {
+                newTags = newTags.filter(t => !delta.deletedTags.includes(t));
+            }
+            cursor = delta.cursor;
+            hasMore = delta.hasMore;
+        }
+
+        prompts = Array.from(byId.values());
+        tags = newTags;
+        syncCursor = cursor;
+        sortPrompts();
+        return true;
+    }
+
     async function loadData() {
         try {
-            // Try fetching from server first
+            const cached = await getLocal(['prompts', 'tags', 'syncCursor']);
+            if (cached.syncCursor !== undefined && cached.syncCursor !== null && cached.prompts) {
+                if (await deltaSync(cached)) {
+                    isOnline = true;
+                    renderTagFilters();
+                    renderPrompts();
+                    updateLocalCache();
+                    return;
+                }
+            }
+
+            // Full load. Take the cursor first: changes made during the load are replayed next time.
+            const cursorRes = await fetch(`${API_BASE}/changes`).catch(e => null);
             const [promptsRes, tagsRes] = await Promise.all([
                 fetch(`${API_BASE}/prompts`).catch(e => null),
                 fetch(`${API_BASE}/tags`).catch(e => null)
@@ -61,6 +120,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (promptsRes && promptsRes.ok && tagsRes && tagsRes.ok) {
                 prompts = await promptsRes.json();
                 tags = await tagsRes.json();
+                syncCursor = cursorRes && cursorRes.ok ? (await cursorRes.json()).cursor : null;
                 isOnline = true;
                 
                 // Check if we need to migrate local data to server
@@ -126,7 +186,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function updateLocalCache() {
-        chrome.storage.local.set({ prompts: prompts, tags: tags });
+        chrome.storage.local.set({ prompts: prompts, tags: tags, syncCursor: syncCursor });
     }
 
     // --- Tags Logic ---
@@ -196,7 +256,7 @@ document.addEventListener('DOMContentLoaded', () => {
                     
                     renderTagFilters();
                     updateLocalCache();
-                    syncTagReorder();
+                    syncTagMove(index);
                 }
                 return false;
             });
@@ -205,6 +265,25 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    async function syncTagMove(newIndex) {
+        if (!isOnline) return;
+        try {
+            const res = await fetch(`${API_BASE}/tags/move`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    name: tags[newIndex],
+                    prevName: newIndex > 0 ? tags[newIndex - 1] : null,
+                    nextName: newIndex < tags.length - 1 ? tags[newIndex + 1] : null
+                })
+            });
+            if (!res.ok) throw new Error(`Move failed: ${res.status}`);
+        } catch (e) {
+            console.error('Error moving tag, falling back to full reorder', e);
+            await syncTagReorder();
+        }
+    }
+
     async function syncTagReorder() {
         if (isOnline) {
              try {
@@ -464,9 +543,8 @@ document.addEventListener('DOMContentLoaded', () => {
             // Swap in array
             [prompts[index], prompts[prevIndex]] = [prompts[prevIndex], prompts[index]];
             
-            // Re-assign order indices for all (or just affected)
-            // To be robust, let's re-assign for the whole list or send the new order of IDs to server.
-            await syncReorder();
+            // Only the moved prompt gets a new (fractional) order key between its neighbours
+            await syncMove(prevIndex);
         }
     }
 
@@ -482,6 +560,61 @@ document.addEventListener('DOMContentLoaded', () => {
         if (index < prompts.length - 1) {
             const nextIndex = index + 1;
             [prompts[index], prompts[nextIndex]] = [prompts[nextIndex], prompts[index]];
+            await syncMove(nextIndex);
+        }
+    }
+
+    // Server spaces full reorders ORDER_STEP apart (see server.py)
+    const ORDER_STEP = 1024;
+
+    function localKeyBetween(prev, next) {
+        // Same rule as the server's _key_between; null when the neighbours leave no room
+        const prevKey = prev ? (prev.orderIndex || 0) : null;
+        const nextKey = next ? (next.orderIndex || 0) : null;
+        if (prevKey === null && nextKey === null) return 0;
+        if (prevKey === null) return nextKey - ORDER_STEP;
+        if (nextKey === null) return prevKey + ORDER_STEP;
+        if (nextKey <= prevKey) return null;
+        return (prevKey + nextKey) / 2;
+    }
+
+    async function syncMove(newIndex) {
+        // Move a single prompt: the server places it between its new neighbours (O(1) rows)
+        const moved = prompts[newIndex];
+        const prev = prompts[newIndex - 1];
+        const next = prompts[newIndex + 1];
+        const localKey = localKeyBetween(prev, next);
+        if (!isOnline || localKey === null) {
+            await syncReorder();
+            return;
+        }
+
+        // Optimistic update: renderPrompts sorts by orderIndex, so the key must change first
+        moved.orderIndex = localKey;
+        renderPrompts();
+
+        try {
+            const res = await fetch(`${API_BASE}/prompts/move`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    id: moved.id,
+                    prevId: prev ? prev.id : null,
+                    nextId: next ? next.id : null
+                })
+            });
+            if (!res.ok) throw new Error(`Move failed: ${res.status}`);
+            const result = await res.json();
+            if (result.renumbered) {
+                // Every other key changed on the server too
+                await loadData();
+                return;
+            }
+            moved.orderIndex = result.orderIndex;
+            renderPrompts();
+            updateLocalCache();
+        } catch (e) {
+            console.error('Move sync failed, falling back to full reorder', e);
             await syncReorder();
         }
     }
@@ -489,7 +622,7 @@ document.addEventListener('DOMContentLoaded', () => {
     async function syncReorder() {
         // Update local orderIndex based on array position
         prompts.forEach((p, idx) => {
-            p.orderIndex = idx;
+            p.orderIndex = idx * ORDER_STEP;
         });
 
         renderPrompts(); // Optimistic update
@@ -601,7 +734,7 @@ document.addEventListener('DOMContentLoaded', () => {
             // If offline or failed to get orderIndex, set a temporary one
             if (promptData.orderIndex === undefined) {
                  const minOrder = prompts.length > 0 ? Math.min(...prompts.map(p => p.orderIndex || 0)) : 0;
-                 promptData.orderIndex = minOrder - 1;
+                 promptData.orderIndex = minOrder - ORDER_STEP;
             }
 
             prompts.unshift(promptData); // Add to top